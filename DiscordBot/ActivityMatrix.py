@@ -0,0 +1,314 @@
+from datetime import datetime, date
+from dateutils import DAY_ID_FORMAT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class ActivityMatrix:
+    """
+    Dense users x days matrix of a guild's tracked minutes for vectorized analytics
+
+    Built once from the day documents and then added to as minutes are
+    flushed, so range sums, rolling windows, best days and percentiles are
+    numpy operations over an int32 array instead of Python loops over dicts.
+    numpy is optional: check isAvailable() before creating one
+
+    Attributes
+    __________
+    __userIndex (dict): { userId(str): row }
+    __userIds (list): [userId(str)] the user of each row
+    __firstOrdinal (int): date.toordinal() of the day in column 0
+    __numDays (int): Number of columns in use
+    __minutes (numpy.ndarray): int32 array of at least len(__userIds) x __numDays minutes
+
+    Functions
+    __________
+    isAvailable() -> bool
+        Whether numpy is installed
+    add(dayId, userMinutes)
+        Adds minutes for a day
+    setDay(dayId, userMinutes)
+        Replaces the minutes for a day
+    getRange() -> startDayId(str), endDayId(str)
+        The first and last day in the matrix
+    userTotals(startDayId, endDayId) -> dict: { userId(str): int }
+        Each user's minutes in a range of days
+    summarize(startDayId, endDayId, userId, windowDays) -> dict
+        Totals, best day, best window and percentiles for a range of days
+    """
+
+    def __init__(self, dayTimes=None):
+        """
+        Parameters
+        ----------
+        dayTimes : dict { dayId: { userId(str): int } }
+            Minutes to start with
+        """
+
+        self.__userIndex = {}
+        self.__userIds = []
+        self.__firstOrdinal = None
+        self.__numDays = 0
+        self.__minutes = np.zeros((16, 64), dtype=np.int32)
+
+        for dayId in sorted(dayTimes or {}):
+            self.add(dayId, dayTimes[dayId])
+
+    @staticmethod
+    def isAvailable():
+        """
+        Whether numpy is installed
+
+        Returns
+        ----------
+        bool
+        """
+
+        return np != None
+
+    def add(self, dayId, userMinutes):
+        """
+        Adds minutes for a day
+
+        Parameters
+        ----------
+        dayId : str
+            The day the minutes were tracked on ('%Y-%m-%d')
+        userMinutes : dict { userId(str): int }
+            Minutes to add for each user
+        """
+
+        if not userMinutes:
+            return
+
+        column = self.__column(dayId, grow=True)
+        rows = [self.__row(userId) for userId in userMinutes]
+
+        np.add.at(self.__minutes[:, column], rows, list(userMinutes.values()))
+
+    def setDay(self, dayId, userMinutes):
+        """
+        Replaces the minutes for a day
+
+        Parameters
+        ----------
+        dayId : str
+            The day the minutes were tracked on ('%Y-%m-%d')
+        userMinutes : dict { userId(str): int }
+            Every user's minutes for the day
+        """
+
+        column = self.__column(dayId, grow=True)
+        self.__minutes[:, column] = 0
+
+        self.add(dayId, userMinutes)
+
+    def getRange(self):
+        """
+        The first and last day in the matrix
+
+        Returns
+        ----------
+        startDayId : str
+            None if the matrix is empty
+        endDayId : str
+            None if the matrix is empty
+        """
+
+        if self.__numDays == 0:
+            return None, None
+
+        return self.__dayId(0), self.__dayId(self.__numDays - 1)
+
+    def userTotals(self, startDayId=None, endDayId=None):
+        """
+        Each user's minutes in a range of days
+
+        Parameters
+        ----------
+        startDayId : str
+            The first day to include, or None for the first day in the matrix
+        endDayId : str
+            The last day to include, or None for the last day in the matrix
+
+        Returns
+        ----------
+        dict: { userId(str): int }
+            Users with no minutes in the range are left out
+        """
+
+        totals = self.__userSums(*self.__columns(startDayId, endDayId))
+
+        return {self.__userIds[row]: int(totals[row]) for row in np.flatnonzero(totals)}
+
+    def summarize(self, startDayId=None, endDayId=None, userId=None, windowDays=7):
+        """
+        Totals, best day, best window and percentiles for a range of days
+
+        Parameters
+        ----------
+        startDayId : str
+            The first day to include, or None for the first day in the matrix
+        endDayId : str
+            The last day to include, or None for the last day in the matrix
+        userId : str
+            A user to include personal stats for, or None
+        windowDays : int
+            Length of the rolling window for bestWindow
+
+        Returns
+        ----------
+        dict
+            'startDayId', 'endDayId' : the range that was used
+            'total'       : int minutes across every user
+            'activeUsers' : int users with any minutes
+            'bestDay'     : (dayId, int) the day with the most minutes (None if there are none)
+            'bestWindow'  : (startDayId, int) the windowDays days with the most minutes (None if there are none)
+            'percentiles' : { 50: int, 90: int } minutes per active user
+            'userTotal', 'userPercentile', 'userBestDay' : the user's minutes, the percentage
+                of active users they beat and their best day (only if userId is given)
+        """
+
+        start, end = self.__columns(startDayId, endDayId)
+        block = self.__minutes[:len(self.__userIds), start:end]
+
+        dayTotals = block.sum(axis=0, dtype=np.int64)
+        userTotals = block.sum(axis=1, dtype=np.int64)
+        active = userTotals[userTotals > 0]
+
+        summary = {
+            'startDayId': self.__dayId(start) if end > start else startDayId,
+            'endDayId': self.__dayId(end - 1) if end > start else endDayId,
+            'total': int(dayTotals.sum()),
+            'activeUsers': int(len(active)),
+            'bestDay': self.__best(dayTotals, start),
+            'bestWindow': self.__best(self.__windowSums(dayTotals, windowDays), start),
+            'percentiles': {q: int(np.percentile(active, q)) if len(active) else 0 for q in (50, 90)},
+        }
+
+        if userId != None:
+            row = self.__userIndex.get(userId)
+            userTotal = int(userTotals[row]) if row != None else 0
+
+            summary['userTotal'] = userTotal
+            summary['userPercentile'] = int(100 * np.count_nonzero(active < userTotal) / len(active)) if len(active) else 0
+            summary['userBestDay'] = self.__best(block[row], start) if row != None else None
+
+        return summary
+
+    def __row(self, userId):
+        """
+        Private helper to get (or add) the user's row
+        """
+
+        row = self.__userIndex.get(userId)
+        if row != None:
+            return row
+
+        row = len(self.__userIds)
+        self.__userIds.append(userId)
+        self.__userIndex[userId] = row
+
+        if row >= self.__minutes.shape[0]:
+            self.__resize(self.__minutes.shape[0] * 2, self.__minutes.shape[1], 0)
+
+        return row
+
+    def __column(self, dayId, grow=False):
+        """
+        Private helper to get the day's column, growing the matrix if grow and it's outside it
+        """
+
+        ordinal = datetime.strptime(dayId, DAY_ID_FORMAT).toordinal()
+
+        if not grow:
+            return ordinal - self.__firstOrdinal
+
+        if self.__firstOrdinal == None:
+            self.__firstOrdinal = ordinal
+
+        if ordinal < self.__firstOrdinal:
+            shift = self.__firstOrdinal - ordinal
+            self.__resize(self.__minutes.shape[0], max(self.__minutes.shape[1], self.__numDays + shift) * 2, shift)
+            self.__firstOrdinal = ordinal
+            self.__numDays += shift
+
+        column = ordinal - self.__firstOrdinal
+
+        if column >= self.__minutes.shape[1]:
+            self.__resize(self.__minutes.shape[0], (column + 1) * 2, 0)
+
+        self.__numDays = max(self.__numDays, column + 1)
+
+        return column
+
+    def __columns(self, startDayId, endDayId):
+        """
+        Private helper to get the [start, end) columns of a range of days, clipped to the matrix
+        """
+
+        if self.__numDays == 0:
+            return 0, 0
+
+        start = self.__column(startDayId) if startDayId != None else 0
+        end = self.__column(endDayId) + 1 if endDayId != None else self.__numDays
+
+        start = min(max(start, 0), self.__numDays)
+        end = min(max(end, start), self.__numDays)
+
+        return start, end
+
+    def __dayId(self, column):
+        """
+        Private helper to get the day id of a column
+        """
+
+        return date.fromordinal(self.__firstOrdinal + column).strftime(DAY_ID_FORMAT)
+
+    def __resize(self, numRows, numColumns, columnShift):
+        """
+        Private helper to reallocate the matrix, moving the existing minutes columnShift columns right
+        """
+
+        minutes = np.zeros((numRows, numColumns), dtype=np.int32)
+        rows, columns = self.__minutes.shape
+        minutes[:rows, columnShift:columnShift + min(columns, numColumns - columnShift)] = self.__minutes[:, :numColumns - columnShift]
+        self.__minutes = minutes
+
+    def __userSums(self, start, end):
+        """
+        Private helper to sum each user's minutes over columns [start, end)
+        """
+
+        return self.__minutes[:len(self.__userIds), start:end].sum(axis=1, dtype=np.int64)
+
+    def __windowSums(self, dayTotals, windowDays):
+        """
+        Private helper to get the sums of every windowDays consecutive days (fewer if the range is shorter)
+        """
+
+        if len(dayTotals) <= windowDays:
+            return dayTotals.sum(keepdims=True)
+
+        cumulative = np.concatenate(([0], np.cumsum(dayTotals)))
+
+        return cumulative[windowDays:] - cumulative[:-windowDays]
+
+    def __best(self, values, start):
+        """
+        Private helper to get the day id (offset by start) and value of the largest value
+
+        Returns
+        ----------
+        (dayId, int)
+            None if every value is 0
+        """
+
+        if len(values) == 0 or values.max() <= 0:
+            return None
+
+        i = int(values.argmax())
+
+        return self.__dayId(start + i), int(values[i])
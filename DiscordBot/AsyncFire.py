@@ -0,0 +1,181 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncFire:
+    """
+    Awaitable facade over Fire that keeps blocking database calls off of the event loop
+
+    Every Fire call is run on a bounded thread pool so that a slow round trip
+    only blocks the command that made it, not the gateway (heartbeats included)
+
+    Attributes
+    __________
+    fire (Fire obj): The synchronous fire instance calls are forwarded to
+    __executor (ThreadPoolExecutor): The bounded pool the calls are run on
+
+    Functions
+    __________
+    async fetchAllMembers(guild) -> dict: { discord.member.id: discord.member.display_name }
+    async fetchTotalTimes(guild) -> dict: { discord.member.id: int }
+    async postAllTimeDeltas(guildDeltas) -> list(guildId)
+    async fetchAllDateTimes(guild) -> dict: { date: { discord.member.id: int } }
+    async fetchDateTimes(guild, startDayId, endDayId) -> dict: { date: { discord.member.id: int } }
+    async fetchDayTimes(guild, dayId) -> dict: { discord.member.id: int }
+    async fetchWeekTimes(guild) -> dict: { discord.member.id: int }, startDayId(str), endDayId(str)
+    async fetchUserStats(guild, userId) -> dict
+    async fetchActivitySummary(guild, startDayId, endDayId, userId) -> dict
+    async migrateDateTimes(guild)
+    async fetchDiscordPoints(guild) -> dict: { discord.member.id: int }
+    async fetchLeaderboardPage(guild, documentName, page, pageSize) -> list((userId, int)), page(int), pages(int)
+    async fetchLeaderboardRank(guild, documentName, userId) -> int
+    fetchDocumentVersion(guild, documentName) -> int
+    fetchMembersVersion(guild) -> int
+    async postPointsIncrement(guild, userId, amount, reason, reference) -> int
+    async postPointsDecrement(guild, userId, amount, reason, reference) -> points(int), errorString(str)
+    async startPointsLedger(guild)
+    async compactPointsLedger(guild, before) -> int
+    async postNewReward(guild, rewardTitle, rewardCost)
+    async fetchAllRewards(guild) -> dict: { rewardTitle(str) : cost(int) }
+    async fetchActiveBets(guild) -> dict: { betId(str): summary(dict) }
+    async fetchBet(guild, betId) -> betDict(dict)
+    async migrateBets(guild)
+    async postNewBet(guild, userId, betTitle, betOptions, betStartedAt) -> betId(int)
+    async postCloseBet(guild, user, betId) -> betDict(dict), errorString(str)
+    async postCompleteBet(guild, user, betId, winningOptionId) -> betDict(dict), userRewards(dict), errorString(str)
+    async postBet(guild, user, betId, betOption, betAmount) -> betDict(dict), errorString(str)
+    async postFeedback(guildId, userId, feedbackString)
+    async subscribe(guild)
+    async unsubscribe(guild)
+    shutdown()
+        Waits for running calls and stops the thread pool
+
+    See Fire for the documentation of each call
+    """
+
+    fire = None
+
+    def __init__(self, fire, maxWorkers=8):
+        self.fire = fire
+        self.__executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='fire')
+
+    async def fetchAllMembers(self, guild):
+        # Served from the member cache (or discord), no need for the pool
+        return await self.fire.fetchAllMembers(guild)
+
+    async def fetchTotalTimes(self, guild):
+        return await self.__run(self.fire.fetchTotalTimes, guild)
+
+    async def postAllTimeDeltas(self, guildDeltas):
+        return await self.__run(self.fire.postAllTimeDeltas, guildDeltas)
+
+    async def fetchAllDateTimes(self, guild):
+        return await self.__run(self.fire.fetchAllDateTimes, guild)
+
+    async def fetchDateTimes(self, guild, startDayId=None, endDayId=None):
+        return await self.__run(self.fire.fetchDateTimes, guild, startDayId, endDayId)
+
+    async def fetchDayTimes(self, guild, dayId):
+        return await self.__run(self.fire.fetchDayTimes, guild, dayId)
+
+    async def fetchWeekTimes(self, guild):
+        return await self.__run(self.fire.fetchWeekTimes, guild)
+
+    async def fetchUserStats(self, guild, userId):
+        return await self.__run(self.fire.fetchUserStats, guild, userId)
+
+    async def fetchActivitySummary(self, guild, startDayId=None, endDayId=None, userId=None):
+        return await self.__run(self.fire.fetchActivitySummary, guild, startDayId, endDayId, userId)
+
+    async def migrateDateTimes(self, guild):
+        return await self.__run(self.fire.migrateDateTimes, guild)
+
+    async def fetchDiscordPoints(self, guild):
+        return await self.__run(self.fire.fetchDiscordPoints, guild)
+
+    async def fetchLeaderboardPage(self, guild, documentName, page, pageSize=20):
+        return await self.__run(self.fire.fetchLeaderboardPage, guild, documentName, page, pageSize)
+
+    async def fetchLeaderboardRank(self, guild, documentName, userId):
+        return await self.__run(self.fire.fetchLeaderboardRank, guild, documentName, userId)
+
+    def fetchDocumentVersion(self, guild, documentName):
+        # Kept in memory, no need for the pool (or to await)
+        return self.fire.fetchDocumentVersion(guild, documentName)
+
+    def fetchMembersVersion(self, guild):
+        return self.fire.fetchMembersVersion(guild)
+
+    async def postPointsIncrement(self, guild, userId, amount, reason='adjustment', reference=None):
+        return await self.__run(self.fire.postPointsIncrement, guild, userId, amount, reason, reference)
+
+    async def postPointsDecrement(self, guild, userId, amount, reason='adjustment', reference=None):
+        return await self.__run(self.fire.postPointsDecrement, guild, userId, amount, reason, reference)
+
+    async def startPointsLedger(self, guild):
+        return await self.__run(self.fire.startPointsLedger, guild)
+
+    async def compactPointsLedger(self, guild, before):
+        return await self.__run(self.fire.compactPointsLedger, guild, before)
+
+    async def postNewReward(self, guild, rewardTitle, rewardCost):
+        return await self.__run(self.fire.postNewReward, guild, rewardTitle, rewardCost)
+
+    async def fetchAllRewards(self, guild):
+        return await self.__run(self.fire.fetchAllRewards, guild)
+
+    async def fetchActiveBets(self, guild):
+        return await self.__run(self.fire.fetchActiveBets, guild)
+
+    async def fetchBet(self, guild, betId):
+        return await self.__run(self.fire.fetchBet, guild, betId)
+
+    async def migrateBets(self, guild):
+        return await self.__run(self.fire.migrateBets, guild)
+
+    async def postNewBet(self, guild, userId, betTitle, betOptions, betStartedAt):
+        return await self.__run(self.fire.postNewBet, guild, userId, betTitle, betOptions, betStartedAt)
+
+    async def postCloseBet(self, guild, user, betId):
+        return await self.__run(self.fire.postCloseBet, guild, user, betId)
+
+    async def postCompleteBet(self, guild, user, betId, winningOptionId):
+        return await self.__run(self.fire.postCompleteBet, guild, user, betId, winningOptionId)
+
+    async def postBet(self, guild, user, betId, betOption, betAmount):
+        return await self.__run(self.fire.postBet, guild, user, betId, betOption, betAmount)
+
+    async def postFeedback(self, guildId, userId, feedbackString):
+        return await self.__run(self.fire.postFeedback, guildId, userId, feedbackString)
+
+    async def subscribe(self, guild):
+        return await self.__run(self.fire.subscribe, guild)
+
+    async def unsubscribe(self, guild):
+        return await self.__run(self.fire.unsubscribe, guild)
+
+    def shutdown(self):
+        """
+        Waits for running calls to finish and stops the thread pool
+        """
+
+        self.__executor.shutdown(wait=True)
+
+    async def __run(self, func, *args):
+        """
+        Private helper to run a blocking function on the thread pool
+
+        Parameters
+        ----------
+        func : callable
+            The blocking function to run
+        *args
+            Arguments passed to func
+
+        Returns
+        ----------
+        The return value of func
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(func, *args))
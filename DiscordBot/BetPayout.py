@@ -0,0 +1,70 @@
+class BetPayout:
+    """
+    Splits a bet's pool between the users that bet on the winning option
+
+    Each winner gets pool * amount / winningAmount points. Shares are worked
+    out with integers, rounded down, and the points left over from rounding
+    go one each to the winners with the largest remainders (ties go to the
+    larger bet, then the smaller user id), so the whole pool is paid out and
+    the same bet always pays the same amounts
+
+    Attributes
+    __________
+    pool (int): Total amount bet on every option
+    __acceptedBy (dict): { userId(str): { 'betOption': str, 'amount': int } }
+
+    Functions
+    __________
+    getPayouts(winningOption) -> dict: { userId(str): int }
+        Points won by each user that bet on the winning option
+    """
+
+    pool = 0
+
+    def __init__(self, options, acceptedBy):
+        """
+        Parameters
+        ----------
+        options : dict { betOption(str): int }
+            Total amount bet on each option
+        acceptedBy : dict { userId(str): { 'betOption': str, 'amount': int } }
+            Each user's bet
+        """
+
+        self.pool = sum(int(amount) for amount in options.values())
+        self.__acceptedBy = acceptedBy
+
+    def getPayouts(self, winningOption):
+        """
+        Points won by each user that bet on the winning option
+
+        Parameters
+        ----------
+        winningOption : str
+            The option that won
+
+        Returns
+        ----------
+        dict: { userId(str): int }
+            Empty if nobody bet on the winning option
+        """
+
+        stakes = {userId: int(userBet['amount']) for userId, userBet in self.__acceptedBy.items()
+                  if userBet['betOption'] == winningOption and int(userBet['amount']) > 0}
+        winningAmount = sum(stakes.values())
+
+        if winningAmount == 0:
+            return {}
+
+        payouts = {}
+        remainders = []
+        for userId, amount in stakes.items():
+            share, remainder = divmod(self.pool * amount, winningAmount)
+            payouts[userId] = share
+            remainders.append((-remainder, -amount, int(userId), userId))
+
+        leftover = self.pool - sum(payouts.values())
+        for remainder, amount, sortId, userId in sorted(remainders)[:leftover]:
+            payouts[userId] += 1
+
+        return payouts
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+class CacheWarmer:
+    """
+    Preloads each guild's documents and member names so the first command after a restart is fast
+
+    Guilds are warmed concurrently, at most maxConcurrency at a time, with
+    guilds that have people in voice first. Warming is idempotent: guilds that
+    are being warmed, or were warmed less than maxAge seconds ago, are skipped,
+    so calling it again on reconnect is cheap
+
+    Attributes
+    __________
+    fire (AsyncFire obj): The fire instance whose caches are warmed
+    maxConcurrency (int): Maximum number of guilds warmed at the same time
+    maxAge (float): Number of seconds a warmed guild is skipped for (the cache ttl)
+    total (int): Number of guilds queued for warming since the last time it was idle
+    done (int): Number of those guilds that have been warmed (or failed)
+    failed (int): Number of those guilds that failed to warm
+
+    Functions
+    __________
+    async warm(guilds, priorityGuildIds)
+        Warms the guilds that haven't been warmed recently
+    isWarming() -> bool
+        Whether any guilds are being warmed
+    getProgress() -> done(int), total(int)
+        Progress of the current warm up
+    """
+
+    maxConcurrency = 4
+    maxAge = 300
+    total = 0
+    done = 0
+    failed = 0
+
+    def __init__(self, fire, maxConcurrency=4, maxAge=300, clock=time.monotonic):
+        self.fire = fire
+        self.maxConcurrency = maxConcurrency
+        self.maxAge = maxAge
+        self.__clock = clock
+        self.__semaphore = asyncio.Semaphore(maxConcurrency)
+        self.__warming = set()
+        self.__warmedAt = {}
+
+    async def warm(self, guilds, priorityGuildIds=()):
+        """
+        Warms the guilds that haven't been warmed recently
+
+        Parameters
+        ----------
+        guilds : list(discord.Guild)
+            The guilds to warm
+        priorityGuildIds : collection(guildId)
+            Guilds to warm first (e.g. the ones with people in voice)
+        """
+
+        now = self.__clock()
+        guilds = [guild for guild in guilds
+                  if not guild.id in self.__warming and now - self.__warmedAt.get(guild.id, -self.maxAge) >= self.maxAge]
+
+        if not guilds:
+            return
+
+        if not self.isWarming():
+            self.total = self.done = self.failed = 0
+
+        priorityGuildIds = set(priorityGuildIds)
+        guilds.sort(key=lambda guild: not guild.id in priorityGuildIds)
+
+        self.total += len(guilds)
+        for guild in guilds:
+            self.__warming.add(guild.id)
+
+        start = self.__clock()
+        await asyncio.gather(*[self.__warmGuild(guild) for guild in guilds])
+
+        if not self.isWarming():
+            print("Warmed {0}/{1} guilds in {2:.1f}s ({3} failed)".format(self.done - self.failed, self.total, self.__clock() - start, self.failed))
+
+    def isWarming(self):
+        """
+        Whether any guilds are being warmed
+
+        Returns
+        ----------
+        bool
+        """
+
+        return len(self.__warming) > 0
+
+    def getProgress(self):
+        """
+        Progress of the current warm up (or the last one if it's idle)
+
+        Returns
+        ----------
+        done : int
+            Number of guilds warmed (or failed)
+        total : int
+            Number of guilds queued
+        """
+
+        return self.done, self.total
+
+    async def __warmGuild(self, guild):
+        """
+        Private helper to load one guild's member names and documents under the concurrency limit
+        """
+
+        async with self.__semaphore:
+            try:
+                await self.fire.fetchAllMembers(guild)
+                await asyncio.gather(
+                    self.fire.fetchLeaderboardPage(guild, 'total', 1),
+                    self.fire.fetchLeaderboardPage(guild, 'discordPoints', 1),
+                    self.fire.fetchWeekTimes(guild),
+                    self.fire.fetchAllRewards(guild),
+                    self.fire.fetchActiveBets(guild),
+                )
+                self.__warmedAt[guild.id] = self.__clock()
+            except Exception as e:
+                print("ERROR: warming guild", guild.id, str(e))
+                self.failed += 1
+            finally:
+                self.done += 1
+                self.__warming.discard(guild.id)
@@ -4,6 +4,7 @@ import re
 
 from datetime import datetime
 from .utils import *
+from .EmbedCache import EmbedCache
 
 class DiscordBets:
     """
@@ -12,6 +13,7 @@ class DiscordBets:
     Attributes
     __________
     fire (Fire obj): The fire instance where information is fetched/updated
+    embedCache (EmbedCache obj): Rendered -allbets embeds, reused until the bets change
 
     Functions
     __________
@@ -34,17 +36,19 @@ class DiscordBets:
         Adds a bet using the information from messageString (expected: [BetId] [Option Number] [Amount]).
         Returns the bet embed with the updated information or an error/usage embed
 
-    def getAllActiveBets(guild) -> (discord.Embed)
+    async def getAllActiveBets(guild) -> (discord.Embed)
         Gets all of the active (open/closed) bets within the guild
     
-    def showBetForUser(self, guild, user) -> (discord.Embed)
+    async def showBetForUser(self, guild, user) -> (discord.Embed)
         Gets all of the active bets for the user
 
     """
     fire = None
+    embedCache = None
 
-    def __init__(self, fire):
+    def __init__(self, fire, embedCache=None):
         self.fire = fire
+        self.embedCache = embedCache if embedCache != None else EmbedCache()
 
     async def createBet(self, guild, user, messageString):
         messageAndOptions = re.findall("\[(.*?)\]", messageString)
@@ -64,7 +68,7 @@ class DiscordBets:
             now = datetime.now()
             betStartedAt = now.strftime("%H:%M on %m/%d/%Y")
 
-            betId = self.fire.postNewBet(guild, user.id, betTitle, betOptions, betStartedAt)
+            betId = await self.fire.postNewBet(guild, user.id, betTitle, betOptions, betStartedAt)
 
             return self.__createBetEmbed(guild, user.display_name, betTitle, betOptions, str(betId), "Open", betStartedAt)
         except Exception as e:
@@ -75,30 +79,28 @@ class DiscordBets:
         try:
             # Errors out if betId is not an int and goes to the exception part
             betIdInt = int(betId)
-            betDict = self.fire.fetchAllBets(guild)
-            memberDict = await self.fire.fetchAllMembers(guild)
-
-            for key in betDict: 
-                if key != 'numBets' and int(betDict[key]['betId']) == betIdInt:
+            betDict = await self.fire.fetchBet(guild, str(betIdInt))
 
-                    startedByUser = memberDict[int(betDict[key]['startedBy'])]
-                    status = "Open"
+            if betDict == None:
+                return getOopsEmbed("Couldn't find a bet with that id")
 
-                    if betDict[key]['completed']:
-                        status = "Completed"
-                    elif betDict[key]['closed']:
-                        status = "Closed"
+            memberDict = await self.fire.fetchAllMembers(guild)
+            startedByUser = memberDict[int(betDict['startedBy'])]
+            status = "Open"
 
-                    return self.__createBetEmbed(guild, startedByUser, betDict[key]['betTitle'], betDict[key]['options'], str(betDict[key]['betId']), status, betDict[key]['startedAt'])
+            if betDict['completed']:
+                status = "Completed"
+            elif betDict['closed']:
+                status = "Closed"
 
-            return getOopsEmbed("Couldn't find a bet with that id")
+            return self.__createBetEmbed(guild, startedByUser, betDict['betTitle'], betDict['options'], str(betDict['betId']), status, betDict['startedAt'])
 
         except Exception as e:
             print(e)
             return getUsageEmbed("-showbet [bet id]\n\n example: -showbet 7")
 
     async def closeBet(self, guild, user, betId):
-        betDict, error = self.fire.postCloseBet(guild, user, str(betId))
+        betDict, error = await self.fire.postCloseBet(guild, user, str(betId))
         memberDict = await self.fire.fetchAllMembers(guild)
 
         if error:
@@ -119,7 +121,7 @@ class DiscordBets:
         # BetList = [BetId, Option Number, Cost]
         betList = messageString.split(" ")
         if len(betList) == 3:
-            betDict, error = self.fire.postBet(guild, user, betList[0], betList[1], int(betList[2]))
+            betDict, error = await self.fire.postBet(guild, user, betList[0], betList[1], int(betList[2]))
         
             if error != None:
                 return getOopsEmbed(error)
@@ -131,27 +133,18 @@ class DiscordBets:
         else:
             return getUsageEmbed("-bet [bet id] [option number] [discord points amount]\n\n example: -bet 3 2 500")
 
-    def getAllActiveBets(self, guild):
-        betDict = self.fire.fetchAllBets(guild)
-        activeBets = []
+    async def getAllActiveBets(self, guild):
+        version = (self.fire.fetchDocumentVersion(guild, 'betIndex'),)
 
-        for key in betDict: 
-            if key != 'numBets' and not betDict[key]['completed']:
-                activeBets.append(betDict[key])
-        
-        if len(activeBets) > 0:
-            return self.__createAllBetsEmbed(activeBets)
-        else:
-            return self.__createNoBetsEmbed()
+        return await self.embedCache.fetch(guild.id, 'allbets', None, version, lambda: self.__renderAllActiveBets(guild))
 
-    def showBetForUser(self, guild, user):
-        betDict = self.fire.fetchAllBets(guild)
+    async def showBetForUser(self, guild, user):
+        betDict = await self.fire.fetchActiveBets(guild)
         activeBets = []
 
         for key in betDict:
-            if key != 'numBets' and int(betDict[key]['startedBy']) == user.id:
-                if not betDict[key]['completed']:
-                    activeBets.append(betDict[key])
+            if int(betDict[key]['startedBy']) == user.id:
+                activeBets.append(betDict[key])
 
         if len(activeBets) > 0:
             return self.__createMyBetsEmbed(user, activeBets)
@@ -159,6 +152,15 @@ class DiscordBets:
             return self.__createNoBetsEmbed()
 
     # ---------- MARK: - Private Methods ----------
+    async def __renderAllActiveBets(self, guild):
+        # Only bets that haven't been completed are in the index
+        activeBets = list((await self.fire.fetchActiveBets(guild)).values())
+
+        if len(activeBets) > 0:
+            return self.__createAllBetsEmbed(activeBets)
+        else:
+            return self.__createNoBetsEmbed()
+
     def __createBetEmbed(self, guild, userDisplayName, betTitle, betOptions, betId, betStatus, betStartedAt):
         idString, titleString, amountString = self.__createBetOptionsStrings(betOptions)
         now = datetime.today()
@@ -270,7 +272,7 @@ class DiscordBets:
             betIds += str(bet['betId']) + ('\n' * numLines)
             betTitles += formattedBetTitle + '\n'
 
-            if bet['completed']:
+            if bet.get('completed'):
                 betStatus += 'completed' + ('\n' * numLines)
             elif bet['closed']:
                 betStatus += 'closed' + ('\n' * numLines)
@@ -1,7 +1,8 @@
 from datetime import datetime
 import discord
 import itertools
-from .utils import formatString, getUsageEmbed
+from .utils import formatString, getUsageEmbed, getOopsEmbed
+from .EmbedCache import EmbedCache
 
 # IDEAS
 # 1. Paying out points (without bets)
@@ -13,19 +14,22 @@ class DiscordPoints:
     Attributes
     __________
     fire (Fire obj): The fire instance where information is fetched/updated
+    embedCache (EmbedCache obj): Rendered -points and -rewards embeds, reused until the data they show changes
 
     Functions
     __________
     async getDiscordPointsEmbed(page, guild) -> (discord.Embed)
         Makes an embedded message with total points for each user
-    def createNewReward(guild, rewardString) -> (discord.Embed)
+    async def createNewReward(guild, rewardString) -> (discord.Embed)
         Adds a reward and returns the updated list of rewards as an embedded msg
     """
 
     fire = None
+    embedCache = None
 
-    def __init__(self, fire):
+    def __init__(self, fire, embedCache=None):
         self.fire = fire
+        self.embedCache = embedCache if embedCache != None else EmbedCache()
 
     async def getDiscordPointsEmbed(self, page, guild):
         """
@@ -41,19 +45,12 @@ class DiscordPoints:
         discord.Embed
             Embedded message of Discord Points for each member of the guild
         """
-        d = self.fire.fetchDiscordPoints(guild)
 
-        # This sorts the dictionary by highest-value and converts it to a list
-        # It takes form [(user_0.id, value_0) ...(user_n.id, value_n)]
-        info_arr = [(k, d[k]) for k in sorted(d, key=d.get, reverse=True)]
+        version = (self.fire.fetchDocumentVersion(guild, 'discordPoints'), self.fire.fetchMembersVersion(guild))
 
-        userString, pointsString, description = await self.__createdEmbedStrings(guild, info_arr, page)
+        return await self.embedCache.fetch(guild.id, 'points', page, version, lambda: self.__renderDiscordPointsEmbed(page, guild))
 
-        title = "Discord Points"
-
-        return self.__createPointsEmbed(title, description, userString, pointsString)
-
-    def createNewReward(self, guild, rewardString):
+    async def createNewReward(self, guild, rewardString):
         """
         Create new reward for the guild
 
@@ -79,14 +76,14 @@ class DiscordPoints:
             rewardCost = int(rewardStringList[len(rewardStringList)-1])
             rewardTitle = self.__parseRewardStringList(rewardStringList)
 
-            self.fire.postNewReward(guild, rewardTitle, rewardCost)
+            await self.fire.postNewReward(guild, rewardTitle, rewardCost)
 
-            return self.getRewardsEmbed(guild)
+            return await self.getRewardsEmbed(guild)
         except Exception as e:
             print("ERROR ", e)
             return getUsageEmbed("-addreward [Desired Reward] [Price of the Reward]\n\nexample: -addreward CSGO with friends 500")
 
-    def getRewardsEmbed(self, guild):
+    async def getRewardsEmbed(self, guild):
         """
         Get all of the current rewards for the guild
 
@@ -101,18 +98,11 @@ class DiscordPoints:
             Embedded message with all of the rewards for the guild
         """
 
-        rewards_dict = self.fire.fetchAllRewards(guild)
-
-        if rewards_dict == {}:
-            return self.__noRewardsEmbed(guild)
-
-        rewardsList = [(k, rewards_dict[k]) for k in sorted(rewards_dict, key=rewards_dict.get, reverse=True)]
-
-        idString, rewardsString, costsString = self.__getRewardsEmbedStrings(rewardsList)
+        version = (self.fire.fetchDocumentVersion(guild, 'rewards'),)
 
-        return self.__createRewardsEmbed(idString, rewardsString, costsString)
+        return await self.embedCache.fetch(guild.id, 'rewards', None, version, lambda: self.__renderRewardsEmbed(guild))
 
-    def redeemReward(self, guild, user, reward_id):
+    async def redeemReward(self, guild, user, reward_id):
         """
         Redeems the desired reward with DiscordPoints
         [@Todo: Ping Users associated with the reward]
@@ -132,8 +122,8 @@ class DiscordPoints:
             Embedded message with the redeemed reward
         """
 
-        points_dict = self.fire.fetchDiscordPoints(guild)
-        rewards_dict = self.fire.fetchAllRewards(guild)
+        # Rewards come from the cache/mirror, the user's points are only read by the decrement
+        rewards_dict = await self.fire.fetchAllRewards(guild)
         rewards_list = [(k, rewards_dict[k]) for k in sorted(rewards_dict, key=rewards_dict.get, reverse=True)]
 
         try:
@@ -144,15 +134,15 @@ class DiscordPoints:
             reward_title = rewards_list[int(reward_id) - 1][0]
             reward_cost = rewards_list[int(reward_id) - 1][1]
 
-            #Check to see if the user has enough points to redeem the reward
-            if points_dict[str(user.id)] and points_dict[str(user.id)] < reward_cost:
-                return self.__createNotEnoughPointsEmbed(user, points_dict[str(user.id)])
-            else:
-                new_points = points_dict[str(user.id)] - reward_cost
+            # Only takes the points if the user has enough of them
+            new_points, errorString = await self.fire.postPointsDecrement(guild, str(user.id), reward_cost, 'redeem', reward_title)
 
-                self.fire.postNewDiscordPoints(guild, str(user.id), new_points)
+            if new_points == None:
+                return getOopsEmbed(errorString)
+            elif errorString != None:
+                return self.__createNotEnoughPointsEmbed(user, new_points)
 
-                return self.__createRedeemRewardEmbed(reward_title, reward_cost, user, new_points)
+            return self.__createRedeemRewardEmbed(reward_title, reward_cost, user, new_points)
         except Exception as e:
             print(e)
             return getUsageEmbed("-redeemReward [Desired Reward Id]\n\nexample: -redeemReward 3")
@@ -160,7 +150,38 @@ class DiscordPoints:
 
 
     # ---------- MARK: - Private Functions ----------
-    async def __createdEmbedStrings(self, guild, sortedList, page):
+    async def __renderDiscordPointsEmbed(self, page, guild):
+        """
+        Private helper function to render the embedded message for getDiscordPointsEmbed
+        """
+
+        # Only the requested page is taken from the (already sorted) leaderboard
+        # It takes form [(user_0.id, value_0) ...(user_19.id, value_19)]
+        pageList, page, pages = await self.fire.fetchLeaderboardPage(guild, 'discordPoints', page)
+
+        userString, pointsString, description = await self.__createdEmbedStrings(guild, pageList, page, pages)
+
+        title = "Discord Points"
+
+        return self.__createPointsEmbed(title, description, userString, pointsString)
+
+    async def __renderRewardsEmbed(self, guild):
+        """
+        Private helper function to render the embedded message for getRewardsEmbed
+        """
+
+        rewards_dict = await self.fire.fetchAllRewards(guild)
+
+        if rewards_dict == {}:
+            return self.__noRewardsEmbed(guild)
+
+        rewardsList = [(k, rewards_dict[k]) for k in sorted(rewards_dict, key=rewards_dict.get, reverse=True)]
+
+        idString, rewardsString, costsString = self.__getRewardsEmbedStrings(rewardsList)
+
+        return self.__createRewardsEmbed(idString, rewardsString, costsString)
+
+    async def __createdEmbedStrings(self, guild, pageList, page, pages):
         """
         Private helper function to create strings for the embedded message
 
@@ -168,10 +189,12 @@ class DiscordPoints:
         ----------
         guild : (discord.Guild)
             The server that we are tracking
-        sortedList : arr[(key_0, val_0) ...  (key_n, val_n)]
-            The sorted (by val) list of key, val pairs where key: user_id, val: points
+        pageList : arr[(key_0, val_0) ...  (key_19, val_19)]
+            The sorted (by val) key, val pairs on the page where key: user_id, val: points
         page  : (int)
-            Page of the message we want to look at (20 entries per page)
+            Page of the message we are looking at (20 entries per page)
+        pages : (int)
+            The total number of pages
 
         Returns
         ----------
@@ -181,27 +204,19 @@ class DiscordPoints:
 
         member_dict = await self.fire.fetchAllMembers(guild)
 
-        # Max 20 entries / page
-        pages = len(sortedList) // 20 + 1
-
         userString = ""
         pointsString = ""
         rankString = ""
 
-        if page > pages or page < 0:
-            page = 1
-
-        for i in range(0,20):
-            shiftedIndex = (page-1)*20 + i
-            if shiftedIndex < len(sortedList):
-                user_id = sortedList[shiftedIndex][0]
-                points = sortedList[shiftedIndex][1]
+        for i in range(len(pageList)):
+            user_id = pageList[i][0]
+            points = pageList[i][1]
 
-                if int(user_id) in member_dict.keys():
-                    userString += member_dict[int(user_id)] + '\n'
-                    pointsString += str(points) + '\n'
+            if int(user_id) in member_dict.keys():
+                userString += member_dict[int(user_id)] + '\n'
+                pointsString += str(points) + '\n'
 
-        description = "Page " + str(page) + " of " + str(page)
+        description = "Page " + str(page) + " of " + str(pages)
 
         return userString, pointsString, description
 
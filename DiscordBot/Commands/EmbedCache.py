@@ -0,0 +1,100 @@
+import asyncio
+import discord
+from datetime import datetime
+from FireCache import FireCache
+
+class EmbedCache:
+    """
+    Cache of rendered embeds keyed by (guild, command, page, version)
+
+    The version is built from Fire.fetchDocumentVersion (and fetchMembersVersion
+    for embeds that show names), so an entry is never served after the data it
+    was rendered from changes. Concurrent requests for the same embed wait for a
+    single render instead of each fetching and rendering it
+
+    Attributes
+    __________
+    __cache (FireCache obj): { (guildId, 'embed', command, page, version): embed.to_dict() }
+    __rendering (dict): { key: asyncio.Task } renders that are in progress
+
+    Functions
+    __________
+    async fetch(guildId, command, page, version, render) -> (discord.Embed)
+        Get the cached embed or render (and cache) it
+    """
+
+    def __init__(self, cache=None):
+        """
+        Parameters
+        ----------
+        cache : FireCache
+            Where rendered embeds are stored (entries also expire after its ttl)
+        """
+
+        self.__cache = cache if cache != None else FireCache(256)
+        self.__rendering = {}
+
+    async def fetch(self, guildId, command, page, version, render):
+        """
+        Get the cached embed or render (and cache) it
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        command : str
+            The name of the command the embed is for
+        page : int
+            The page of the embed (None if it isn't paged)
+        version : tuple
+            The versions of the data the embed is rendered from
+        render : coroutine function () -> discord.Embed
+            Renders the embed, a result of None isn't cached
+
+        Returns
+        ----------
+        discord.Embed
+        """
+
+        key = (guildId, 'embed', command, page, version)
+
+        hit, d = self.__cache.get(key)
+        if hit:
+            return self.__fromDict(d)
+
+        task = self.__rendering.get(key)
+        if task != None:
+            embed = await asyncio.shield(task)
+            return self.__fromDict(embed.to_dict()) if embed != None else None
+
+        task = asyncio.ensure_future(render())
+        self.__rendering[key] = task
+
+        try:
+            embed = await asyncio.shield(task)
+        finally:
+            self.__rendering.pop(key, None)
+
+        if embed != None:
+            self.__cache.set(key, embed.to_dict())
+
+        return embed
+
+    def __fromDict(self, d):
+        """
+        Private helper to rebuild a cached embed with the current time
+
+        Parameters
+        ----------
+        d : dict
+            embed.to_dict()
+
+        Returns
+        ----------
+        discord.Embed
+        """
+
+        embed = discord.Embed.from_dict(d)
+        embed.timestamp = datetime.today()
+
+        return embed
@@ -21,8 +21,8 @@ class MiscCommands:
     def __init__(self, fire):
         self.fire = fire
 
-    def sendFeedback(self, guild, user, feedbackString):
-        self.fire.postFeedback(guild, user, feedbackString)
+    async def sendFeedback(self, guildId, userId, feedbackString):
+        await self.fire.postFeedback(guildId, userId, feedbackString)
 
         return "Thank you for your feedback <3"
 
@@ -63,6 +63,7 @@ class MiscCommands:
         timeLoggerStr += '`-todaylog`: gets the tracked minutes for the day\n'
         timeLoggerStr += '`-weeklog`: amount of time logged for the last 7 days\n'
         timeLoggerStr += '`-mylog`: some cool stats\n'
+        timeLoggerStr += '`-activity [days]`: server activity stats, for all time or the last [days] days\n'
 
         discordPointsStr += '`-points`: shows all of the points for each user in the Discord server\n'
         discordPointsStr += '`-addreward`(admins): add a reward for discord points\n'
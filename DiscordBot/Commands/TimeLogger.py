@@ -2,6 +2,11 @@ import discord
 import os
 from datetime import datetime
 import datetime as dt
+from dateutils import getCurrentDayId, dayIdToDateString, shiftDayId
+from Leaderboard import Leaderboard
+from UserStats import UserStats
+from .EmbedCache import EmbedCache
+from .utils import getOopsEmbed
 
 class TimeLogger:
     """
@@ -10,6 +15,7 @@ class TimeLogger:
     Attributes
     __________
     fire (Fire obj): The fire instance where information is fetched/updated
+    embedCache (EmbedCache obj): Rendered -totallog pages, reused until the data they show changes
 
     Functions
     __________
@@ -21,12 +27,16 @@ class TimeLogger:
         Makes an embedded message with user-times for the week
     async getMyLogEmbed(guild, user)    -> (discord.Embed)
         Makes an embedded message with personalized stats for the discord.User
+    async getActivityEmbed(guild, user, days) -> (discord.Embed)
+        Makes an embedded message with activity analytics for the server
     """
 
     fire = None
+    embedCache = None
 
-    def __init__(self, fire):
+    def __init__(self, fire, embedCache=None):
         self.fire = fire
+        self.embedCache = embedCache if embedCache != None else EmbedCache()
 
     async def getTotalLogEmbed(self, page, guild):
         """
@@ -45,18 +55,9 @@ class TimeLogger:
             Embedded message of total times for each user
         """
 
-        d = self.fire.fetchTotalTimes(guild)
-        member_dict = await self.fire.fetchAllMembers(guild)
-
-        # This sorts the dictionary by highest-value and converts it to a list
-        # It takes form [(user_0.id, value_0) ...(user_n.id, value_n)]
-        d = [(k, d[k]) for k in sorted(d, key=d.get, reverse=True)]
-
-        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, d, page)
+        version = (self.fire.fetchDocumentVersion(guild, 'total'), self.fire.fetchMembersVersion(guild))
 
-        title = "Total Log"
-
-        return self.__createAggregateLogEmbed(title, description, userString, timeString, rankString)
+        return await self.embedCache.fetch(guild.id, 'totallog', page, version, lambda: self.__renderTotalLogEmbed(page, guild))
 
     async def getTodayLogEmbed(self, guild):
         """
@@ -73,14 +74,11 @@ class TimeLogger:
             Embedded message of times today for each user
         """
 
-        l = self.fire.fetchAllDateTimes(guild)
-        l = list(l.items())
-        userIdAndVal = l[0][1]
+        userIdAndVal = await self.fire.fetchDayTimes(guild, getCurrentDayId())
 
-        userValDict = sorted(userIdAndVal.items(), key=lambda kv: kv[1])
-        userValDict.reverse()
+        pageList, page, pages = Leaderboard(userIdAndVal).getPage(1)
 
-        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, userValDict, 1)
+        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, pageList, page, pages)
 
         title = "Today's Log"
 
@@ -103,22 +101,20 @@ class TimeLogger:
             Embedded message of the log for the week for each user
         """
 
-        allDateTimes = self.fire.fetchAllDateTimes(guild)
-        allDateTimes = list(allDateTimes.items())
+        userValDict, startDayId, endDayId = await self.fire.fetchWeekTimes(guild)
 
-        if len(allDateTimes) < 7:
-            return
+        if len(userValDict) == 0:
+            return getOopsEmbed("No time has been tracked in the last 7 days")
 
-        firstDate, secondDate, userValDict, = self.__sumUserTimeValues(allDateTimes)
-        userValDict = [(k, userValDict[k]) for k in sorted(userValDict, key=userValDict.get, reverse=True)]
+        pageList, page, pages = Leaderboard(userValDict).getPage(page)
 
-        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, userValDict, 1)
+        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, pageList, page, pages)
 
-        title = "Week Log (" + secondDate + " - " + firstDate + ")"
+        title = "Week Log (" + dayIdToDateString(startDayId) + " - " + dayIdToDateString(endDayId) + ")"
         return self.__createAggregateLogEmbed(title, description, userString, timeString, rankString)
 
 
-    def getMyLogEmbed(self, guild, user):
+    async def getMyLogEmbed(self, guild, user):
         """
         Makes an embedded message with personalized stats for the user
 
@@ -135,37 +131,85 @@ class TimeLogger:
             Embedded message of personalized information
         """
 
-        date_times_dict = self.fire.fetchAllDateTimes(guild)
-        total_times_dict = self.fire.fetchTotalTimes(guild)
+        stats = await self.fire.fetchUserStats(guild, user.id)
+
+        if not stats:
+            return getOopsEmbed("No time has been tracked for you yet")
+
+        userStats = UserStats(stats)
+        todayId = getCurrentDayId()
+
+        maxDate = dayIdToDateString(userStats.bestDayId) if userStats.bestDayId != None else ""
+
+        return self.__createMyLogEmbed(user, userStats.total, userStats.bestMinutes, maxDate,
+                                       userStats.getTodayMinutes(todayId), userStats.getStreak(todayId))
+
+    async def getActivityEmbed(self, guild, user, days=None):
+        """
+        Makes an embedded message with activity analytics for the server
 
-        maxDate = ""
-        maxVal = 0
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we are tracking
+        user  : discord.Member if in guild, discord.User otherwise
+            The user that asked, whose own stats are included
+        days  : (int)
+            Number of days (today included) to look at, or None for all time
 
+        Returns
+        ----------
+        discord.Embed
+            Embedded message of activity analytics, or an oops message if there are none
+        """
 
-        # Gets total time
-        user_id_string = str(user.id)
-        if not user_id_string in total_times_dict.keys():
-            print("Couldn't find user_id in totalTimes")
-            return
+        todayId = getCurrentDayId()
+        startDayId = shiftDayId(todayId, -(days - 1)) if days != None else None
 
-        totalTime = total_times_dict[user_id_string]
+        summary = await self.fire.fetchActivitySummary(guild, startDayId, todayId, user.id)
 
-        # Finds maximum value
-        for key in date_times_dict:
-            val = date_times_dict[key]
-            if user_id_string in val and val[user_id_string] > maxVal:
-                maxVal = val[user_id_string]
-                maxDate = key
+        if summary == None:
+            print("Activity summary not available")
+            return getOopsEmbed("Activity stats aren't available right now")
+        elif summary['total'] == 0:
+            return getOopsEmbed("No time has been tracked in this range yet")
 
-        todayVal = 0
-        # This whole mumbo-jumbo gets the most recent data and
-        # reports how much time was spent for that particular username
-        if user_id_string in list(date_times_dict.items())[0][1]:
-            todayVal = list(date_times_dict.items())[0][1][user_id_string]
+        title = "Activity (" + dayIdToDateString(summary['startDayId']) + " - " + dayIdToDateString(summary['endDayId']) + ")"
 
-        return self.__createMyLogEmbed(user, totalTime, maxVal, maxDate, todayVal)
+        now = datetime.today()
+        embed = discord.Embed(title=title, timestamp=now)
 
-    def __createMyLogEmbed(self, user, totalTime, maxTime, maxDate, todayTime):
+        embed.set_footer(text="Kirbec Bot", icon_url="https://cdn.discordapp.com/embed/avatars/0.png")
+
+        embed.add_field(name="Total Time", value=self.__createTimeString(summary['total']) + "\n", inline=True)
+        embed.add_field(name="Active Members", value=str(summary['activeUsers']) + "\n", inline=True)
+        embed.add_field(name="Busiest Day", value=self.__createDayString(summary['bestDay']), inline=False)
+        embed.add_field(name="Busiest Week", value=self.__createDayString(summary['bestWindow'], 7), inline=False)
+        embed.add_field(name="Median Member", value=self.__createTimeString(summary['percentiles'][50]) + "\n", inline=True)
+        embed.add_field(name="Top 10%", value=self.__createTimeString(summary['percentiles'][90]) + "\n", inline=True)
+        embed.add_field(name=user.display_name,
+                        value=self.__createTimeString(summary['userTotal']) + "(more than " + str(summary['userPercentile']) + "% of members)\n"
+                              + "Best day: " + self.__createDayString(summary['userBestDay']),
+                        inline=False)
+
+        return embed
+
+    async def __renderTotalLogEmbed(self, page, guild):
+        """
+        Private helper function to render the embedded message for getTotalLogEmbed
+        """
+
+        # Only the requested page is taken from the (already sorted) leaderboard
+        # It takes form [(user_0.id, value_0) ...(user_19.id, value_19)]
+        pageList, page, pages = await self.fire.fetchLeaderboardPage(guild, 'total', page)
+
+        userString, timeString, rankString, description = await self.__createdEmbedStrings(guild, pageList, page, pages)
+
+        title = "Total Log"
+
+        return self.__createAggregateLogEmbed(title, description, userString, timeString, rankString)
+
+    def __createMyLogEmbed(self, user, totalTime, maxTime, maxDate, todayTime, streak):
         """
         Private helper function to create embedded message for the user
 
@@ -181,6 +225,8 @@ class TimeLogger:
             The date when maxTime occurred
         todayTime: (int)
             The amount of time spent today so far for the user
+        streak: (int)
+            The number of consecutive days (up to today or yesterday) with time for the user
 
         Returns
         ----------
@@ -200,6 +246,7 @@ class TimeLogger:
         embed.add_field(name="Total Time", value= self.__createTimeString(totalTime) + "\n", inline=False)
         embed.add_field(name="Time Today", value= self.__createTimeString(todayTime) + "\n", inline=False)
         embed.add_field(name="Longest Day", value= self.__createTimeString(maxTime) + " (" + str(maxDate) + ")\n", inline=False)
+        embed.add_field(name="Streak", value= str(streak) + (" day" if streak == 1 else " days") + "\n", inline=False)
 
         return embed
 
@@ -235,7 +282,7 @@ class TimeLogger:
 
         return embed
 
-    async def __createdEmbedStrings(self, guild, sortedList, page):
+    async def __createdEmbedStrings(self, guild, pageList, page, pages):
         """
         Private helper function to create strings for the embedded message
 
@@ -243,10 +290,12 @@ class TimeLogger:
         ----------
         guild : (discord.Guild)
             The server that we are tracking
-        sortedList : arr[(key_0, val_0) ...  (key_n, val_n)]
-            The sorted (by val) list of key, val pairs where key: user_id, val: time
+        pageList : arr[(key_0, val_0) ...  (key_19, val_19)]
+            The sorted (by val) key, val pairs on the page where key: user_id, val: time
         page  : (int)
-            Page of the message we want to look at (20 entries per page)
+            Page of the message we are looking at (20 entries per page)
+        pages : (int)
+            The total number of pages
 
         Returns
         ----------
@@ -256,73 +305,50 @@ class TimeLogger:
 
         member_dict = await self.fire.fetchAllMembers(guild)
 
-        # Max 20 entries / page
-        pages = len(sortedList) // 20 + 1
-
         userString = ""
         timeString = ""
         rankString = ""
 
-        if page > pages or page < 0:
-            page = 1
-
-        for i in range(0,20):
+        for i in range(len(pageList)):
             shiftedIndex = (page-1)*20 + i
-            if shiftedIndex < len(sortedList):
-                user_id = sortedList[shiftedIndex][0]
-                time = sortedList[shiftedIndex][1]
+            user_id = pageList[i][0]
+            time = pageList[i][1]
 
-                if int(user_id) in member_dict.keys():
-                    userString += member_dict[int(user_id)] + '\n'
-                    timeString += self.__createTimeString(time) + '\n'
-                    rankString += str(shiftedIndex+1) + '\n'
+            if int(user_id) in member_dict.keys():
+                userString += member_dict[int(user_id)] + '\n'
+                timeString += self.__createTimeString(time) + '\n'
+                rankString += str(shiftedIndex+1) + '\n'
 
-        description = "Page " + str(page) + " of " + str(page)
+        description = "Page " + str(page) + " of " + str(pages)
 
         return userString, timeString, rankString, description
 
-    def __sumUserTimeValues(self, listOfTimeVals):
+    def __createDayString(self, best, numDays=1):
         """
-        Private helper function to sum all times (for the week) for each user
+        Private helper function to format a (dayId, minutes) pair from the activity summary
 
         Parameters
         ----------
-        listOfTimeVals: [ (date_0, {user_0, val_0...}) .. (date_n, {user_0, val_0...}) ]
-            List of (key,val) pairs where key = date, val = dictionary of users and
-            corresponding time values
+        best: (dayId, int)
+            The first day and the minutes, or None
+        numDays: (int)
+            Number of days the minutes were summed over
 
         Returns
         ----------
-        firstDate: (str)
-            The beginning of the week date-range
-        secondDate: (str)
-            The end of the week date-range
-        d: dict{user: time_val}
-            The summed dictionary of user and corresponding times
+        s: (str)
+            e.g. '5 hrs 3 mins (01/02/2021)' or '01/02/2021 - 01/08/2021'
         """
-        if len(listOfTimeVals) <= 7:
-            return {}
-        else:
-            d = {}
-            for i in range(7):
-                date = listOfTimeVals[i][0]
-                info = listOfTimeVals[i][1]
-
-                if i == 0:
-                    firstDate = str(date)
-                if i == 6:
-                    secondDate = str(date)
-
-                for key in info:
-                    val = info[key]
-                    hrs = val // 60
-                    mins = val % 60
-
-                    if key in d:
-                        d[key] += val
-                    else:
-                        d[key] = val
-        return firstDate, secondDate, d
+
+        if best == None:
+            return "-\n"
+
+        dayId, val = best
+        dateString = dayIdToDateString(dayId)
+        if numDays > 1:
+            dateString += " - " + dayIdToDateString(shiftDayId(dayId, numDays - 1))
+
+        return self.__createTimeString(val) + "(" + dateString + ")\n"
 
     def __createTimeString(self, val):
         """
@@ -1,11 +1,22 @@
 import discord
 import asyncio
+import os
+import datetime as dt
 
 from Fire import Fire
+from MemberCache import MemberCache
+from FireCache import FireCache
+from AsyncFire import AsyncFire
+from TimeAccumulator import TimeAccumulator
+from TimeJournal import TimeJournal
+from VoiceTracker import VoiceTracker
+from TickScheduler import TickScheduler
+from CacheWarmer import CacheWarmer
 from Commands.TimeLogger import TimeLogger
 from Commands.MiscCommands import MiscCommands
 from Commands.DiscordPoints import DiscordPoints
 from Commands.DiscordBets import DiscordBets
+from Commands.EmbedCache import EmbedCache
 from Commands.utils import *
 
 class DiscordClient(discord.Client):
@@ -14,13 +25,24 @@ class DiscordClient(discord.Client):
 
     Attributes
     __________
-    sharedFire: (Fire obj)
-        Instance of the custom Fire class to fetch and update the database
+    sharedFire: (AsyncFire obj)
+        Instance of the custom Fire class (wrapped so calls don't block the event loop)
+        to fetch and update the database
     timeLogger: (TimeLogger obj)
         Instance of the TimeLogger class to display and parse information from
         the database
     miscCommands: (MiscCommands obj)
         Instance of the MiscCommands class to display random Misc. messages
+    timeAccumulator: (TimeAccumulator obj)
+        Buffers tracked minutes in memory until they are flushed to sharedFire
+    voiceTracker: (VoiceTracker obj)
+        Tracks time in voice from voice state events
+    tickScheduler: (TickScheduler obj)
+        Runs the minute tick for every guild
+    cacheWarmer: (CacheWarmer obj)
+        Preloads each guild's documents and member names after (re)connecting/joining
+    ledgerCompaction: (asyncio.Task)
+        Folds old points ledger entries into each guild's compacted balances once a day
 
     Functions
     __________
@@ -29,6 +51,14 @@ class DiscordClient(discord.Client):
     async on_message()
         Implementing discord.Client on_message() that is called when a user messages
         in a server (discord.Guild)
+    async close()
+        Flushes any buffered minutes and closes the time journal before closing the connection
+    async on_voice_state_update(member, before, after)
+        Implementing discord.Client on_voice_state_update() to track time in voice
+    async on_guild_join(guild) / on_guild_remove(guild)
+        Start/stop tracking time for a guild
+    async on_member_join(member) / on_member_update(before, after) / on_member_remove(member)
+        Keep the member name cache current
 
     """
     sharedFire = None
@@ -36,6 +66,12 @@ class DiscordClient(discord.Client):
     miscCommands = None
     discordPoints = None
     discordBets = None
+    timeAccumulator = None
+    voiceTracker = None
+    tickScheduler = None
+    memberCache = None
+    cacheWarmer = None
+    ledgerCompaction = None
 
     async def on_ready(self):
         """
@@ -44,49 +80,229 @@ class DiscordClient(discord.Client):
             We do any additional post-initialization set-up here
         """
         print('Logged on as {0}!'.format(self.user))
-        self.sharedFire = Fire()
-        self.timeLogger = TimeLogger(self.sharedFire)
-        self.discordPoints = DiscordPoints(self.sharedFire)
-        self.discordBets = DiscordBets(self.sharedFire)
-        self.miscCommands = MiscCommands(self.sharedFire)
-        self.loop.create_task(self.__track_time())
+
+        # on_ready is also called on reconnect, keep the caches/listeners and any
+        # minutes that haven't been flushed yet
+        if self.sharedFire is None:
+            cache = FireCache(int(os.getenv('FIRE_CACHE_SIZE', 1024)), int(os.getenv('FIRE_CACHE_TTL', 300)))
+            self.memberCache = MemberCache()
+            self.sharedFire = AsyncFire(Fire(cache, memberCache=self.memberCache))
+            embedCache = EmbedCache(FireCache(int(os.getenv('FIRE_CACHE_SIZE', 1024)), int(os.getenv('FIRE_CACHE_TTL', 300))))
+            self.timeLogger = TimeLogger(self.sharedFire, embedCache)
+            self.discordPoints = DiscordPoints(self.sharedFire, embedCache)
+            self.discordBets = DiscordBets(self.sharedFire, embedCache)
+            self.miscCommands = MiscCommands(self.sharedFire)
+
+        for guild in self.guilds:
+            # Members are chunked before on_ready, so this is a local copy, not a fetch
+            self.memberCache.loadGuild(guild)
+            await self.sharedFire.migrateDateTimes(guild)
+            await self.sharedFire.migrateBets(guild)
+            await self.sharedFire.startPointsLedger(guild)
+            if self.__use_live_mirror():
+                await self.sharedFire.subscribe(guild)
+
+        if self.timeAccumulator is None:
+            journal = TimeJournal(os.getenv('TIME_JOURNAL_PATH', 'time_journal.sqlite3'))
+            self.timeAccumulator = TimeAccumulator(int(os.getenv('TIME_FLUSH_INTERVAL', 300)), journal)
+
+            # Write anything that wasn't flushed before the last shutdown/crash
+            await self.timeAccumulator.replayJournal()
+            await self.timeAccumulator.flush(self.sharedFire)
+        if self.voiceTracker is None:
+            self.voiceTracker = VoiceTracker()
+
+        # Voice state events may have been missed while disconnected
+        for guild in self.guilds:
+            self.voiceTracker.syncGuild(guild)
+
+        # Warm in the background (guilds with people in voice first) so commands
+        # aren't blocked behind it; already warm guilds are skipped on reconnect
+        if self.cacheWarmer is None:
+            self.cacheWarmer = CacheWarmer(self.sharedFire, int(os.getenv('WARM_CONCURRENCY', 4)), int(os.getenv('FIRE_CACHE_TTL', 300)))
+        self.loop.create_task(self.cacheWarmer.warm(self.guilds, self.voiceTracker.activeGuildIds()))
+
+        if self.tickScheduler is None:
+            self.tickScheduler = TickScheduler(60, int(os.getenv('TICK_CONCURRENCY', 16)))
+            self.loop.create_task(self.__track_time())
+
+        if self.ledgerCompaction is None:
+            self.ledgerCompaction = self.loop.create_task(self.__compact_points_ledgers())
+
+    async def close(self):
+        """
+            Flushes any buffered minutes and closes the time journal before closing the connection
+        """
+
+        if self.timeAccumulator is not None:
+            try:
+                if self.sharedFire is not None:
+                    await self.timeAccumulator.flush(self.sharedFire)
+            finally:
+                await self.timeAccumulator.close()
+
+        if self.sharedFire is not None:
+            self.sharedFire.shutdown()
+
+        await super().close()
+
+    async def on_voice_state_update(self, member, before, after):
+        """
+            Implementing discord.Client on_voice_state_update() that is called when a
+            member joins/leaves/moves voice channels or changes their mute/deafen state
+        """
+
+        if self.voiceTracker is not None:
+            self.voiceTracker.onVoiceStateUpdate(member, before, after)
+
+    async def on_guild_join(self, guild):
+        """
+            Implementing discord.Client on_guild_join() that is called when the bot joins a guild
+        """
+
+        if self.voiceTracker is not None:
+            self.voiceTracker.syncGuild(guild)
+
+        if self.sharedFire is not None:
+            await self.sharedFire.startPointsLedger(guild)
+
+        if self.sharedFire is not None and self.__use_live_mirror():
+            await self.sharedFire.subscribe(guild)
+
+        if self.memberCache is not None:
+            if not guild.chunked:
+                await guild.chunk()
+            self.memberCache.loadGuild(guild)
+
+        if self.cacheWarmer is not None:
+            await self.cacheWarmer.warm([guild])
+
+    async def on_guild_remove(self, guild):
+        """
+            Implementing discord.Client on_guild_remove() that is called when the bot leaves a guild
+        """
+
+        if self.voiceTracker is not None:
+            self.voiceTracker.removeGuild(guild.id)
+
+        if self.sharedFire is not None:
+            await self.sharedFire.unsubscribe(guild)
+
+        if self.memberCache is not None:
+            self.memberCache.removeGuild(guild.id)
+
+    async def on_member_join(self, member):
+        """
+            Implementing discord.Client on_member_join() that is called when a member joins a guild
+        """
+
+        if self.memberCache is not None:
+            self.memberCache.setMember(member)
+
+    async def on_member_update(self, before, after):
+        """
+            Implementing discord.Client on_member_update() that is called when a member
+            changes their nickname (among other things)
+        """
+
+        if self.memberCache is not None:
+            self.memberCache.setMember(after)
+
+    async def on_user_update(self, before, after):
+        """
+            Implementing discord.Client on_user_update() that is called when a user changes
+            their username, which is their display name in guilds where they have no nickname
+        """
+
+        if self.memberCache is not None:
+            for guild in self.guilds:
+                member = guild.get_member(after.id)
+                if member is not None:
+                    self.memberCache.setMember(member)
+
+    async def on_member_remove(self, member):
+        """
+            Implementing discord.Client on_member_remove() that is called when a member leaves a guild
+        """
+
+        if self.memberCache is not None:
+            self.memberCache.removeMember(member)
+
+    def __use_live_mirror(self):
+        """
+            Private helper function that returns whether guild documents should be mirrored
+            with change listeners (one listener per document, so this is opt-in)
+        """
+
+        return os.getenv('FIRE_LIVE_MIRROR', '0') == '1'
 
     async def __track_time(self):
         """
             Private helper function to help track time
 
-            This function is called on a separate thread and loops every 60 seconds
+            Runs a tick at the start of every minute that moves the minutes tracked by
+            voiceTracker into timeAccumulator for each active guild, then flushes if due
         """
 
         await self.wait_until_ready()
 
-        while not self.is_closed():
-            try:
-                for guild in self.guilds:
-                    members = self.__filter_channel_members(guild)
-                    self.sharedFire.incrementTimes(guild, members)
-                await asyncio.sleep(60)
-            except Exception as e:
-                print("ERROR: ", str(e))
-                await asyncio.sleep(60)
+        await self.tickScheduler.run(self.__active_guilds, self.__track_guild_time, self.__flush_times, self.is_closed)
+
+    def __active_guilds(self):
+        """
+            Private helper function to get the guilds that have time to track this tick
+
+            Guilds with nobody in voice are skipped without being looked at
+        """
+
+        guilds = []
+        for guildId in self.voiceTracker.activeGuildIds():
+            guild = self.get_guild(guildId)
+            if guild is not None:
+                guilds.append(guild)
 
-    def __filter_channel_members(self, guild):
+        return guilds
+
+    async def __track_guild_time(self, guild):
+        """
+            Private helper function to move a guild's tracked minutes into timeAccumulator
         """
-            Private helper function to filter members to track
 
-            We do not increment times for individuals that are deafened, muted, or afk
+        userMinutes = self.voiceTracker.collectMinutes(guild.id)
+        self.timeAccumulator.addMinutes(guild.id, userMinutes, len(userMinutes) > 1)
+
+    async def __flush_times(self):
+        """
+            Private helper function to journal this tick's minutes and flush timeAccumulator
+            once flushInterval has passed
         """
 
-        members = []
-        channels = guild.voice_channels
+        await self.timeAccumulator.writeJournal()
 
-        for cur_channel in channels:
-            if cur_channel.members:
-                for member in cur_channel.members:
-                    if not member.voice.self_deaf and not member.voice.afk and not member.voice.deaf:
-                        members.append(member)
+        if self.timeAccumulator.isFlushDue():
+            await self.timeAccumulator.flush(self.sharedFire)
 
-        return members
+    async def __compact_points_ledgers(self):
+        """
+            Private helper function to compact every guild's points ledger once a day
+
+            Entries older than POINTS_LEDGER_RETENTION_DAYS are folded into the compacted
+            balances, so the ledger keeps a detailed history of recent changes only
+        """
+
+        await self.wait_until_ready()
+
+        retention = dt.timedelta(days=int(os.getenv('POINTS_LEDGER_RETENTION_DAYS', 30)))
+
+        while not self.is_closed():
+            before = dt.datetime.utcnow() - retention
+
+            for guild in list(self.guilds):
+                compacted = await self.sharedFire.compactPointsLedger(guild, before)
+                if compacted > 0:
+                    print("Compacted", compacted, "points ledger entries for guild", guild.id)
+
+            await asyncio.sleep(24 * 60 * 60)
 
     async def on_message(self, message):
         """
@@ -120,7 +336,7 @@ class DiscordClient(discord.Client):
             elif message.content.startswith('-feedback'):
                 if len(message.content.split(" ", 1)) == 2:
                     feedBack = message.content.split(" ", 1)
-                    await message.channel.send(self.miscCommands.sendFeedback(message.guild.id, message.author.id, feedBack[1]))
+                    await message.channel.send(await self.miscCommands.sendFeedback(message.guild.id, message.author.id, feedBack[1]))
                 else: 
                     await message.channel.send(embed=getUsageEmbed("-feedback [feedback message]"))
 
@@ -153,7 +369,17 @@ class DiscordClient(discord.Client):
                     await message.channel.send(embed=await self.timeLogger.getWeekLogEmbed(1, message.guild))
 
             elif message.content.startswith('-mylog'):
-                await message.channel.send(embed=self.timeLogger.getMyLogEmbed(message.guild, message.author))
+                await message.channel.send(embed=await self.timeLogger.getMyLogEmbed(message.guild, message.author))
+
+            elif message.content.startswith('-activity'):
+                msg = message.content
+                msgAndDays = msg.split(" ")
+                if len(msgAndDays) == 2 and msgAndDays[1].isdigit() and int(msgAndDays[1]) > 0:
+                    await message.channel.send(embed=await self.timeLogger.getActivityEmbed(message.guild, message.author, int(msgAndDays[1])))
+                elif len(msgAndDays) == 1:
+                    await message.channel.send(embed=await self.timeLogger.getActivityEmbed(message.guild, message.author))
+                else:
+                    await message.channel.send(embed=getUsageEmbed("-activity [number of days]\n\nexample: -activity 30"))
 
             # ---------- MARK: - DiscordPoints Commands ----------
             elif message.content.startswith('-points'):
@@ -170,21 +396,21 @@ class DiscordClient(discord.Client):
 
                 if (message.author.guild_permissions.administrator):
                     if len(commandAndReward) == 2:
-                        await message.channel.send(embed=self.discordPoints.createNewReward(message.guild, commandAndReward[1]))
+                        await message.channel.send(embed=await self.discordPoints.createNewReward(message.guild, commandAndReward[1]))
                     else:
                         await message.channel.send(embed=getUsageEmbed("-addreward [Desired Reward] [Price of the Reward]\n\nexample: -addreward CSGO with friends 500"))
                 else:
                     await message.channel.send(embed=getMissingPermissionsEmbed("Oops.. you have to be an admin to use this command"))
 
             elif message.content.startswith('-rewards'):
-                await message.channel.send(embed=self.discordPoints.getRewardsEmbed(message.guild))
+                await message.channel.send(embed=await self.discordPoints.getRewardsEmbed(message.guild))
 
             elif message.content.startswith('-redeem'):
                 msg = message.content
                 commandAndRewardId = msg.split(" ")
 
                 if len(commandAndRewardId) == 2:
-                    await message.channel.send(embed=self.discordPoints.redeemReward(message.guild, message.author, commandAndRewardId[1]))
+                    await message.channel.send(embed=await self.discordPoints.redeemReward(message.guild, message.author, commandAndRewardId[1]))
                 else:
                     await message.channel.send(embed=getUsageEmbed("-redeemReward [Desired Reward Id]\n\nexample: -redeemReward 3"))
 
@@ -214,7 +440,7 @@ class DiscordClient(discord.Client):
                     await message.channel.send(embed=getUsageEmbed("-completebet [Bet Id] [Winner Option Num]\n\nexample: -completebet 1 2"))
 
             elif message.content.startswith('-allbets'):
-                await message.channel.send(embed=self.discordBets.getAllActiveBets(message.guild))
+                await message.channel.send(embed=await self.discordBets.getAllActiveBets(message.guild))
 
             elif message.content.startswith('-bet'):
                 msg = message.content
@@ -225,7 +451,7 @@ class DiscordClient(discord.Client):
                     await message.channel.send(embed=getUsageEmbed("-bet [bet id] [option number] [discord points amount]\n\n example: -bet 3 2 500"))
 
             elif message.content.startswith('-mybets'):
-                await message.channel.send(embed=self.discordBets.showBetForUser(message.guild, message.author))
+                await message.channel.send(embed=await self.discordBets.showBetForUser(message.guild, message.author))
 
             elif message.content.startswith('-showbet'):
                 msg = message.content
@@ -1,67 +1,199 @@
-import firebase_admin
 from datetime import datetime
-from firebase_admin import credentials, firestore
 from collections import OrderedDict
 import json
+import copy
+import uuid
+import threading
+import time
 from datetime import datetime
-from pytz import timezone
 import datetime as dt
-from firebase_config import firebase_config_dict
+from dateutils import getCurrentDayId, dayIdToDateString, dateStringToDayId
+from FireCache import FireCache
+from FireMirror import FireMirror
+from MemberCache import MemberCache
+from Leaderboard import Leaderboard
+from RollingWindow import RollingWindow
+from UserStats import UserStats
+from ActivityMatrix import ActivityMatrix
+from BetPayout import BetPayout
+from Storage.StorageBackend import Increment, DELETE_FIELD, DELETE_DOCUMENT, TransactionError, mergeDocument
+from Storage.utils import createStorageBackend
 
 class Fire:
     """
     Creates an instance of the Google Firebase
 
+    Everything is read from and written to a StorageBackend (Firestore unless
+    KIRBEC_STORAGE selects another), so the commands don't depend on where the
+    data is stored
+
     Attributes
     __________
-    __db (private firebase.client obj): database for POST and GET requests
+    __backend (private StorageBackend obj): database for POST and GET requests
+    __cache (private FireCache obj): read-through cache of the guild documents,
+        kept up to date (or invalidated) by every write made through this instance
+    __mirror (private FireMirror obj): live copies of the MIRRORED_DOCUMENTS of subscribed
+        guilds, served before the cache while their listeners are connected
+    __watches (private dict): { (guildId, documentName): handle } the active backend watches
+    memberCache (MemberCache obj): member display names, kept current from gateway events
+    __leaderboards (private dict): { (guildId, documentName): (builtAt, Leaderboard) } ranked
+        *total* and *discordPoints*, updated in place by writes (or synced by the listener for
+        mirrored documents) and rebuilt after the cache ttl
+    __weekWindows (private dict): { guildId: (builtAt, RollingWindow) } each guild's times for the
+        last 7 days, added to by postAllTimeDeltas and rebuilt after the cache ttl
+    __versions (private dict): { (guildId, documentName): int } bumped whenever this instance
+        changes a document or its listener sees a change, so rendered data can be reused
+    __pendingWrites (private dict): { (guildId, documentName): int } writes in flight, reads of these
+        documents aren't cached until they're over (see __startWrite)
+    __statsIndexed (private dict): { guildId: bool } whether the guild's per-user stats are built
+        and kept up to date
+    __statsLocks (private dict): { guildId: threading.Lock } held while building or updating the
+        guild's user stats, so a guild's stats never wait on another guild's
+    __activityMatrices (private dict): { guildId: ActivityMatrix } each guild's whole history as a
+        users x days array (only if numpy is installed), added to by postAllTimeDeltas
+    __flushedDays (private dict): { guildId: set(dayId) } days written while the guild's activity
+        matrix is being built, read again before it's stored
+
+    Daily times are stored one document per day in the *days* subcollection of
+    the guild's *date* document, keyed by a sortable day id ('%Y-%m-%d'):
+        {guild.id}/date/days/{dayId} -> { 'date': dayId, 'users': { discord.member.id: int } }
+
+    Each user's stats (see UserStats) are stored in the *users* subcollection of the
+    guild's *stats* document, which only exists once they have been built:
+        {guild.id}/stats/users/{discord.member.id} -> UserStats.toDict()
+
+    Every change to discord points is appended to the guild's points ledger in
+    the same commit that changes *discordPoints*, which is the materialized
+    balance. compactPointsLedger folds old entries into the balances of the
+    *pointsLedger* document (started from the points it had when the ledger
+    was introduced):
+        {guild.id}/pointsLedger/entries/{entryId} -> { 'entryId', 'at', 'reason', 'reference', 'deltas': { discord.member.id: int } }
+        {guild.id}/pointsLedger -> { 'compactedThrough': entryId, 'balances': { discord.member.id: int } }
+
+    Bets are stored one document per bet in the *bets* subcollection of the
+    guild's *betIndex* document, which holds the last bet id and a summary of
+    every bet that hasn't been completed:
+        {guild.id}/betIndex/bets/{betId} -> betDict
+        {guild.id}/betIndex -> { 'numBets': int, 'active': { betId: { 'betId', 'betTitle', 'startedBy', 'closed' } } }
 
     Functions
     __________
-    incrementTimes(guild, members)
-        Increment time accumulation for *total* and *day* in __db
+    postAllTimeDeltas(guildDeltas) -> list(guildId)
+        Merge accumulated minute/point deltas for every guild in batched writes
     fetchAllMembers(guild) -> dict: { discord.member.id: discord.member.display_name }
         Fetch all members in the guild
     fetchTotalTimes(guild) -> dict: { discord.member.id: int }
         Fetch total time for members in the guild
     fetchAllDateTimes(guild) -> dict: { date: { discord.member.id: int } }
         Fetch all members' times organized by date
+    fetchDateTimes(guild, startDayId, endDayId) -> dict: { date: { discord.member.id: int } }
+        Fetch members' times organized by date for a range of days
+    fetchDayTimes(guild, dayId) -> dict: { discord.member.id: int }
+        Fetch members' times for a single day
+    fetchWeekTimes(guild) -> dict: { discord.member.id: int }, startDayId(str), endDayId(str)
+        Fetch members' summed times for the last 7 days
+    fetchUserStats(guild, userId) -> dict
+        Fetch a member's time stats (see UserStats)
+    fetchActivitySummary(guild, startDayId, endDayId, userId) -> dict
+        Fetch analytics for a range of days (see ActivityMatrix.summarize)
+    migrateDateTimes(guild)
+        Moves times from the legacy single *date* document into per-day documents
     fetchDiscordPoints(guild) -> dict: { discord.member.id: int }
         Fetch all members' discord points for the server
-    postNewDiscordPoints(guild, user, newPoints)
-        Updates the discord points for a user
+    fetchLeaderboardPage(guild, documentName, page, pageSize) -> list((userId, int)), page(int), pages(int)
+        Fetch a page of members ranked by total time or discord points
+    fetchLeaderboardRank(guild, documentName, userId) -> int
+        Fetch a member's rank by total time or discord points
+    fetchDocumentVersion(guild, documentName) -> int
+        Get a number that changes whenever the guild's document changes
+    fetchMembersVersion(guild) -> int
+        Get a number that changes whenever the guild's member names change
+    postPointsIncrement(guild, userId, amount, reason, reference) -> int
+        Adds discord points to a single user
+    postPointsDecrement(guild, userId, amount, reason, reference) -> points(int), errorString(str)
+        Takes discord points from a single user, only if they have at least that many
+    startPointsLedger(guild)
+        Records the guild's current discord points as the opening balances of its points ledger
+    fetchLedgerBalances(guild) -> dict: { discord.member.id: int }
+        Work out every member's discord points from the points ledger
+    fetchPointsHistory(guild, userId) -> list(dict)
+        Fetch the uncompacted ledger entries that changed a member's discord points
+    compactPointsLedger(guild, before) -> int
+        Folds the ledger entries from before a time into the compacted balances
+    rebuildDiscordPoints(guild) -> dict: { discord.member.id: int }
+        Replaces *discordPoints* with the balances worked out from the points ledger
     postNewReward(guild, rewardTitle, rewardCost)
         Pushes a new reward to the database
     fetchAllRewards(guild) -> dict: { rewardTitle(str) : cost(int) }
         Shows all Discord Points rewards for the guild
-    fetchAllBets(guild) -> dict: { betId(int): betDict(dict) }
-        Shows all proposed bets for the guild
+    fetchActiveBets(guild) -> dict: { betId(str): summary(dict) }
+        Shows the bets of the guild that haven't been completed
+    fetchBet(guild, betId) -> betDict(dict)
+        Fetch a single bet
+    migrateBets(guild)
+        Moves bets from the legacy single *bets* document into per-bet documents
     postNewBet(guild, userId, betTitle, betOptions, betStartedAt) -> betId(int)
         Creates a new bet in the database
-    postCloseBet(guild, user, betId) -> betDict(str), errorString(str)
+    postCloseBet(guild, user, betId) -> betDict(dict), errorString(str)
         Marks a bet as closed in the database
-    async def postCompleteBet(guild, user, betId, winningOptionId) ->  betDict(dict), userRewards(dict), errorString(str)
+    postCompleteBet(guild, user, betId, winningOptionId) ->  betDict(dict), userRewards(dict), errorString(str)
         Marks a bet as completed in the database and pays out the winners
     postBet(guild, user, betId, betOption, betAmount) -> betDict(dict), errorString(str)
         Adds an amount for the user for a bet option to the database
-    postFeedback(guild, userId, feedbackString)
-        Posts feedback to the database for the guild/userId
+    postFeedback(guildId, userId, feedbackString)
+        Posts feedback to the database for the guildId/userId
+    subscribe(guild)
+        Mirrors the guild's MIRRORED_DOCUMENTS in memory using change listeners
+    unsubscribe(guild)
+        Stops mirroring the guild's documents
 
     """
 
-    __db = None
-
-    def __init__(self):
-        # Checks to see if Firebase was already initialized in the applicaiton
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(firebase_config_dict)
-            firebase_admin.initialize_app(cred)
-        self.__db = firestore.client()
+    __backend = None
+
+    # Documents that can be fetched as ranked leaderboards
+    LEADERBOARD_DOCUMENTS = ['total', 'discordPoints']
+
+    # Documents that subscribe() keeps a live mirror of
+    MIRRORED_DOCUMENTS = ['total', 'discordPoints', 'rewards', 'betIndex']
+
+    # Sortable UTC timestamps of points ledger entries
+    LEDGER_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+    # Number of times a bet or points transaction is tried before giving up when other writes keep conflicting with it
+    MAX_TRANSACTION_ATTEMPTS = 8
+
+    memberCache = None
+
+    def __init__(self, cache=None, mirror=None, memberCache=None, backend=None):
+        self.__backend = backend if backend != None else createStorageBackend()
+        self.__cache = cache if cache != None else FireCache()
+        self.__mirror = mirror if mirror != None else FireMirror()
+        self.__watches = {}
+        self.memberCache = memberCache if memberCache != None else MemberCache()
+        self.__leaderboards = {}
+        self.__leaderboardLock = threading.Lock()
+        self.__weekWindows = {}
+        self.__weekWindowLock = threading.Lock()
+        self.__versions = {}
+        self.__pendingWrites = {}
+        self.__versionLock = threading.Lock()
+        self.__writesFinished = threading.Condition(self.__versionLock)
+        self.__statsIndexed = {}
+        self.__statsLocks = {}
+        self.__activityMatrices = {}
+        self.__flushedDays = {}
+        self.__activityBuildLocks = {}
+        self.__activityLock = threading.Lock()
+        self.__guildLocksLock = threading.Lock()
 
     async def fetchAllMembers(self, guild):
         """
         Fetch all members in the guild
 
+        Names come from memberCache; the gateway member list (or, if the guild
+        hasn't been chunked, REST paging) is only used the first time
+
         Parameters
         ----------
         guild : discord.Guild
@@ -72,11 +204,17 @@ class Fire:
         dict: { discord.member.id: discord.member.display_name }
         """
 
-        member_dict = {}
-        async for member in guild.fetch_members():
-            member_dict[member.id] = member.display_name
+        if not self.memberCache.isLoaded(guild.id):
+            if guild.chunked:
+                self.memberCache.loadGuild(guild)
+            else:
+                member_dict = {}
+                async for member in guild.fetch_members():
+                    member_dict[member.id] = member.display_name
+
+                self.memberCache.setMembers(guild.id, member_dict)
 
-        return member_dict
+        return self.memberCache.getMembers(guild.id)
 
     def fetchTotalTimes(self, guild):
         """
@@ -93,40 +231,72 @@ class Fire:
         """
 
         try:
-            doc_ref = self.__db.collection(str(guild.id)).document('total')
-            d = doc_ref.get().to_dict()
-
-            if d == None:
-                return {}
-
-            d = d['users']
+            d = self.__fetchDocument(guild.id, 'total')
 
-            return d
+            return d.get('users', {})
         except:
             print('Error in fetchTotalTimes')
             return {}
 
 
-    def incrementTimes(self, guild, members):
+    def postAllTimeDeltas(self, guildDeltas):
         """
-        Increment time accumulation for *total* and *day* in __db
+        Merge accumulated minute/point deltas for every guild into *total*, *days* and *discordPoints*
+
+        All of the writes are sent as server-side increments in as few batches
+        as possible (the backend's MAX_BATCH_WRITES writes each). A guild's writes are never
+        split across batches, so a failed batch only affects the guilds in it.
+        The documents are marked as being written until the cache has the
+        deltas (see __startWrite), so reads that overlap the flush aren't cached.
+        The stats of the users with new minutes are updated last, one guild at
+        a time while holding only that guild's stats lock
 
         Parameters
         ----------
-        guild : discord.Guild
-            The server that the members belong to
-        members : list(discord.Member)
-            Update times for these users
-        """
+        guildDeltas : dict { guildId: (dayDeltas, pointDeltas) }
+            dayDeltas   : { dayId: { userId(str): int } } minutes to add for each user on each day
+            pointDeltas : { userId(str): int } discord points to add for each user
 
-        if members == None or members == []:
-            return
+        Returns
+        ----------
+        list(guildId)
+            The guilds whose deltas could not be written
+        """
 
-        self.__updateTotalTimes(guild, members)
-        self.__updateDayTimes(guild, members)
-        if len(members) > 1:
-            self.__increaseDiscordPoints(guild, members)
+        for guildId in guildDeltas:
+            self.__startWrite(guildId, ['total', 'discordPoints', 'date', 'stats'])
 
+        try:
+            try:
+                failedGuildIds = self.__commitGuildWrites({
+                    guildId: self.__timeDeltaWrites(guildId, dayDeltas, pointDeltas)
+                    for guildId, (dayDeltas, pointDeltas) in guildDeltas.items()
+                })
+
+                for guildId, (dayDeltas, pointDeltas) in guildDeltas.items():
+                    if guildId in failedGuildIds:
+                        continue
+
+                    self.__cacheDeltas(guildId, 'total', self.__sumDayDeltas(dayDeltas))
+                    self.__cacheDeltas(guildId, 'discordPoints', pointDeltas)
+                    self.__updateWeekWindow(guildId, dayDeltas)
+                    self.__updateActivityMatrix(guildId, dayDeltas)
+                    self.__cache.invalidate(guildId, 'date')
+            finally:
+                for guildId in guildDeltas:
+                    self.__finishWrite(guildId, ['total', 'discordPoints', 'date'])
+
+            # The stats need their own round trips, so they're updated once everything else is in the cache
+            self.__updateAllUserStats({
+                guildId: dayDeltas
+                for guildId, (dayDeltas, pointDeltas) in guildDeltas.items()
+                if dayDeltas and not guildId in failedGuildIds
+            })
+        finally:
+            for guildId in guildDeltas:
+                self.__finishWrite(guildId, ['stats'])
+
+        return failedGuildIds
 
     def fetchAllDateTimes(self, guild):
         """
@@ -140,486 +310,2210 @@ class Fire:
         Returns
         ----------
         dict: { date: { discord.member.id: int } }
+            Ordered by most recent date
         """
 
-        try:
-            doc_ref = self.__db.collection(str(guild.id)).document('date')
-            d = doc_ref.get().to_dict()
-
-            if d == None:
-                return {}
-
-            # Sort the data by most recent date
-            ordered_data = OrderedDict(sorted(d.items(), key = lambda x:datetime.strptime(x[0], '%m/%d/%Y'), reverse=True))
-            return ordered_data
-        except:
-            print("FetchAllDateTimes Error")
-            return {}
+        return self.fetchDateTimes(guild)
 
-# --------------------- Discord Points --------------------------
-    def fetchDiscordPoints(self, guild):
+    def fetchDateTimes(self, guild, startDayId=None, endDayId=None):
         """
-        Fetch all members' discord points in the server
+        Fetch members' times organized by date for a range of days
+
+        Only the day documents within the range are read
 
         Parameters
         ----------
         guild : discord.Guild
             The server that we want to get information from
+        startDayId : str
+            The first day id ('%Y-%m-%d') to include, or None for no lower bound
+        endDayId : str
+            The last day id ('%Y-%m-%d') to include, or None for no upper bound
 
         Returns
         ----------
-        dict: { discord.member.id: int }
+        dict: { date: { discord.member.id: int } }
+            Ordered by most recent date
         """
 
-        try:
-            doc_ref = self.__db.collection(str(guild.id)).document('discordPoints')
-            d = doc_ref.get().to_dict()
+        key = (guild.id, 'date', startDayId, endDayId)
+        hit, ordered_data = self.__cache.get(key)
+        if hit:
+            return ordered_data
 
-            if d == None:
-                return {}
+        try:
+            version = self.__readVersion(guild.id, 'date')
+            ordered_data = OrderedDict()
+            for d in self.__backend.queryDocuments(self.__daysCollection(guild.id), 'date', startDayId, endDayId, descending=True):
+                ordered_data[dayIdToDateString(d['date'])] = d.get('users', {})
 
-            return d
-        except:
-            print('Error in fetchDiscordPoints')
+            self.__keepIfCurrent(guild.id, 'date', version, lambda: self.__cache.set(key, ordered_data))
+            return ordered_data
+        except Exception as e:
+            print(e)
+            print("FetchDateTimes Error")
             return {}
 
-    def postNewDiscordPoints(self, guild, user, newPoints):
+    def fetchDayTimes(self, guild, dayId):
         """
-        Updates the discord points for a user
+        Fetch members' times for a single day
 
         Parameters
         ----------
-        guild     : discord.Guild
-            The server that we want to push information to
-        user      : discord.Member if in guild, discord.User otherwise
-            The user whose points should be updated
-        newPoints : int
-            The updated amount of points the user should have
+        guild : discord.Guild
+            The server that we want to get information from
+        dayId : str
+            The day id ('%Y-%m-%d') to get the times for
+
+        Returns
+        ----------
+        dict: { discord.member.id: int }
         """
-        try:
-            doc_ref = self.__db.collection(str(guild.id)).document('discordPoints')
-            d = doc_ref.get().to_dict()
 
-            if d == None:
-                return {}
+        key = (guild.id, 'date', dayId)
+        hit, d = self.__cache.get(key)
+        if hit:
+            return d
+
+        try:
+            version = self.__readVersion(guild.id, 'date')
+            d = self.__backend.getDocument(self.__daysCollection(guild.id) + (dayId,))
 
-            d[user] = newPoints
+            d = d.get('users', {}) if d != None else {}
 
-            doc_ref.set(d)
+            self.__keepIfCurrent(guild.id, 'date', version, lambda: self.__cache.set(key, d))
+            return d
         except:
-            print('Error in postNewDiscordPoints')
+            print("FetchDayTimes Error")
             return {}
 
-    def postNewReward(self, guild, rewardTitle, rewardCost):
+    def fetchWeekTimes(self, guild):
         """
-        Pushes a new reward to the database
+        Fetch members' summed times for the last 7 days (today included)
+
+        The sums are kept in a RollingWindow that each flush adds to and that
+        drops the day leaving the window at rollover, so only building it reads
+        the day documents. Guilds with less than a week of history just sum the
+        days they have. A window seeded while a flush is running isn't stored
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to get info from
-        rewardTitle : string
-            A string representing the new award
-        rewardCost : int
-            The cost of the reward
+            The server that we want to get information from
+
+        Returns
+        ----------
+        dict: { discord.member.id: int }
+            Each member's total minutes in the window
+        startDayId : str
+            The first day of the window ('%Y-%m-%d')
+        endDayId : str
+            The last day of the window (today)
         """
-        doc_ref = self.__db.collection(str(guild.id)).document('rewards')
 
-        rewards_dict = self.fetchAllRewards(guild)
-        rewards_dict[rewardTitle] = rewardCost
+        today = getCurrentDayId()
 
-        doc_ref.set(rewards_dict)
+        with self.__weekWindowLock:
+            entry = self.__weekWindows.get(guild.id)
+            if entry != None and time.monotonic() - entry[0] < self.__cache.ttl:
+                window = entry[1]
+                window.rollTo(today)
+                startDayId, endDayId = window.getRange()
+                return window.getTotals(), startDayId, endDayId
 
+        # Flushes add their minutes to the stored window, so one seeded from days
+        # that may already include a flush is only used for this call
+        version = self.__readVersion(guild.id, 'date')
 
-    def fetchAllRewards(self, guild):
+        dateTimes = self.fetchDateTimes(guild, getCurrentDayId(daysAgo=RollingWindow.numDays - 1))
+        window = RollingWindow(today, {dateStringToDayId(date): userTimes for date, userTimes in dateTimes.items()})
+
+        def keep():
+            with self.__weekWindowLock:
+                self.__weekWindows[guild.id] = (time.monotonic(), window)
+
+        self.__keepIfCurrent(guild.id, 'date', version, keep)
+
+        startDayId, endDayId = window.getRange()
+        return window.getTotals(), startDayId, endDayId
+
+    def fetchUserStats(self, guild, userId):
         """
-        Shows all Discord Points rewards for the guild
+        Fetch a member's time stats
+
+        A single document read (or cache hit). The guild's stats are built from
+        its history the first time they're needed and kept up to date by
+        postAllTimeDeltas after that
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to get info from
+            The server that we want to get information from
+        userId : int
+            The id of the member
+
+        Returns
+        ----------
+        dict
+            UserStats.toDict(), or {} if the member has no tracked time
         """
+
         try:
-            doc_ref = self.__db.collection(str(guild.id)).document('rewards')
-            d = doc_ref.get().to_dict()
+            with self.__getGuildLock(self.__statsLocks, guild.id):
+                if not self.__isStatsIndexed(guild.id):
+                    self.__buildUserStats(guild)
+
+            key = (guild.id, 'stats', str(userId))
+            hit, d = self.__cache.get(key)
+            if hit:
+                return d
+
+            version = self.__readVersion(guild.id, 'stats')
+            d = self.__backend.getDocument(self.__userStatsCollection(guild.id) + (str(userId),))
 
             if d == None:
-                return {}
+                d = {}
 
+            self.__keepIfCurrent(guild.id, 'stats', version, lambda: self.__cache.set(key, d))
             return d
-        except:
+        except Exception as e:
+            print(e)
+            print("FetchUserStats Error")
             return {}
 
-# ---------------------- Discord Bets ---------------------------
-    def fetchAllBets(self, guild):
+    def fetchActivitySummary(self, guild, startDayId=None, endDayId=None, userId=None):
         """
-        Fetch all bets within the discord
+        Fetch analytics for a range of days
+
+        Answered from the guild's ActivityMatrix, which reads every day document
+        once when it's built (without holding up flushes, see __buildActivityMatrix)
+        and is added to by postAllTimeDeltas after that
 
         Parameters
         ----------
         guild : discord.Guild
             The server that we want to get information from
+        startDayId : str
+            The first day id ('%Y-%m-%d') to include, or None for the first tracked day
+        endDayId : str
+            The last day id ('%Y-%m-%d') to include, or None for the last tracked day
+        userId : int
+            A member to include personal stats for, or None
 
         Returns
         ----------
-        d: { betId(int): betDict(dict) }
+        dict
+            ActivityMatrix.summarize(), or None if numpy isn't installed or it failed
         """
 
+        if not ActivityMatrix.isAvailable():
+            return None
+
         try:
-            doc_ref = self.__db.collection(str(guild.id)).document('bets')
-            d = doc_ref.get().to_dict()
+            with self.__activityLock:
+                built = guild.id in self.__activityMatrices
 
-            if d == None:
-                return {}
+            if not built:
+                self.__buildActivityMatrix(guild)
 
-            return d
-        except:
-            return {}
+            with self.__activityLock:
+                return self.__activityMatrices[guild.id].summarize(startDayId, endDayId, str(userId) if userId != None else None)
+        except Exception as e:
+            print(e)
+            print("FetchActivitySummary Error")
+            return None
 
-    def postNewBet(self, guild, userId, betTitle, betOptions, betStartedAt):
+    def migrateDateTimes(self, guild):
         """
-        Create a new bet in the database
+        Moves times from the legacy single *date* document into per-day documents
+
+        Each batch adds a set of days to their day documents and removes the same
+        days from the legacy document, so the migration can safely be re-run if
+        it gets interrupted
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to push information to
-        userId: int
-            The id of the user posting the bet
-        betTitle: string
-            The title of the bet
-        betOptions: { betOption(string) : amountBet(int) }
-            All of the options for the bet and the total amount wagered on them
-        betStartedAt: string
-            A string representing when the bet was started
-
-        Returns
-        ----------
-        betId: int
-            An int representing the id of the bet we just created
+            The server to migrate
         """
+
         try:
-            doc_ref = self.__db.collection(str(guild.id)).document('bets')
+            legacyPath = (str(guild.id), 'date')
+            d = self.__backend.getDocument(legacyPath)
 
-            d = self.fetchAllBets(guild)
+            if not d:
+                return
 
-            if 'numBets' in d:
-                d['numBets'] = int(d['numBets']) + 1
-            else: 
-                d['numBets'] = 1
+            dates = list(d.keys())
+            # One write per batch is used to trim the legacy document
+            daysPerBatch = self.__backend.MAX_BATCH_WRITES - 1
 
-            d[str(d['numBets'])] = {
-                "acceptedBy": {},
-                "options": betOptions,
-                "betTitle": betTitle,
-                "startedAt": betStartedAt,
-                "startedBy": userId,
-                "completed": False,
-                "winningOption": "",
-                "closed": False,
-                "betId" : d['numBets'],
-            }
+            for i in range(0, len(dates), daysPerBatch):
+                writes = []
+                removedFields = {}
 
-            doc_ref.set(d)
+                for dateStr in dates[i:i+daysPerBatch]:
+                    dayId = dateStringToDayId(dateStr)
+                    writes.append((self.__daysCollection(guild.id) + (dayId,), {
+                        'date': dayId,
+                        'users': self.__toIncrements(d[dateStr]),
+                    }))
+                    removedFields[dateStr] = DELETE_FIELD
 
-            # We return the value of the betId that we just created (based off of numBets)
-            return d['numBets']
+                writes.append((legacyPath, removedFields))
+                self.__backend.commit(writes)
+
+            self.__backend.deleteDocument(legacyPath)
         except Exception as e:
             print(e)
-            print("Error posting new bet to Firebase")
-            
-            return -1
+            print("Error migrating date times for guild", guild.id)
+        finally:
+            self.__cache.invalidate(guild.id, 'date')
+            self.__dropWeekWindow(guild.id)
+            self.__dropActivityMatrix(guild.id)
 
-    def postCloseBet(self, guild, userId, betId):
+# --------------------- Discord Points --------------------------
+    def fetchDiscordPoints(self, guild):
         """
-        Marks a bet as 'closed' within the database
+        Fetch all members' discord points in the server
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to push information to
-        user: discord.Member
-            The user closing the bet
-        betId: str
-            The id of the bet we are attempting to close
+            The server that we want to get information from
 
         Returns
         ----------
-        betDict: dict
-            The bet we attempted to close
-        errorString: str
-            The string representing the error if one occurred
+        dict: { discord.member.id: int }
         """
 
         try:
-            bet_doc_ref = self.__db.collection(str(guild.id)).document('bets')
-            betDict = bet_doc_ref.get().to_dict()
-
-            if not betId in betDict:
-                return None, "Not a valid Bet Id"
-            if betDict[betId]['startedBy'] != userId and not user.guild_permissions.administrator:
-                return None, "Only the person that started the bet or an admin can close submissions for the bet"
-
-            betDict[betId]["closed"] = True
-            bet_doc_ref.set(betDict)
-
-            return betDict[betId], None
-        except Exception as e:
-            print(e)
-            print("Error closing bet")
-
-            return None, "Error closing bet in the database"
+            return self.__fetchDocument(guild.id, 'discordPoints')
+        except:
+            print('Error in fetchDiscordPoints')
+            return {}
 
-    async def postCompleteBet(self, guild, user, betId, winningOptionId):
+    def fetchLeaderboardPage(self, guild, documentName, page, pageSize=20):
         """
-        Marks a bet as 'completed' within the database
+        Fetch a page of members ranked by total time or discord points
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to push information to
-        user: discord.Member
-            The user completing the bet
-        betId: str
-            The id of the bet we are attempting to complete
-        winningOptionId: str
-            The id of the option that won the bet
+            The server that we want to get information from
+        documentName : str
+            'total' or 'discordPoints'
+        page : int
+            The 1-based page to get, page 1 is used if it's out of range
+        pageSize : int
+            Number of members per page
 
         Returns
         ----------
-        betDict: dict
-            The bet we attempted to complete
-        userRewards: dict {userId : amountWon}
-            The dictionary with ids representing how many points each user won 
-        errorString: str
-            The string representing the error if one occurred
+        list((discord.member.id, int))
+            The members on the page, highest first
+        page : int
+            The page that was used
+        pages : int
+            The total number of pages
         """
-        
-        try:
-            bet_doc_ref = self.__db.collection(str(guild.id)).document('bets')
-            points_doc_ref = self.__db.collection(str(guild.id)).document('discordPoints')
-
-            betDict = bet_doc_ref.get().to_dict()
-            pointsDict = points_doc_ref.get().to_dict()
-            memberDict = await self.fetchAllMembers(guild)
-
-            userId = str(user.id)
-
-            if not betId in betDict:
-                return None, None, "Not a valid Bet Id"
-            elif betDict[betId]['startedBy'] != user.id and not user.guild_permissions.administrator:
-                return None, None, "Only the person that started the bet or an admin can complete/payout the bet"
-            elif betDict[betId]["completed"]:
-                return None, None, "Bet has already been completed"
-            elif int(winningOptionId) > len(betDict[betId]["options"]) or int(winningOptionId) <= 0:
-                return None, None, "Not a valid Bet Option"
-
-            optionList = sorted(list(betDict[betId]["options"].keys()))
-            betDict[betId]["completed"] = True
-            betDict[betId]["winningOption"] = optionList[int(winningOptionId)-1]
-
-            # Calculate the total amount of points in the pool
-            totalPointAmount = 0
-            for key in betDict[betId]["options"]:
-                totalPointAmount += int(betDict[betId]["options"][key])
-
-            # Calculate the multipliers for each option
-            totalPointMultipliers = {}
-            for key in betDict[betId]["options"]:
-                if int(betDict[betId]["options"][key]) != 0:
-                    totalPointMultipliers[key] = totalPointAmount / int(betDict[betId]["options"][key])
-            
-            # Calculate the rewards for each user
-            userRewards = {}
-            for key in betDict[betId]["acceptedBy"]:
-                userBet = betDict[betId]["acceptedBy"][key]
-                if userBet["betOption"] == betDict[betId]["winningOption"]:
-                    pointAmount = int(int(userBet["amount"]) * totalPointMultipliers[userBet["betOption"]])
-                    userRewards[memberDict[int(key)]] = pointAmount
-                    pointsDict[userId] = int(pointsDict[userId]) + pointAmount
-
-            bet_doc_ref.set(betDict)
-            points_doc_ref.set(pointsDict)
 
-            return betDict[betId], userRewards, None
-        except Exception as e:
-            print(e)
-            print("Error completing bet")
+        leaderboard = self.__getLeaderboard(guild, documentName)
 
-            return None, None, "Error completing bet in the database"
+        with self.__leaderboardLock:
+            return leaderboard.getPage(page, pageSize)
 
-    def postBet(self, guild, user, betId, betOption, betAmount):
+    def fetchLeaderboardRank(self, guild, documentName, userId):
         """
-        Adds a bet for a user to an open bet
+        Fetch a member's rank by total time or discord points
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that we want to push information for
-        user: discord.Member
-            The user adding a bet
-        betId: str
-            The id of the bet we are attempting to add an individual bet to
-        betOption: str
-            The id of the bet option the user wants to bet for
-        betAmount: int
-            The amount the user wants to bet for that option
+            The server that we want to get information from
+        documentName : str
+            'total' or 'discordPoints'
+        userId : str
+            The id of the member
 
         Returns
         ----------
-        betDict: dict
-            The bet the user bet on with updated information
-        errorString: str
-            The string representing the error if one occurred
+        int
+            The member's 1-based rank, None if they aren't ranked
         """
-        try:
-            bet_doc_ref = self.__db.collection(str(guild.id)).document('bets')
-            points_doc_ref = self.__db.collection(str(guild.id)).document('discordPoints')
 
-            betDict = self.fetchAllBets(guild)
-            pointsDict = self.fetchDiscordPoints(guild)
-            userId = str(user.id)
+        leaderboard = self.__getLeaderboard(guild, documentName)
 
-            if not userId in pointsDict or int(pointsDict[userId]) < betAmount:
-                return None, "Not discord points"
-            elif not betId in betDict:
-                return None, "Not a valid Bet Id"
-            elif betDict[betId]["closed"] or betDict[betId]["completed"]:
-                return None, "Bet no longer has open submissions"
-            elif int(betOption) > len(betDict[betId]["options"]) or int(betOption) <= 0:
-                return None, "Not a valid Bet Option"
-            elif userId in betDict[betId]["acceptedBy"]:
-                optionList = sorted(list(betDict[betId]["options"].keys()))
-    
-                if betDict[betId]["acceptedBy"][userId]["betOption"] != optionList[int(betOption)-1]:
-                    return None, "Cannot bet for more than one option"
+        with self.__leaderboardLock:
+            return leaderboard.getRank(userId)
 
-            # Bet options are sorted for Ids
-            optionList = sorted(list(betDict[betId]["options"].keys()))
-            betDict[betId]["options"][optionList[int(betOption)-1]] += betAmount
-            betDict[betId]["acceptedBy"][userId] = {"betOption": optionList[int(betOption)-1], "amount": betAmount}
-            pointsDict[userId] = int(pointsDict[userId]) - betAmount
+    def fetchDocumentVersion(self, guild, documentName):
+        """
+        Get a number that changes whenever the guild's document changes
 
-            bet_doc_ref.set(betDict)
-            points_doc_ref.set(pointsDict)
+        Changes are those made through this instance or seen by the document's
+        listener, other writers are only picked up once the cache ttl expires.
+        Never touches the database
 
-            return betDict[betId], None
-            
-        except Exception as e:
-            print(e)
-            print("Error posting bet to Firebase")
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server
+        documentName : str
+            The name of the document in the guild's collection
 
-            return None, "Error sending information to the database"
+        Returns
+        ----------
+        int
+        """
 
-    # -------------  Misc. Functions -----------------------
-    def postFeedback(self, guild, userId, feedbackString):
+        with self.__versionLock:
+            return self.__versions.get((guild.id, documentName), 0)
+
+    def fetchMembersVersion(self, guild):
         """
-        Post feedback to the database
+        Get a number that changes whenever the guild's member names change
 
         Parameters
         ----------
         guild : discord.Guild
-            The guild the feedback is for
-        userId : int
-            The if of the user that left the feedback
-        feedbackString: string
-            A string representing the feedback 
+            The server
+
+        Returns
+        ----------
+        int
         """
-        self.__db.collection('feedback').add({
-            'feedback': feedbackString, 
-            'user': userId,
-            'guild': guild,
-        })
 
+        return self.memberCache.getVersion(guild.id)
 
-# ---------- MARK: - Private Methods ----------
-    def __updateTotalTimes(self, guild, members):
+    def postPointsIncrement(self, guild, userId, amount, reason='adjustment', reference=None):
         """
-        Increment time accumulation for *total* in __db
+        Adds discord points to a single user
+
+        Only the user's points are read and written, never the whole *discordPoints* map
 
         Parameters
         ----------
-        guild : discord.Guild
-            The server that the members belong to
-        members : list(discord.Member)
-            Update times for these users
-        """
-        doc_ref = self.__db.collection(str(guild.id)).document('total')
-
-        d = self.fetchTotalTimes(guild)
+        guild     : discord.Guild
+            The server that we want to push information to
+        userId    : str
+            The id of the user to give the points to
+        amount    : int
+            The amount of points to add
+        reason    : str
+            Why the points changed, recorded in the points ledger
+        reference : str
+            What the points were added for, recorded in the points ledger
 
-        if d == None:
-            return {}
+        Returns
+        ----------
+        int
+            The user's new amount of points, None if they couldn't be updated
+        """
 
-        for member in members:
-            if str(member.id) in d:
-                d[str(member.id)] += 1
-            else:
-                d[str(member.id)] = 1
+        points, errorString = self.__addUserPoints(guild.id, str(userId), amount, None, reason, reference)
 
-        doc_ref.set({
-            'users': d
-        })
+        return points if errorString == None else None
 
-    def __updateDayTimes(self, guild, members):
+    def postPointsDecrement(self, guild, userId, amount, reason='adjustment', reference=None):
         """
-        Increment time accumulation for *today* in __db
+        Takes discord points from a single user, only if they have at least that many
+
+        The check and the decrement happen in one transaction that only reads
+        and writes the user's points, so two redeems at the same time can't
+        spend the same points
 
         Parameters
         ----------
-        guild : discord.Guild
-            The server that the members belong to
-        members : list(discord.Member)
-            Update times for these users
+        guild     : discord.Guild
+            The server that we want to push information to
+        userId    : str
+            The id of the user to take the points from
+        amount    : int
+            The amount of points to take
+        reason    : str
+            Why the points changed, recorded in the points ledger (e.g. 'redeem')
+        reference : str
+            What the points were spent on, recorded in the points ledger
+
+        Returns
+        ----------
+        points : int
+            The user's amount of points afterwards (unchanged if they didn't have enough)
+        errorString : str
+            The string representing the error if one occurred
         """
 
-        td = dt.timedelta(hours=6)
-        shiftedNow = datetime.today() - td
-        curDateStr = shiftedNow.strftime('%m/%d/%Y')
+        return self.__addUserPoints(guild.id, str(userId), -amount, 0, reason, reference)
 
-        doc_ref = self.__db.collection(str(guild.id)).document('date')
+    def startPointsLedger(self, guild):
+        """
+        Records the guild's current discord points as the opening balances of its points ledger
 
-        allDateTimes = self.fetchAllDateTimes(guild)
-        d = {}
+        Does nothing if the ledger has already been started, so it's safe to call on every start up
 
-        if allDateTimes == {} or allDateTimes == None or not curDateStr in allDateTimes.keys():
-            d = {}
-        else:
-            d = allDateTimes[curDateStr]
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to start the ledger for
+        """
 
-        for member in members:
-            if str(member.id) in d:
-                d[str(member.id)] += 1
-            else:
-                d[str(member.id)] = 1
+        pointsPath = (str(guild.id), 'discordPoints')
+        ledgerPath = (str(guild.id), 'pointsLedger')
 
-        allDateTimes[curDateStr] = d
+        def transaction(docs):
+            if docs[ledgerPath] != None:
+                return [], None
 
-        doc_ref.set(allDateTimes)
+            return [(ledgerPath, {
+                'compactedThrough': self.__ledgerTimestamp(),
+                'balances': docs[pointsPath] or {},
+            })], None
+
+        try:
+            self.__backend.runTransaction([pointsPath, ledgerPath], transaction, self.MAX_TRANSACTION_ATTEMPTS)
+        except Exception as e:
+            print(e)
+            print("Error starting points ledger for guild", guild.id)
 
-    def __increaseDiscordPoints(self, guild, members):
+    def fetchLedgerBalances(self, guild):
         """
-        Increase discord points for each user in the discord
+        Work out every member's discord points from the points ledger
+
+        The compacted balances plus every entry after them, so this reads the
+        whole uncompacted ledger. Used to check or rebuild *discordPoints*
 
         Parameters
         ----------
         guild : discord.Guild
-            The server that the members belong to
-        members : list(discord.Member)
-            Update times for these users
-        """
-        doc_ref = self.__db.collection(str(guild.id)).document('discordPoints')
+            The server that we want to get information from
+
+        Returns
+        ----------
+        dict: { discord.member.id: int }
+        """
+
+        checkpoint = self.__backend.getDocument((str(guild.id), 'pointsLedger')) or {}
+        compactedThrough = checkpoint.get('compactedThrough', '')
+        balances = dict(checkpoint.get('balances', {}))
+
+        for entry in self.__backend.queryDocuments(self.__ledgerCollection(guild.id), 'entryId', compactedThrough):
+            if entry['entryId'] > compactedThrough:
+                self.__addDeltas(balances, entry['deltas'])
+
+        return balances
+
+    def fetchPointsHistory(self, guild, userId):
+        """
+        Fetch the uncompacted ledger entries that changed a member's discord points
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to get information from
+        userId : int
+            The id of the member
+
+        Returns
+        ----------
+        list(dict): [{ 'at': str, 'reason': str, 'reference': str, 'amount': int }]
+            Oldest first
+        """
+
+        userId = str(userId)
+
+        return [{'at': entry['at'], 'reason': entry['reason'], 'reference': entry['reference'], 'amount': entry['deltas'][userId]}
+                for entry in self.__backend.queryDocuments(self.__ledgerCollection(guild.id), 'entryId')
+                if userId in entry['deltas']]
+
+    def compactPointsLedger(self, guild, before):
+        """
+        Folds the ledger entries from before a time into the compacted balances
+
+        Each batch adds a set of entries to the balances and deletes them in
+        the same commit, so the compaction can safely be re-run if it gets
+        interrupted. Entries already included in the balances (written before
+        the ledger was started) are just deleted
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to compact the ledger of
+        before : datetime
+            Entries from before this (UTC) time are compacted
+
+        Returns
+        ----------
+        int
+            The number of entries that were compacted
+        """
+
+        try:
+            ledgerPath = (str(guild.id), 'pointsLedger')
+            cutoff = before.strftime(self.LEDGER_TIME_FORMAT)
+
+            checkpoint = self.__backend.getDocument(ledgerPath)
+            if checkpoint == None:
+                return 0
+
+            compactedThrough = checkpoint.get('compactedThrough', '')
+            entries = [entry for entry in self.__backend.queryDocuments(self.__ledgerCollection(guild.id), 'entryId', None, cutoff)
+                       if entry['entryId'] < cutoff]
+            # One write per batch is used for the balances
+            entriesPerBatch = self.__backend.MAX_BATCH_WRITES - 1
+
+            for i in range(0, len(entries), entriesPerBatch):
+                batch = entries[i:i+entriesPerBatch]
+                balanceDeltas = {}
+                writes = []
+
+                for entry in batch:
+                    if entry['entryId'] > compactedThrough:
+                        self.__addDeltas(balanceDeltas, entry['deltas'])
+                    writes.append((self.__ledgerCollection(guild.id) + (entry['entryId'],), DELETE_DOCUMENT))
+
+                compactedThrough = max(compactedThrough, batch[-1]['entryId'])
+                writes.append((ledgerPath, {'compactedThrough': compactedThrough, 'balances': self.__toIncrements(balanceDeltas)}))
+                self.__backend.commit(writes)
+
+            return len(entries)
+        except Exception as e:
+            print(e)
+            print("Error compacting points ledger for guild", guild.id)
+            return 0
+
+    def rebuildDiscordPoints(self, guild):
+        """
+        Replaces *discordPoints* with the balances worked out from the points ledger
+
+        Points written while this runs can be lost, so only run it while the bot is stopped
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to rebuild the discord points of
+
+        Returns
+        ----------
+        dict: { discord.member.id: int }
+            The rebuilt balances
+        """
+
+        balances = self.fetchLedgerBalances(guild)
+        self.__setDocument(guild.id, 'discordPoints', balances)
+
+        return balances
+
+    def postNewReward(self, guild, rewardTitle, rewardCost):
+        """
+        Pushes a new reward to the database
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to get info from
+        rewardTitle : string
+            A string representing the new award
+        rewardCost : int
+            The cost of the reward
+        """
+        rewards_dict = self.fetchAllRewards(guild)
+        rewards_dict[rewardTitle] = rewardCost
+
+        self.__setDocument(guild.id, 'rewards', rewards_dict)
+
+
+    def fetchAllRewards(self, guild):
+        """
+        Shows all Discord Points rewards for the guild
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to get info from
+        """
+        try:
+            return self.__fetchDocument(guild.id, 'rewards')
+        except:
+            return {}
+
+# ---------------------- Discord Bets ---------------------------
+    def fetchActiveBets(self, guild):
+        """
+        Fetch the bets that haven't been completed yet
+
+        Only the guild's *betIndex* document is read, never the bets themselves
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to get information from
+
+        Returns
+        ----------
+        d: { betId(str): { 'betId': int, 'betTitle': str, 'startedBy': int, 'closed': bool } }
+        """
+
+        try:
+            return self.__fetchDocument(guild.id, 'betIndex').get('active', {})
+        except:
+            return {}
+
+    def fetchBet(self, guild, betId):
+        """
+        Fetch a single bet
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to get information from
+        betId: str
+            The id of the bet
+
+        Returns
+        ----------
+        betDict: dict
+            None if there is no bet with that id
+        """
+
+        try:
+            return self.__fetchBet(guild.id, str(betId))
+        except Exception as e:
+            print(e)
+            print("FetchBet Error")
+            return None
+
+    def migrateBets(self, guild):
+        """
+        Moves bets from the legacy single *bets* document into per-bet documents
+
+        Each batch writes a set of bets to their own documents (and the index, if
+        they're active) and removes the same bets from the legacy document, so the
+        migration can safely be re-run if it gets interrupted
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to migrate
+        """
+
+        try:
+            legacyPath = (str(guild.id), 'bets')
+            d = self.__backend.getDocument(legacyPath)
+
+            if not d:
+                return
+
+            numBets = max(int(d.get('numBets', 0)), int(self.__fetchDocument(guild.id, 'betIndex').get('numBets', 0)))
+            betIds = [key for key in d if key != 'numBets']
+            # Two writes per batch are used for the index and to trim the legacy document
+            betsPerBatch = self.__backend.MAX_BATCH_WRITES - 2
+
+            for i in range(0, len(betIds), betsPerBatch):
+                writes = []
+                activeBets = {}
+                removedFields = {}
+
+                for betId in betIds[i:i+betsPerBatch]:
+                    writes.append((self.__betPath(guild.id, betId), d[betId]))
+                    if not d[betId]['completed']:
+                        activeBets[betId] = self.__betSummary(d[betId])
+                    removedFields[betId] = DELETE_FIELD
+
+                writes.append(((str(guild.id), 'betIndex'), {'numBets': numBets, 'active': activeBets}))
+                writes.append((legacyPath, removedFields))
+                self.__backend.commit(writes)
+
+            self.__backend.deleteDocument(legacyPath)
+        except Exception as e:
+            print(e)
+            print("Error migrating bets for guild", guild.id)
+        finally:
+            self.__cache.invalidate(guild.id, 'betIndex')
+            self.__cache.invalidate(guild.id, 'bet')
+            self.__bumpVersion(guild.id, 'betIndex')
+
+    def postNewBet(self, guild, userId, betTitle, betOptions, betStartedAt):
+        """
+        Create a new bet in the database
+
+        The next bet id is taken from the *betIndex* in a transaction, so bets
+        created at the same time never get the same id
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to push information to
+        userId: int
+            The id of the user posting the bet
+        betTitle: string
+            The title of the bet
+        betOptions: { betOption(string) : amountBet(int) }
+            All of the options for the bet and the total amount wagered on them
+        betStartedAt: string
+            A string representing when the bet was started
+
+        Returns
+        ----------
+        betId: int
+            An int representing the id of the bet we just created
+        """
+        indexPath = (str(guild.id), 'betIndex')
+
+        def transaction(docs):
+            betId = int((docs[indexPath] or {}).get('numBets', 0)) + 1
+
+            bet = {
+                "acceptedBy": {},
+                "options": betOptions,
+                "betTitle": betTitle,
+                "startedAt": betStartedAt,
+                "startedBy": userId,
+                "completed": False,
+                "winningOption": "",
+                "closed": False,
+                "betId" : betId,
+            }
+            indexData = {
+                'numBets': betId,
+                'active': {str(betId): self.__betSummary(bet)},
+            }
+
+            return [(self.__betPath(guild.id, betId), bet), (indexPath, indexData)], (bet, indexData)
+
+        self.__startWrite(guild.id, ['betIndex'])
+
+        try:
+            bet, indexData = self.__backend.runTransaction([indexPath], transaction, self.MAX_TRANSACTION_ATTEMPTS)
+            self.__cacheBetChanges(guild.id, str(bet['betId']), bet, indexData, {})
+
+            # We return the value of the betId that we just created (based off of numBets)
+            return bet['betId']
+        except Exception as e:
+            self.__invalidateBets(guild.id)
+            print(e)
+            print("Error posting new bet to Firebase")
+            
+            return -1
+        finally:
+            self.__finishWrite(guild.id, ['betIndex'])
+
+    def postCloseBet(self, guild, user, betId):
+        """
+        Marks a bet as 'closed' within the database
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to push information to
+        user: discord.Member
+            The user closing the bet
+        betId: str
+            The id of the bet we are attempting to close
+
+        Returns
+        ----------
+        betDict: dict
+            The bet we attempted to close
+        errorString: str
+            The string representing the error if one occurred
+        """
+
+        def update(bet, points):
+            if bet == None:
+                return None, None, None, (None, "Not a valid Bet Id")
+            if bet['startedBy'] != user.id and not user.guild_permissions.administrator:
+                return None, None, None, (None, "Only the person that started the bet or an admin can close submissions for the bet")
+
+            bet["closed"] = True
+            indexData = {'active': {betId: {'closed': True}}} if not bet['completed'] else {}
+
+            return {'closed': True}, indexData, {}, (bet, None)
+
+        try:
+            return self.__runBetTransaction(guild.id, betId, update)
+        except Exception as e:
+            print(e)
+            print("Error closing bet")
+
+            return None, "Error closing bet in the database"
+
+    def postCompleteBet(self, guild, user, betId, winningOptionId):
+        """
+        Marks a bet as 'completed' within the database and pays out the winners
+
+        Each winner's share is worked out by BetPayout and credited as an
+        increment in the same atomic commit that completes the bet, so a bet
+        placed at the same time either makes it into the payout or is turned
+        away, and the payout is one round trip however many people bet.
+        Winners are labelled with names from memberCache
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to push information to
+        user: discord.Member
+            The user completing the bet
+        betId: str
+            The id of the bet we are attempting to complete
+        winningOptionId: str
+            The id of the option that won the bet
+
+        Returns
+        ----------
+        betDict: dict
+            The bet we attempted to complete
+        userRewards: dict {displayName : amountWon}
+            The dictionary with names representing how many points each user won
+        errorString: str
+            The string representing the error if one occurred
+        """
+
+        def update(bet, points):
+            if bet == None:
+                return None, None, None, (None, None, "Not a valid Bet Id")
+            elif bet['startedBy'] != user.id and not user.guild_permissions.administrator:
+                return None, None, None, (None, None, "Only the person that started the bet or an admin can complete/payout the bet")
+            elif bet["completed"]:
+                return None, None, None, (None, None, "Bet has already been completed")
+            elif int(winningOptionId) > len(bet["options"]) or int(winningOptionId) <= 0:
+                return None, None, None, (None, None, "Not a valid Bet Option")
+
+            optionList = sorted(list(bet["options"].keys()))
+            bet["completed"] = True
+            bet["winningOption"] = optionList[int(winningOptionId)-1]
+
+            payouts = BetPayout(bet["options"], bet["acceptedBy"]).getPayouts(bet["winningOption"])
+
+            userRewards = {}
+            for userId, pointAmount in payouts.items():
+                userRewards[self.memberCache.getName(guild.id, int(userId), userId)] = pointAmount
+
+            return ({'completed': True, 'winningOption': bet["winningOption"]}, {'active': {betId: DELETE_FIELD}},
+                    payouts, (bet, userRewards, None))
+
+        try:
+            return self.__runBetTransaction(guild.id, betId, update, pointsReason='payout')
+        except Exception as e:
+            print(e)
+            print("Error completing bet")
+
+            return None, None, "Error completing bet in the database"
+
+    def postBet(self, guild, user, betId, betOption, betAmount):
+        """
+        Adds a bet for a user to an open bet
+
+        The bet and the user's points are read and written in one transaction
+        that only touches the user's fields, so bets placed at the same time
+        are retried instead of overwriting each other
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server that we want to push information for
+        user: discord.Member
+            The user adding a bet
+        betId: str
+            The id of the bet we are attempting to add an individual bet to
+        betOption: str
+            The id of the bet option the user wants to bet for
+        betAmount: int
+            The amount the user wants to bet for that option
+
+        Returns
+        ----------
+        betDict: dict
+            The bet the user bet on with updated information
+        errorString: str
+            The string representing the error if one occurred
+        """
+        userId = str(user.id)
+
+        def update(bet, pointsDict):
+            if not userId in pointsDict or int(pointsDict[userId]) < betAmount:
+                return None, None, None, (None, "Not discord points")
+            elif bet == None:
+                return None, None, None, (None, "Not a valid Bet Id")
+            elif bet["closed"] or bet["completed"]:
+                return None, None, None, (None, "Bet no longer has open submissions")
+            elif int(betOption) > len(bet["options"]) or int(betOption) <= 0:
+                return None, None, None, (None, "Not a valid Bet Option")
+            elif userId in bet["acceptedBy"]:
+                optionList = sorted(list(bet["options"].keys()))
+    
+                if bet["acceptedBy"][userId]["betOption"] != optionList[int(betOption)-1]:
+                    return None, None, None, (None, "Cannot bet for more than one option")
+
+            # Bet options are sorted for Ids
+            optionList = sorted(list(bet["options"].keys()))
+            option = optionList[int(betOption)-1]
+            bet["options"][option] += betAmount
+            # Betting again on the same option adds to the user's stake
+            previousAmount = int(bet["acceptedBy"].get(userId, {}).get("amount", 0))
+            bet["acceptedBy"][userId] = {"betOption": option, "amount": previousAmount + betAmount}
+
+            betData = {
+                'options': {option: bet["options"][option]},
+                'acceptedBy': {userId: bet["acceptedBy"][userId]},
+            }
+
+            return betData, {}, {userId: -betAmount}, (bet, None)
+
+        try:
+            return self.__runBetTransaction(guild.id, betId, update, pointsUserId=userId)
+        except TransactionError as e:
+            print(e)
+            print("Bet kept conflicting with other bets")
+
+            return None, "Too many people are betting right now, try again"
+        except Exception as e:
+            print(e)
+            print("Error posting bet to Firebase")
+
+            return None, "Error sending information to the database"
+
+    # -------------  Misc. Functions -----------------------
+    def postFeedback(self, guildId, userId, feedbackString):
+        """
+        Post feedback to the database
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the guild the feedback is for
+        userId : int
+            The id of the user that left the feedback
+        feedbackString: string
+            A string representing the feedback 
+        """
+        self.__backend.addDocument(('feedback',), {
+            'feedback': feedbackString, 
+            'user': userId,
+            'guild': guildId,
+        })
+
+
+    # -------------  Live Mirror -----------------------
+    def subscribe(self, guild):
+        """
+        Mirrors the guild's MIRRORED_DOCUMENTS in memory using change listeners
+
+        While a listener is connected its document is read from memory instead
+        of the database
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to mirror
+        """
+
+        for documentName in self.MIRRORED_DOCUMENTS:
+            key = (guild.id, documentName)
+            if key in self.__watches:
+                continue
+
+            try:
+                handle = self.__backend.watch((str(guild.id), documentName), self.__createSnapshotCallback(guild.id, documentName))
+                if handle == None:
+                    print("Storage backend can't watch documents, not mirroring guild", guild.id)
+                    return
+
+                self.__watches[key] = handle
+            except Exception as e:
+                print(e)
+                print("Error subscribing to", documentName, "for guild", guild.id)
+
+    def unsubscribe(self, guild):
+        """
+        Stops mirroring the guild's documents
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to stop mirroring
+        """
+
+        for documentName in self.MIRRORED_DOCUMENTS:
+            watch = self.__watches.pop((guild.id, documentName), None)
+            self.__mirror.remove(guild.id, documentName)
+
+            if watch != None:
+                self.__backend.unwatch(watch)
+
+# ---------- MARK: - Private Methods ----------
+    def __fetchDocument(self, guildId, documentName):
+        """
+        Fetch a guild document, from the cache if possible
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+
+        Returns
+        ----------
+        dict
+            The document's data, or {} if it doesn't exist
+        """
+
+        if self.__isListening(guildId, documentName):
+            hit, d = self.__mirror.get(guildId, documentName)
+            if hit:
+                return d
+
+        hit, d = self.__cache.get((guildId, documentName))
+        if hit:
+            return d
+
+        version = self.__readVersion(guildId, documentName)
+        d = self.__backend.getDocument((str(guildId), documentName))
+
+        if d == None:
+            d = {}
+
+        self.__keepIfCurrent(guildId, documentName, version, lambda: self.__cache.set((guildId, documentName), d))
+        return d
+
+    def __setDocument(self, guildId, documentName, d):
+        """
+        Overwrite a guild document and update the cache
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+        d : dict
+            The new data for the document
+        """
+
+        self.__startWrite(guildId, [documentName])
+
+        try:
+            self.__backend.setDocument((str(guildId), documentName), d)
+        except:
+            self.__cache.invalidate(guildId, documentName)
+            raise
+        else:
+            self.__cache.set((guildId, documentName), d)
+            if not self.__isListening(guildId, documentName):
+                self.__syncLeaderboard(guildId, documentName, d)
+        finally:
+            self.__finishWrite(guildId, [documentName])
+
+    def __startWrite(self, guildId, documentNames):
+        """
+        Record that a write to the guild's documents is in flight
+
+        Writes add their changes to what's already cached, so until the matching
+        __finishWrite nothing read from the database for these documents is kept
+        (see __keepIfCurrent): a read that overlaps the write may already include
+        it, and keeping it would count the write twice
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentNames : list(str)
+            The names of the documents being written ('date' for the day documents,
+            'stats' for the user stats)
+        """
+
+        with self.__versionLock:
+            for documentName in documentNames:
+                key = (guildId, documentName)
+                self.__pendingWrites[key] = self.__pendingWrites.get(key, 0) + 1
+
+    def __finishWrite(self, guildId, documentNames):
+        """
+        Record that a write started with __startWrite is over (whether or not it was committed)
+
+        Bumps the documents' versions, so reads that started before it aren't kept either
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentNames : list(str)
+            The names passed to __startWrite
+        """
+
+        with self.__versionLock:
+            for documentName in documentNames:
+                key = (guildId, documentName)
+                self.__versions[key] = self.__versions.get(key, 0) + 1
+
+                self.__pendingWrites[key] -= 1
+                if self.__pendingWrites[key] == 0:
+                    del self.__pendingWrites[key]
+
+            self.__writesFinished.notify_all()
+
+    def __readVersion(self, guildId, documentName):
+        """
+        Get the document's version before reading it from the database, to pass to __keepIfCurrent
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document
+
+        Returns
+        ----------
+        int
+            None while a write to the document is in flight
+        """
+
+        with self.__versionLock:
+            key = (guildId, documentName)
+
+            if key in self.__pendingWrites:
+                return None
+
+            return self.__versions.get(key, 0)
+
+    def __waitForWrites(self, guildId, documentName):
+        """
+        Wait until no write to the document is in flight and get its version, to pass to __keepIfCurrent
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document
+
+        Returns
+        ----------
+        int
+        """
+
+        with self.__writesFinished:
+            key = (guildId, documentName)
+            self.__writesFinished.wait_for(lambda: not key in self.__pendingWrites)
+
+            return self.__versions.get(key, 0)
+
+    def __getGuildLock(self, locks, guildId):
+        """
+        Get the guild's lock from a dict of per-guild locks, creating it the first time
+
+        Parameters
+        ----------
+        locks : dict { guildId: threading.Lock }
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        threading.Lock
+        """
+
+        with self.__guildLocksLock:
+            if not guildId in locks:
+                locks[guildId] = threading.Lock()
+
+            return locks[guildId]
+
+    def __keepIfCurrent(self, guildId, documentName, version, keep):
+        """
+        Call keep() to store what was read from the database, unless the document was written in the meantime
+
+        Checked and stored while holding __versionLock, so a write can't start
+        in between and miss what's being stored
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document
+        version : int
+            What __readVersion returned before the read
+        keep : callable()
+            Stores what was read (must not take __versionLock)
+
+        Returns
+        ----------
+        bool
+            Whether keep() was called
+        """
+
+        with self.__versionLock:
+            key = (guildId, documentName)
+
+            if version == None or key in self.__pendingWrites or self.__versions.get(key, 0) != version:
+                return False
+
+            keep()
+            return True
+
+    def __createSnapshotCallback(self, guildId, documentName):
+        """
+        Create the watch callback that copies a document's data into the mirror
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+
+        Returns
+        ----------
+        callable(dict)
+        """
+
+        def onSnapshot(d):
+            self.__mirror.apply(guildId, documentName, d)
+            self.__syncLeaderboard(guildId, documentName, d)
+            self.__bumpVersion(guildId, documentName)
+
+        return onSnapshot
+
+    def __bumpVersion(self, guildId, documentName):
+        """
+        Record that the guild's document changed (see fetchDocumentVersion)
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+        """
+
+        with self.__versionLock:
+            key = (guildId, documentName)
+            self.__versions[key] = self.__versions.get(key, 0) + 1
+
+    def __isListening(self, guildId, documentName):
+        """
+        Whether the document's listener is connected
+
+        A listener that has shut down (e.g. after an unrecoverable stream error)
+        is removed along with its mirrored data, so reads go back to the database
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+
+        Returns
+        ----------
+        bool
+        """
+
+        watch = self.__watches.get((guildId, documentName))
+        if watch == None:
+            return False
+
+        if not self.__backend.isWatching(watch):
+            print("Listener for", documentName, "in guild", guildId, "disconnected, falling back to direct reads")
+            self.__watches.pop((guildId, documentName), None)
+            self.__mirror.remove(guildId, documentName)
+            return False
+
+        return True
+
+    def __getLeaderboard(self, guild, documentName):
+        """
+        Get the guild's leaderboard for the document, building it if it's missing or older than the cache ttl
+
+        A leaderboard built while the document is being written isn't stored (see __keepIfCurrent)
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server
+        documentName : str
+            'total' or 'discordPoints'
+
+        Returns
+        ----------
+        Leaderboard
+            Only use it while holding __leaderboardLock
+        """
+
+        key = (guild.id, documentName)
+
+        with self.__leaderboardLock:
+            entry = self.__leaderboards.get(key)
+            if entry != None and time.monotonic() - entry[0] < self.__cache.ttl:
+                return entry[1]
+
+        # Writes add their deltas to the stored leaderboard, so one built from data
+        # that may already include a write is only used for this call
+        version = self.__readVersion(guild.id, documentName)
+
+        if documentName == 'total':
+            scores = self.fetchTotalTimes(guild)
+        else:
+            scores = self.fetchDiscordPoints(guild)
+
+        leaderboard = Leaderboard(scores)
+
+        def keep():
+            with self.__leaderboardLock:
+                self.__leaderboards[key] = (time.monotonic(), leaderboard)
+
+        self.__keepIfCurrent(guild.id, documentName, version, keep)
+
+        return leaderboard
+
+    def __updateLeaderboard(self, guildId, documentName, func):
+        """
+        Apply func to the guild's leaderboard for the document if it has been built
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            'total' or 'discordPoints'
+        func : callable(Leaderboard)
+            Updates the leaderboard
+        """
+
+        with self.__leaderboardLock:
+            entry = self.__leaderboards.get((guildId, documentName))
+            if entry != None:
+                func(entry[1])
+
+    def __syncLeaderboard(self, guildId, documentName, d):
+        """
+        Bring the guild's leaderboard in line with new data for the document
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document that changed (ignored if it isn't a LEADERBOARD_DOCUMENTS)
+        d : dict
+            The document's new data
+        """
+
+        if documentName == 'total':
+            self.__updateLeaderboard(guildId, documentName, lambda leaderboard: leaderboard.sync(d.get('users', {})))
+        elif documentName == 'discordPoints':
+            self.__updateLeaderboard(guildId, documentName, lambda leaderboard: leaderboard.sync(d))
+
+    def __addToLeaderboard(self, leaderboard, deltas):
+        """
+        Add each user's delta to their leaderboard score
+
+        Parameters
+        ----------
+        leaderboard : Leaderboard
+        deltas : dict { userId(str): int }
+        """
+
+        for userId, amount in deltas.items():
+            leaderboard.add(userId, amount)
+
+    def __dropLeaderboards(self, guildId):
+        """
+        Drop the guild's leaderboards so they are rebuilt on the next fetch
+        """
+
+        with self.__leaderboardLock:
+            for documentName in self.LEADERBOARD_DOCUMENTS:
+                self.__leaderboards.pop((guildId, documentName), None)
+
+    def __updateWeekWindow(self, guildId, dayDeltas):
+        """
+        Add flushed minutes to the guild's week window if it has been built
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        dayDeltas : dict { dayId: { userId(str): int } }
+            The minutes that were written for each day
+        """
+
+        with self.__weekWindowLock:
+            entry = self.__weekWindows.get(guildId)
+            if entry != None:
+                for dayId in sorted(dayDeltas):
+                    entry[1].add(dayId, dayDeltas[dayId])
+
+    def __dropWeekWindow(self, guildId):
+        """
+        Drop the guild's week window so it is rebuilt on the next fetch
+        """
+
+        with self.__weekWindowLock:
+            self.__weekWindows.pop(guildId, None)
+
+    def __updateActivityMatrix(self, guildId, dayDeltas):
+        """
+        Add flushed minutes to the guild's activity matrix if it has been built (or note their days if it's being built)
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        dayDeltas : dict { dayId: { userId(str): int } }
+            The minutes that were written for each day
+        """
+
+        with self.__activityLock:
+            matrix = self.__activityMatrices.get(guildId)
+            if matrix != None:
+                for dayId in sorted(dayDeltas):
+                    matrix.add(dayId, dayDeltas[dayId])
+            elif guildId in self.__flushedDays:
+                self.__flushedDays[guildId].update(dayDeltas)
+
+    def __buildActivityMatrix(self, guild):
+        """
+        Build the guild's activity matrix from every day document and store it
+
+        Nothing is held while the days are read, so flushes carry on. A read that
+        overlapped a flush may or may not include its minutes, so the days it
+        wrote are read again once it's over (until a pass overlaps no flush)
+        and the matrix is stored while no flush is running (see __keepIfCurrent)
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to build the matrix for
+        """
+
+        with self.__getGuildLock(self.__activityBuildLocks, guild.id):
+            with self.__activityLock:
+                if guild.id in self.__activityMatrices:
+                    return
+
+                self.__flushedDays[guild.id] = set()
+
+            try:
+                version = self.__readVersion(guild.id, 'date')
+                matrix = ActivityMatrix({d['date']: d.get('users', {}) for d in self.__backend.queryDocuments(self.__daysCollection(guild.id), 'date')})
+
+                def keep():
+                    with self.__activityLock:
+                        self.__activityMatrices[guild.id] = matrix
+
+                while not self.__keepIfCurrent(guild.id, 'date', version, keep):
+                    version = self.__waitForWrites(guild.id, 'date')
+
+                    with self.__activityLock:
+                        dayIds = self.__flushedDays[guild.id]
+                        self.__flushedDays[guild.id] = set()
+
+                    for dayId in sorted(dayIds):
+                        d = self.__backend.getDocument(self.__daysCollection(guild.id) + (dayId,))
+                        matrix.setDay(dayId, d.get('users', {}) if d != None else {})
+            finally:
+                with self.__activityLock:
+                    self.__flushedDays.pop(guild.id, None)
+
+    def __dropActivityMatrix(self, guildId):
+        """
+        Drop the guild's activity matrix so it is rebuilt on the next fetch
+        """
+
+        with self.__activityLock:
+            self.__activityMatrices.pop(guildId, None)
+
+    def __addDeltas(self, d, deltas):
+        """
+        Add each user's delta to a cached { userId(str): int } dict in place
+
+        Parameters
+        ----------
+        d : dict { userId(str): int }
+            The cached values
+        deltas : dict { userId(str): int }
+            The amounts to add
+        """
+
+        for userId, amount in deltas.items():
+            d[userId] = d.get(userId, 0) + amount
+
+    def __sumDayDeltas(self, dayDeltas):
+        """
+        Sum each user's minutes across days
+
+        Parameters
+        ----------
+        dayDeltas : dict { dayId: { userId(str): int } }
+
+        Returns
+        ----------
+        dict { userId(str): int }
+        """
+
+        totalDeltas = {}
+        for userMinutes in dayDeltas.values():
+            self.__addDeltas(totalDeltas, userMinutes)
+
+        return totalDeltas
+
+    def __timeDeltaWrites(self, guildId, dayDeltas, pointDeltas):
+        """
+        Build the increment writes for a guild's accumulated minute/point deltas
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server that the users belong to
+        dayDeltas : dict { dayId: { userId(str): int } }
+            Minutes to add for each user on each day
+        pointDeltas : dict { userId(str): int }
+            Discord points to add for each user
+
+        Returns
+        ----------
+        list((path, dict))
+            The documents and data to merge into them
+        """
+
+        writes = []
+
+        if dayDeltas:
+            totalDeltas = self.__sumDayDeltas(dayDeltas)
+
+            writes.append(((str(guildId), 'total'), self.__toIncrements({'users': totalDeltas})))
+            for dayId, userMinutes in dayDeltas.items():
+                writes.append((self.__daysCollection(guildId) + (dayId,), {
+                    'date': dayId,
+                    'users': self.__toIncrements(userMinutes),
+                }))
+
+        if pointDeltas:
+            writes.append(((str(guildId), 'discordPoints'), self.__toIncrements(pointDeltas)))
+            writes.append(self.__ledgerWrite(guildId, 'voice', ','.join(sorted(dayDeltas)), pointDeltas))
+
+        return writes
+
+    def __commitGuildWrites(self, guildWrites):
+        """
+        Commit every guild's writes in as few batches as possible
+
+        A guild's writes are only split across batches if there are more than
+        the backend's MAX_BATCH_WRITES of them, so a failed batch only affects the guilds in it
+
+        Parameters
+        ----------
+        guildWrites : dict { guildId: list((path, dict)) }
+            The documents and data to merge into them for each guild
+
+        Returns
+        ----------
+        list(guildId)
+            The guilds that had writes in a batch that failed
+        """
 
-        d = self.fetchDiscordPoints(guild)
+        maxWrites = self.__backend.MAX_BATCH_WRITES
+        failedGuildIds = []
+        batchGuildIds = []
+        batch = []
 
-        if d == None:
-            d = {}
+        for guildId, writes in guildWrites.items():
+            for i in range(0, len(writes), maxWrites):
+                chunk = writes[i:i + maxWrites]
+
+                if len(batch) + len(chunk) > maxWrites:
+                    failedGuildIds += self.__commitBatch(batch, batchGuildIds)
+                    batch = []
+                    batchGuildIds = []
+
+                batch += chunk
+                if not guildId in batchGuildIds:
+                    batchGuildIds.append(guildId)
+
+        if batch:
+            failedGuildIds += self.__commitBatch(batch, batchGuildIds)
+
+        return list(OrderedDict.fromkeys(failedGuildIds))
+
+    def __commitBatch(self, batch, guildIds):
+        """
+        Commit a batch of writes
+
+        Parameters
+        ----------
+        batch : list((path, dict))
+            The writes to commit
+        guildIds : list(guildId)
+            The guilds that have writes in the batch
+
+        Returns
+        ----------
+        list(guildId)
+            guildIds if the commit failed, otherwise an empty list
+        """
+
+        try:
+            self.__backend.commit(batch)
+            return []
+        except Exception as e:
+            print(e)
+            print("Error committing batch for guilds", guildIds)
+            return guildIds
+
+    def __daysCollection(self, guildId):
+        """
+        Get the collection that holds one document per day for the guild
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        tuple(str)
+            The path of the collection
+        """
+
+        return (str(guildId), 'date', 'days')
+
+    def __userStatsCollection(self, guildId):
+        """
+        Get the collection that holds one stats document per user for the guild
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        tuple(str)
+            The path of the collection
+        """
+
+        return (str(guildId), 'stats', 'users')
+
+    def __betPath(self, guildId, betId):
+        """
+        Get the path of a bet's document
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        betId : str
+            The id of the bet
+
+        Returns
+        ----------
+        tuple(str)
+            The path of the document
+        """
+
+        return (str(guildId), 'betIndex', 'bets', str(betId))
+
+    def __betSummary(self, bet):
+        """
+        Get the fields of a bet that are kept in the *betIndex* while it's active
+        """
+
+        return {
+            'betId': bet['betId'],
+            'betTitle': bet['betTitle'],
+            'startedBy': bet['startedBy'],
+            'closed': bet['closed'],
+        }
+
+    def __fetchBet(self, guildId, betId):
+        """
+        Fetch a bet's document, from the cache if possible
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        betId : str
+            The id of the bet
+
+        Returns
+        ----------
+        dict
+            The bet, or None if it doesn't exist
+        """
+
+        key = (guildId, 'bet', betId)
+        hit, bet = self.__cache.get(key)
+        if hit:
+            return bet
+
+        version = self.__readVersion(guildId, 'betIndex')
+        bet = self.__backend.getDocument(self.__betPath(guildId, betId))
+
+        if bet != None:
+            self.__keepIfCurrent(guildId, 'betIndex', version, lambda: self.__cache.set(key, bet))
+        return bet
+
+    def __runBetTransaction(self, guildId, betId, update, pointsUserId=None, pointsReason='bet'):
+        """
+        Run update as a transaction on the bet (and *discordPoints*) and update the cache
+
+        The backend retries the transaction (calling update again with fresh
+        copies) if the documents are changed by someone else before it commits
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        betId : str
+            The id of the bet
+        update : callable(bet(dict), points(dict)) -> (betData, indexData, pointDeltas, result)
+            Called with the bet (None if it doesn't exist) and pointsUserId's discord points
+            ({ userId(str): int }, {} if pointsUserId is None). Changes bet in place and returns the
+            fields of the bet and the *betIndex* that changed (None to write nothing), the discord
+            points to add to each user ({ userId(str): int }, written as increments) and the result
+        pointsUserId : str
+            The user whose discord points are read in the transaction (only their field of
+            *discordPoints* is fetched), or None to not read any points
+        pointsReason : str
+            The reason the points ledger entry for pointDeltas is recorded with
+
+        Returns
+        ----------
+        result
+            What update returned
+        """
+
+        betPath = self.__betPath(guildId, betId)
+        indexPath = (str(guildId), 'betIndex')
+        pointsPath = (str(guildId), 'discordPoints')
+
+        def transaction(docs):
+            bet = docs[betPath]
+            betData, indexData, pointDeltas, result = update(bet, (docs.get(pointsPath) or {}) if pointsUserId != None else {})
+
+            if betData == None:
+                return [], (None, None, None, result)
+
+            writes = [(betPath, betData)]
+            if indexData:
+                writes.append((indexPath, indexData))
+            if pointDeltas:
+                writes.append((pointsPath, self.__toIncrements(pointDeltas)))
+                writes.append(self.__ledgerWrite(guildId, pointsReason, betId, pointDeltas))
+
+            return writes, (bet, indexData, pointDeltas, result)
+
+        if pointsUserId != None:
+            paths, fields = [betPath, pointsPath], {pointsPath: [pointsUserId]}
+        else:
+            paths, fields = [betPath], None
+
+        # Payouts write points without reading them, so the points are always marked as being written
+        self.__startWrite(guildId, ['betIndex', 'discordPoints'])
+
+        try:
+            bet, indexData, pointDeltas, result = self.__backend.runTransaction(paths, transaction, self.MAX_TRANSACTION_ATTEMPTS, fields)
+
+            if bet != None:
+                self.__cacheBetChanges(guildId, betId, bet, indexData, pointDeltas)
+        except:
+            self.__invalidateBets(guildId)
+            raise
+        finally:
+            self.__finishWrite(guildId, ['betIndex', 'discordPoints'])
+
+        return result
+
+    def __ledgerCollection(self, guildId):
+        """
+        Get the collection that holds the guild's points ledger entries
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        tuple(str)
+            The path of the collection
+        """
+
+        return (str(guildId), 'pointsLedger', 'entries')
+
+    def __ledgerTimestamp(self):
+        """
+        Get the current UTC time in LEDGER_TIME_FORMAT
+        """
+
+        return datetime.utcnow().strftime(self.LEDGER_TIME_FORMAT)
+
+    def __ledgerWrite(self, guildId, reason, reference, pointDeltas):
+        """
+        Build the write that appends an entry to the guild's points ledger
+
+        Entry ids start with the time they were written at, so ordering by
+        entryId orders the ledger and a random suffix keeps them unique
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        reason : str
+            Why the points changed ('voice', 'bet', 'payout', 'redeem', ...)
+        reference : str
+            What the points were changed for (days, bet id, reward), or None
+        pointDeltas : dict { userId(str): int }
+            The points added to each user
+
+        Returns
+        ----------
+        (path, dict)
+        """
+
+        at = self.__ledgerTimestamp()
+        entryId = at + '-' + uuid.uuid4().hex[:8]
+
+        return (self.__ledgerCollection(guildId) + (entryId,), {
+            'entryId': entryId,
+            'at': at,
+            'reason': reason,
+            'reference': reference,
+            'deltas': dict(pointDeltas),
+        })
+
+    def __addUserPoints(self, guildId, userId, amount, minimum, reason, reference):
+        """
+        Add amount to one user's discord points (with its ledger entry) in a transaction that only reads their points
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        userId : str
+            The id of the user
+        amount : int
+            The amount of points to add (negative to take points)
+        minimum : int
+            Nothing is written if the user would be left with fewer points than this, or None
+        reason : str
+            Why the points changed, recorded in the points ledger
+        reference : str
+            What the points were changed for, recorded in the points ledger
+
+        Returns
+        ----------
+        points : int
+            The user's amount of points afterwards
+        errorString : str
+            The string representing the error if one occurred
+        """
+
+        pointsPath = (str(guildId), 'discordPoints')
+
+        def transaction(docs):
+            points = int((docs[pointsPath] or {}).get(userId, 0))
+
+            if minimum != None and points + amount < minimum:
+                return [], (points, {}, "Not enough discord points")
+
+            pointDeltas = {userId: amount}
+
+            return [(pointsPath, self.__toIncrements(pointDeltas)),
+                    self.__ledgerWrite(guildId, reason, reference, pointDeltas)], (points + amount, pointDeltas, None)
+
+        self.__startWrite(guildId, ['discordPoints'])
+
+        try:
+            points, pointDeltas, errorString = self.__backend.runTransaction([pointsPath], transaction, self.MAX_TRANSACTION_ATTEMPTS,
+                                                                             fields={pointsPath: [userId]})
+            self.__cacheDeltas(guildId, 'discordPoints', pointDeltas)
+        except TransactionError as e:
+            print(e)
+            print("Points update kept conflicting with other writes")
+
+            return None, "Too many people are using points right now, try again"
+        except Exception as e:
+            self.__cache.invalidate(guildId, 'discordPoints')
+            self.__dropLeaderboards(guildId)
+            print(e)
+            print("Error updating discord points for user", userId)
+
+            return None, "Error sending information to the database"
+        finally:
+            self.__finishWrite(guildId, ['discordPoints'])
+
+        return points, errorString
+
+    def __cacheDeltas(self, guildId, documentName, deltas):
+        """
+        Add committed deltas to the cached *total* or *discordPoints* and to its leaderboard
+
+        Mirrored documents (and their leaderboards) are left to their listener:
+        it gets the committed data itself, so adding the deltas here as well
+        would count them twice
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            'total' or 'discordPoints'
+        deltas : dict { userId(str): int }
+            The amounts that were added to each user
+        """
+
+        if not deltas:
+            return
+
+        if documentName == 'total':
+            self.__cache.update((guildId, documentName), lambda d: self.__addDeltas(d.setdefault('users', {}), deltas))
+        else:
+            self.__cache.update((guildId, documentName), lambda d: self.__addDeltas(d, deltas))
+
+        if not self.__isListening(guildId, documentName):
+            self.__updateLeaderboard(guildId, documentName, lambda leaderboard: self.__addToLeaderboard(leaderboard, deltas))
+
+    def __cacheBetChanges(self, guildId, betId, bet, indexData, pointDeltas):
+        """
+        Bring the cache and leaderboard in line with a bet transaction that was committed
+
+        Mirrored documents (and their leaderboards) are left to their listener
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        betId : str
+            The id of the bet
+        bet : dict
+            The whole bet after the transaction
+        indexData : dict
+            The fields of the *betIndex* that were written ({} if none were)
+        pointDeltas : dict { userId(str): int }
+            The discord points that were added to each user
+        """
+
+        self.__cache.set((guildId, 'bet', betId), bet)
+
+        if indexData:
+            self.__cache.update((guildId, 'betIndex'), lambda d: mergeDocument(d, indexData))
+
+        self.__cacheDeltas(guildId, 'discordPoints', pointDeltas)
+
+    def __invalidateBets(self, guildId):
+        """
+        Drop the guild's cached bets and points after a bet transaction that may or may not have been committed
+        """
+
+        self.__cache.invalidate(guildId, 'bet')
+        self.__cache.invalidate(guildId, 'betIndex')
+        self.__cache.invalidate(guildId, 'discordPoints')
+        self.__dropLeaderboards(guildId)
+        self.__bumpVersion(guildId, 'betIndex')
+        self.__bumpVersion(guildId, 'discordPoints')
+
+    def __isStatsIndexed(self, guildId):
+        """
+        Whether the guild's user stats have been built (only call while holding the guild's stats lock)
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        bool
+        """
+
+        if not guildId in self.__statsIndexed:
+            self.__statsIndexed[guildId] = self.__backend.getDocument((str(guildId), 'stats')) != None
+
+        return self.__statsIndexed[guildId]
+
+    def __buildUserStats(self, guild):
+        """
+        Build every user's stats from the guild's day documents and *total* (only call while holding the guild's stats lock)
+
+        The stats are only marked as built if no flush wrote minutes while they
+        were being read (they may or may not include them), otherwise they're
+        built again the next time they're fetched
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to build the stats for
+        """
+
+        stats = {}
+        version = self.__readVersion(guild.id, 'stats')
+
+        for d in self.__backend.queryDocuments(self.__daysCollection(guild.id), 'date'):
+            for userId, minutes in d.get('users', {}).items():
+                stats.setdefault(userId, UserStats()).addMinutes(d['date'], minutes, addToTotal=False)
+
+        for userId, total in self.__fetchDocument(guild.id, 'total').get('users', {}).items():
+            stats.setdefault(userId, UserStats()).total = total
+
+        writes = [(self.__userStatsCollection(guild.id) + (userId,), userStats.toDict()) for userId, userStats in stats.items()]
+
+        self.__cache.invalidate(guild.id, 'stats')
+        if self.__commitGuildWrites({guild.id: writes}):
+            raise Exception("Error writing user stats for guild " + str(guild.id))
+
+        def markBuilt():
+            self.__statsIndexed[guild.id] = True
+
+        # Only mark the stats as built once every user's document has been written
+        if self.__keepIfCurrent(guild.id, 'stats', version, markBuilt):
+            self.__backend.setDocument((str(guild.id), 'stats'), {'builtAt': datetime.utcnow().isoformat()})
+
+    def __updateAllUserStats(self, guildDayDeltas):
+        """
+        Add newly written minutes to each guild's user stats, holding only that guild's stats lock
+
+        Guilds whose lock is taken (their stats are being built or fetched) are
+        done last, so they don't hold up the others
+
+        Parameters
+        ----------
+        guildDayDeltas : dict { guildId: { dayId: { userId(str): int } } }
+            The minutes that were written for each user on each day
+        """
+
+        busyGuildIds = []
+
+        for guildId, dayDeltas in guildDayDeltas.items():
+            lock = self.__getGuildLock(self.__statsLocks, guildId)
+
+            if not lock.acquire(blocking=False):
+                busyGuildIds.append(guildId)
+                continue
+
+            try:
+                self.__updateUserStats(guildId, dayDeltas)
+            finally:
+                lock.release()
+
+        for guildId in busyGuildIds:
+            with self.__getGuildLock(self.__statsLocks, guildId):
+                self.__updateUserStats(guildId, guildDayDeltas[guildId])
+
+    def __updateUserStats(self, guildId, dayDeltas):
+        """
+        Add newly written minutes to the stats of each user (only call while holding the guild's stats lock)
+
+        Skipped if the guild's stats haven't been built, they are built from
+        the day documents (which already include these minutes) when first fetched
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        dayDeltas : dict { dayId: { userId(str): int } }
+            The minutes that were written for each user on each day
+        """
+
+        try:
+            if not self.__isStatsIndexed(guildId):
+                return
+
+            stats = self.__fetchUserStatsObjects(guildId, set(userId for userMinutes in dayDeltas.values() for userId in userMinutes))
+        except Exception as e:
+            print(e)
+            print("Error reading user stats for guild", guildId)
+            self.__invalidateUserStats(guildId)
+            return
+
+        for dayId in sorted(dayDeltas):
+            for userId, minutes in dayDeltas[dayId].items():
+                stats[userId].addMinutes(dayId, minutes)
+
+        if self.__commitGuildWrites({guildId: [(self.__userStatsCollection(guildId) + (userId,), userStats.toDict()) for userId, userStats in stats.items()]}):
+            self.__invalidateUserStats(guildId)
+            return
+
+        for userId, userStats in stats.items():
+            self.__cache.set((guildId, 'stats', userId), userStats.toDict())
+
+    def __fetchUserStatsObjects(self, guildId, userIds):
+        """
+        Get the current stats of the users, from the cache if possible and otherwise in one batched read
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        userIds : set(str)
+            The ids of the users
+
+        Returns
+        ----------
+        dict { userId(str): UserStats }
+        """
+
+        stats = {}
+        missing = {}
+
+        for userId in userIds:
+            hit, d = self.__cache.get((guildId, 'stats', userId))
+            if hit:
+                stats[userId] = UserStats(d)
+            else:
+                missing[self.__userStatsCollection(guildId) + (userId,)] = userId
+
+        if missing:
+            for path, d in self.__backend.getDocuments(list(missing.keys())).items():
+                stats[missing[path]] = UserStats(d)
+
+        for userId in userIds:
+            stats.setdefault(userId, UserStats())
+
+        return stats
+
+    def __invalidateUserStats(self, guildId):
+        """
+        Mark the guild's user stats as stale so they are rebuilt when next fetched (only call while holding the guild's stats lock)
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        """
+
+        self.__statsIndexed[guildId] = False
+        self.__cache.invalidate(guildId, 'stats')
+
+        try:
+            self.__backend.deleteDocument((str(guildId), 'stats'))
+        except Exception as e:
+            print(e)
+            print("Error marking user stats stale for guild", guildId)
+
+    def __toIncrements(self, deltas):
+        """
+        Convert a (nested) dict of amounts into a dict of Increment writes
+
+        Parameters
+        ----------
+        deltas : dict { field: int or dict }
+
+        Returns
+        ----------
+        dict { field: Increment or dict }
+        """
 
-        for member in members:
-            if str(member.id) in d:
-                d[str(member.id)] += 1
+        increments = {}
+        for key, val in deltas.items():
+            if isinstance(val, dict):
+                increments[key] = self.__toIncrements(val)
             else:
-                d[str(member.id)] = 1
+                increments[key] = Increment(val)
 
-        doc_ref.set(d)
+        return increments
@@ -0,0 +1,160 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+class FireCache:
+    """
+    Thread-safe read-through cache of documents with TTL and LRU eviction
+
+    Keys are tuples that start with (guildId, documentName). Values are copied
+    on the way in and out, so callers are free to mutate what they get back
+
+    Attributes
+    __________
+    maxEntries (int): Maximum number of entries before the least recently used is evicted
+    ttl (float): Number of seconds an entry is valid for
+    __entries (OrderedDict): { key: (expiresAt, value) } in least to most recently used order
+    __keysByDocument (dict): { (guildId, documentName): set(key) } so a document's entries can be dropped without scanning every entry
+    __lock (threading.Lock): Guards __entries (Fire is called from a thread pool)
+
+    Functions
+    __________
+    get(key) -> (bool, value)
+        Whether the key was cached (and not expired) and its value
+    set(key, value)
+        Caches value for key
+    update(key, func) -> bool
+        Applies func to the cached value in place if the key is cached
+    invalidate(guildId, documentName)
+        Removes every entry for the guild's document
+    clear()
+        Removes every entry
+    """
+
+    maxEntries = 1024
+    ttl = 300
+
+    def __init__(self, maxEntries=1024, ttl=300, clock=time.monotonic):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.__entries = OrderedDict()
+        self.__keysByDocument = {}
+        self.__lock = threading.Lock()
+        self.__clock = clock
+
+    def get(self, key):
+        """
+        Whether the key was cached (and not expired) and its value
+
+        Parameters
+        ----------
+        key : tuple
+            (guildId, documentName, ...)
+
+        Returns
+        ----------
+        bool
+            True if the key was cached
+        value
+            A copy of the cached value, or None
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry == None:
+                return False, None
+
+            expiresAt, value = entry
+            if expiresAt < self.__clock():
+                self.__remove(key)
+                return False, None
+
+            self.__entries.move_to_end(key)
+            return True, copy.deepcopy(value)
+
+    def set(self, key, value):
+        """
+        Caches value for key
+
+        Parameters
+        ----------
+        key : tuple
+            (guildId, documentName, ...)
+        value
+            The value to cache (a copy is stored)
+        """
+
+        with self.__lock:
+            self.__entries[key] = (self.__clock() + self.ttl, copy.deepcopy(value))
+            self.__entries.move_to_end(key)
+            self.__keysByDocument.setdefault(key[:2], set()).add(key)
+
+            while len(self.__entries) > self.maxEntries:
+                self.__remove(next(iter(self.__entries)))
+
+    def update(self, key, func):
+        """
+        Applies func to the cached value in place if the key is cached
+
+        The entry keeps its original expiry time
+
+        Parameters
+        ----------
+        key : tuple
+            (guildId, documentName, ...)
+        func : callable(value)
+            Mutates the cached value
+
+        Returns
+        ----------
+        bool
+            True if the key was cached
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry == None or entry[0] < self.__clock():
+                return False
+
+            func(entry[1])
+            return True
+
+    def invalidate(self, guildId, documentName):
+        """
+        Removes every entry for the guild's document
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document
+        """
+
+        with self.__lock:
+            for key in list(self.__keysByDocument.get((guildId, documentName), ())):
+                self.__remove(key)
+
+    def clear(self):
+        """
+        Removes every entry
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__keysByDocument.clear()
+
+    def __remove(self, key):
+        """
+        Private helper to remove an entry and its place in __keysByDocument (only call while holding __lock)
+        """
+
+        del self.__entries[key]
+
+        keys = self.__keysByDocument[key[:2]]
+        keys.discard(key)
+        if not keys:
+            del self.__keysByDocument[key[:2]]
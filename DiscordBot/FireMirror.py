@@ -0,0 +1,89 @@
+import copy
+import threading
+
+class FireMirror:
+    """
+    In-process mirror of guild documents kept up to date by change listeners
+
+    Entries are only served while the listener that feeds them is connected;
+    once it disconnects the entry is dropped and reads fall back to the database.
+    The listener is the only writer, so a write made by this process shows up
+    once its snapshot arrives
+
+    Attributes
+    __________
+    __docs (dict): { (guildId, documentName): dict } the latest data from each listener
+    __lock (threading.Lock): Guards __docs (listeners call back on their own threads)
+
+    Functions
+    __________
+    apply(guildId, documentName, d)
+        Stores the latest data for the document (called by its listener)
+    get(guildId, documentName) -> (bool, dict)
+        Whether the document is mirrored and a copy of its data
+    remove(guildId, documentName)
+        Stops serving the document from the mirror
+    """
+
+    def __init__(self):
+        self.__docs = {}
+        self.__lock = threading.Lock()
+
+    def apply(self, guildId, documentName, d):
+        """
+        Stores the latest data for the document (called by its listener)
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+        d : dict
+            The document's data, {} if it doesn't exist
+        """
+
+        with self.__lock:
+            self.__docs[(guildId, documentName)] = d
+
+    def get(self, guildId, documentName):
+        """
+        Whether the document is mirrored and a copy of its data
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+
+        Returns
+        ----------
+        bool
+            True if the document is mirrored
+        dict
+            A copy of the document's data, or None
+        """
+
+        with self.__lock:
+            d = self.__docs.get((guildId, documentName))
+
+            if d == None:
+                return False, None
+
+            return True, copy.deepcopy(d)
+
+    def remove(self, guildId, documentName):
+        """
+        Stops serving the document from the mirror
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        documentName : str
+            The name of the document in the guild's collection
+        """
+
+        with self.__lock:
+            self.__docs.pop((guildId, documentName), None)
@@ -0,0 +1,170 @@
+from sortedcontainers import SortedList
+
+class Leaderboard:
+    """
+    Users ranked by score, kept sorted as scores change
+
+    Updates and rank lookups are O(log n) and a page is O(log n + pageSize),
+    instead of sorting every user each time a page is shown
+
+    Attributes
+    __________
+    __scores (dict): { userId(str): int }
+    __ranked (SortedList): [(-score, userId)] highest score first, ties by user id
+
+    Functions
+    __________
+    set(userId, score)
+        Sets the user's score
+    add(userId, amount)
+        Adds amount to the user's score (starting from 0)
+    remove(userId)
+        Removes the user
+    sync(scores)
+        Updates the scores that differ from scores and removes users not in it
+    getScore(userId) -> int
+        The user's score, or None
+    getRank(userId) -> int
+        The user's 1-based rank, or None
+    getPage(page, pageSize) -> list((userId, score)), page(int), pages(int)
+        The users on a page (1-based, invalid pages show page 1)
+    """
+
+    def __init__(self, scores=None):
+        self.__scores = dict(scores) if scores != None else {}
+        self.__ranked = SortedList((-score, userId) for userId, score in self.__scores.items())
+
+    def __len__(self):
+        return len(self.__scores)
+
+    def set(self, userId, score):
+        """
+        Sets the user's score
+
+        Parameters
+        ----------
+        userId : str
+            The id of the user
+        score : int
+            The user's new score
+        """
+
+        self.remove(userId)
+        self.__scores[userId] = score
+        self.__ranked.add((-score, userId))
+
+    def add(self, userId, amount):
+        """
+        Adds amount to the user's score (starting from 0)
+
+        Parameters
+        ----------
+        userId : str
+            The id of the user
+        amount : int
+            The amount to add
+        """
+
+        self.set(userId, self.__scores.get(userId, 0) + amount)
+
+    def remove(self, userId):
+        """
+        Removes the user
+
+        Parameters
+        ----------
+        userId : str
+            The id of the user
+        """
+
+        score = self.__scores.pop(userId, None)
+        if score != None:
+            self.__ranked.remove((-score, userId))
+
+    def sync(self, scores):
+        """
+        Updates the scores that differ from scores and removes users not in it
+
+        O(n) to compare plus O(log n) per changed user, instead of re-sorting
+
+        Parameters
+        ----------
+        scores : dict { userId(str): int }
+            Every user's current score
+        """
+
+        for userId in [userId for userId in self.__scores if not userId in scores]:
+            self.remove(userId)
+
+        for userId, score in scores.items():
+            if self.__scores.get(userId) != score:
+                self.set(userId, score)
+
+    def getScore(self, userId):
+        """
+        The user's score
+
+        Parameters
+        ----------
+        userId : str
+            The id of the user
+
+        Returns
+        ----------
+        int
+            None if the user isn't ranked
+        """
+
+        return self.__scores.get(userId)
+
+    def getRank(self, userId):
+        """
+        The user's 1-based rank
+
+        Parameters
+        ----------
+        userId : str
+            The id of the user
+
+        Returns
+        ----------
+        int
+            None if the user isn't ranked
+        """
+
+        score = self.__scores.get(userId)
+        if score == None:
+            return None
+
+        return self.__ranked.index((-score, userId)) + 1
+
+    def getPage(self, page, pageSize=20):
+        """
+        The users on a page, highest score first
+
+        Parameters
+        ----------
+        page : int
+            The 1-based page to get, page 1 is used if it's out of range
+        pageSize : int
+            Number of users per page
+
+        Returns
+        ----------
+        list((userId, score))
+            The users on the page
+        page : int
+            The page that was used
+        pages : int
+            The total number of pages
+        """
+
+        pages = max(1, (len(self.__ranked) + pageSize - 1) // pageSize)
+
+        if page > pages or page < 1:
+            page = 1
+
+        start = (page - 1) * pageSize
+        rows = [(userId, -negScore) for negScore, userId in self.__ranked.islice(start, start + pageSize)]
+
+        return rows, page, pages
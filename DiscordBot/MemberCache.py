@@ -0,0 +1,188 @@
+from types import MappingProxyType
+
+class MemberCache:
+    """
+    Cache of member display names per guild, filled from the gateway member cache
+
+    Kept current by the member join/update/remove events so that looking up
+    names never has to page through the members over REST
+
+    Attributes
+    __________
+    __names (dict): { guildId: { discord.member.id: discord.member.display_name } }
+    __versions (dict): { guildId: int } bumped whenever a name in the guild changes
+
+    Functions
+    __________
+    isLoaded(guildId) -> bool
+        Whether the guild's members have been loaded
+    loadGuild(guild)
+        Loads every member of the guild from guild.members
+    setMembers(guildId, memberDict)
+        Replaces the guild's members (e.g. with the result of a REST fetch)
+    getMembers(guildId) -> MappingProxyType: { discord.member.id: discord.member.display_name }
+        Read-only view of the guild's member names
+    getName(guildId, memberId, default) -> str
+        One member's name
+    getVersion(guildId) -> int
+        A number that changes whenever the guild's member names change
+    setMember(member)
+        Adds or updates a member (on_member_join/on_member_update)
+    removeMember(member)
+        Removes a member (on_member_remove)
+    removeGuild(guildId)
+        Drops the guild's members
+    """
+
+    def __init__(self):
+        self.__names = {}
+        self.__versions = {}
+
+    def isLoaded(self, guildId):
+        """
+        Whether the guild's members have been loaded
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        bool
+        """
+
+        return guildId in self.__names
+
+    def loadGuild(self, guild):
+        """
+        Loads every member of the guild from guild.members
+
+        Only complete if the guild has been chunked (guild.chunked)
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to load the members of
+        """
+
+        self.setMembers(guild.id, {member.id: member.display_name for member in guild.members})
+
+    def setMembers(self, guildId, memberDict):
+        """
+        Replaces the guild's members
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        memberDict : dict { discord.member.id: discord.member.display_name }
+            Every member of the guild
+        """
+
+        self.__names[guildId] = dict(memberDict)
+        self.__bumpVersion(guildId)
+
+    def getMembers(self, guildId):
+        """
+        Read-only view of the guild's member names
+
+        Not a copy, so it's cheap to get on every render and reflects later
+        member events; copy it if it has to stay the same
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        MappingProxyType: { discord.member.id: discord.member.display_name }
+        """
+
+        return MappingProxyType(self.__names.get(guildId, {}))
+
+    def getName(self, guildId, memberId, default=None):
+        """
+        One member's name, without copying the guild's members
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        memberId : int
+            The id of the member
+        default : str
+            Returned if the member isn't cached
+
+        Returns
+        ----------
+        str
+        """
+
+        return self.__names.get(guildId, {}).get(memberId, default)
+
+    def getVersion(self, guildId):
+        """
+        A number that changes whenever the guild's member names change
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        int
+        """
+
+        return self.__versions.get(guildId, 0)
+
+    def setMember(self, member):
+        """
+        Adds or updates a member if their guild is loaded
+
+        Parameters
+        ----------
+        member : discord.Member
+            The member that joined or was updated
+        """
+
+        names = self.__names.get(member.guild.id)
+
+        if names != None and names.get(member.id) != member.display_name:
+            names[member.id] = member.display_name
+            self.__bumpVersion(member.guild.id)
+
+    def removeMember(self, member):
+        """
+        Removes a member
+
+        Parameters
+        ----------
+        member : discord.Member
+            The member that left
+        """
+
+        if self.__names.get(member.guild.id, {}).pop(member.id, None) != None:
+            self.__bumpVersion(member.guild.id)
+
+    def removeGuild(self, guildId):
+        """
+        Drops the guild's members
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        """
+
+        self.__names.pop(guildId, None)
+        self.__bumpVersion(guildId)
+
+    def __bumpVersion(self, guildId):
+        """
+        Private helper to record that the guild's member names changed
+        """
+
+        self.__versions[guildId] = self.__versions.get(guildId, 0) + 1
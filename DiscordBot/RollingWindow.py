@@ -0,0 +1,117 @@
+from dateutils import shiftDayId
+
+class RollingWindow:
+    """
+    Per-user time totals over the last numDays days, kept up to date incrementally
+
+    New minutes are added to the totals as they happen and a day's minutes are
+    subtracted when it leaves the window, so reading the totals never sums history
+
+    Attributes
+    __________
+    numDays (int): Number of days (including the current day) in the window
+    __days (dict): { dayId: { userId(str): int } } minutes for each day in the window
+    __totals (dict): { userId(str): int } minutes summed across __days
+    __endDayId (str): The most recent day in the window
+
+    Functions
+    __________
+    add(dayId, userMinutes)
+        Adds minutes for a day (ignored if the day is before the window)
+    rollTo(dayId)
+        Moves the window so it ends on dayId, dropping days that leave it
+    getTotals() -> dict: { userId(str): int }
+        The summed minutes for each user in the window
+    getRange() -> startDayId(str), endDayId(str)
+        The first and last day of the window
+    """
+
+    numDays = 7
+
+    def __init__(self, endDayId, dayTimes=None, numDays=7):
+        """
+        Parameters
+        ----------
+        endDayId : str
+            The most recent day in the window ('%Y-%m-%d')
+        dayTimes : dict { dayId: { userId(str): int } }
+            Existing minutes to start with (days outside the window are ignored)
+        numDays : int
+            Number of days in the window
+        """
+
+        self.numDays = numDays
+        self.__days = {}
+        self.__totals = {}
+        self.__endDayId = endDayId
+
+        for dayId, userMinutes in (dayTimes or {}).items():
+            self.add(dayId, userMinutes)
+
+    def add(self, dayId, userMinutes):
+        """
+        Adds minutes for a day (ignored if the day is before the window)
+
+        Parameters
+        ----------
+        dayId : str
+            The day the minutes were tracked on ('%Y-%m-%d')
+        userMinutes : dict { userId(str): int }
+            Minutes to add for each user
+        """
+
+        if dayId > self.__endDayId:
+            self.rollTo(dayId)
+
+        if dayId < self.getRange()[0]:
+            return
+
+        day = self.__days.setdefault(dayId, {})
+        for userId, minutes in userMinutes.items():
+            day[userId] = day.get(userId, 0) + minutes
+            self.__totals[userId] = self.__totals.get(userId, 0) + minutes
+
+    def rollTo(self, dayId):
+        """
+        Moves the window so it ends on dayId, dropping days that leave it
+
+        Parameters
+        ----------
+        dayId : str
+            The new most recent day ('%Y-%m-%d'), ignored if it's before the current one
+        """
+
+        if dayId <= self.__endDayId:
+            return
+
+        self.__endDayId = dayId
+        startDayId = self.getRange()[0]
+
+        for oldDayId in [d for d in self.__days if d < startDayId]:
+            for userId, minutes in self.__days.pop(oldDayId).items():
+                self.__totals[userId] -= minutes
+                if self.__totals[userId] <= 0:
+                    del self.__totals[userId]
+
+    def getTotals(self):
+        """
+        The summed minutes for each user in the window
+
+        Returns
+        ----------
+        dict: { userId(str): int }
+        """
+
+        return dict(self.__totals)
+
+    def getRange(self):
+        """
+        The first and last day of the window
+
+        Returns
+        ----------
+        startDayId : str
+        endDayId : str
+        """
+
+        return shiftDayId(self.__endDayId, -(self.numDays - 1)), self.__endDayId
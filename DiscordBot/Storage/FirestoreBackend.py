@@ -0,0 +1,148 @@
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.api_core.exceptions import Aborted
+from google.cloud.firestore_v1.field_path import FieldPath
+from firebase_config import getFirebaseConfig
+from .StorageBackend import StorageBackend, Increment, DELETE_FIELD, DELETE_DOCUMENT, TransactionError
+
+class FirestoreBackend(StorageBackend):
+    """
+    StorageBackend for Google Firestore
+
+    The Firebase app is initialized from the FIREBASE_* environment variables
+    (see firebase_config) the first time a backend is created
+
+    Attributes
+    __________
+    __db (private firebase.client obj): database for POST and GET requests
+
+    See StorageBackend for the documentation of each function
+    """
+
+    MAX_BATCH_WRITES = 500
+
+    def __init__(self):
+        # Checks to see if Firebase was already initialized in the applicaiton
+        if not firebase_admin._apps:
+            cred = credentials.Certificate(getFirebaseConfig())
+            firebase_admin.initialize_app(cred)
+        self.__db = firestore.client()
+
+    def getDocument(self, path):
+        return self.__db.document(*path).get().to_dict()
+
+    def getDocuments(self, paths):
+        byPath = {'/'.join(path): path for path in paths}
+        docs = {path: None for path in paths}
+
+        for snapshot in self.__db.get_all([self.__db.document(*path) for path in paths]):
+            docs[byPath[snapshot.reference.path]] = snapshot.to_dict()
+
+        return docs
+
+    def setDocument(self, path, d):
+        self.__db.document(*path).set(self.__toFirestore(d))
+
+    def deleteDocument(self, path):
+        self.__db.document(*path).delete()
+
+    def addDocument(self, collectionPath, d):
+        self.__db.collection(*collectionPath).add(self.__toFirestore(d))
+
+    def queryDocuments(self, collectionPath, field, start=None, end=None, descending=False):
+        query = self.__db.collection(*collectionPath)
+
+        if start != None:
+            query = query.where(field, '>=', start)
+        if end != None:
+            query = query.where(field, '<=', end)
+
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+
+        return [doc.to_dict() for doc in query.order_by(field, direction=direction).stream()]
+
+    def commit(self, writes):
+        batch = self.__db.batch()
+
+        for path, data in writes:
+            if data is DELETE_DOCUMENT:
+                batch.delete(self.__db.document(*path))
+            else:
+                batch.set(self.__db.document(*path), self.__toFirestore(data), merge=True)
+
+        batch.commit()
+
+    def runTransaction(self, paths, func, maxAttempts=5, fields=None):
+        fields = fields or {}
+
+        @firestore.transactional
+        def run(transaction):
+            docs = {}
+            for path in paths:
+                # A field mask only sends the listed fields back (ids are quoted since they start with digits)
+                fieldPaths = [FieldPath(name).to_api_repr() for name in fields[path]] if path in fields else None
+                docs[path] = self.__db.document(*path).get(field_paths=fieldPaths, transaction=transaction).to_dict()
+
+            writes, result = func(docs)
+
+            for path, data in writes:
+                if data is DELETE_DOCUMENT:
+                    transaction.delete(self.__db.document(*path))
+                else:
+                    transaction.set(self.__db.document(*path), self.__toFirestore(data), merge=True)
+
+            return result
+
+        # Firestore retries the transaction itself when the documents it read change, and gives up
+        # with a ValueError (or the last Aborted error) once it's out of attempts
+        try:
+            return run(self.__db.transaction(max_attempts=maxAttempts))
+        except Aborted as e:
+            raise TransactionError("Documents kept changing after {0} attempts: {1}".format(maxAttempts, e))
+        except ValueError as e:
+            if not 'attempts' in str(e):
+                raise
+
+            raise TransactionError("Documents kept changing after {0} attempts: {1}".format(maxAttempts, e))
+
+    def watch(self, path, callback):
+        def onSnapshot(docSnapshots, changes, readTime):
+            d = {}
+            if docSnapshots and docSnapshots[0].exists:
+                d = docSnapshots[0].to_dict()
+
+            callback(d)
+
+        return self.__db.document(*path).on_snapshot(onSnapshot)
+
+    def isWatching(self, handle):
+        return not getattr(handle, '_closed', False)
+
+    def unwatch(self, handle):
+        handle.unsubscribe()
+
+    def __toFirestore(self, d):
+        """
+        Private helper to convert Increment/DELETE_FIELD values into their firestore equivalents
+
+        Parameters
+        ----------
+        d : dict
+
+        Returns
+        ----------
+        dict
+        """
+
+        converted = {}
+        for key, val in d.items():
+            if isinstance(val, dict):
+                converted[key] = self.__toFirestore(val)
+            elif isinstance(val, Increment):
+                converted[key] = firestore.Increment(val.amount)
+            elif val is DELETE_FIELD:
+                converted[key] = firestore.DELETE_FIELD
+            else:
+                converted[key] = val
+
+        return converted
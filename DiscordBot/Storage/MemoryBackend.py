@@ -0,0 +1,191 @@
+import copy
+import random
+import threading
+import time
+import uuid
+from .StorageBackend import StorageBackend, TransactionError, DELETE_DOCUMENT, mergeDocument
+
+class MemoryBackend(StorageBackend):
+    """
+    StorageBackend that keeps every document in memory
+
+    For running and load testing the bot offline. Each call can be delayed
+    to simulate the round trip to a remote database
+
+    Attributes
+    __________
+    latency (float): Number of seconds every call is delayed by
+    jitter (float): Up to this many extra seconds are added to each delay at random
+    __docs (dict): { path: dict } every document
+    __versions (dict): { path: int } bumped on every write to the document, so runTransaction can see conflicts
+    __watches (dict): { handle: (path, callback) } the active watches
+    __lock (threading.RLock): Guards __docs and __watches (Fire is called from a thread pool)
+
+    See StorageBackend for the documentation of each function
+    """
+
+    latency = 0
+    jitter = 0
+
+    def __init__(self, latency=0, jitter=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.__docs = {}
+        self.__versions = {}
+        self.__watches = {}
+        self.__lock = threading.RLock()
+
+    def getDocument(self, path):
+        self.__delay()
+
+        with self.__lock:
+            return copy.deepcopy(self.__docs.get(tuple(path)))
+
+    def getDocuments(self, paths):
+        self.__delay()
+
+        with self.__lock:
+            return {path: copy.deepcopy(self.__docs.get(tuple(path))) for path in paths}
+
+    def setDocument(self, path, d):
+        self.__delay()
+
+        with self.__lock:
+            self.__docs[tuple(path)] = mergeDocument({}, d)
+            self.__bumpVersions([tuple(path)])
+            self.__notify([tuple(path)])
+
+    def deleteDocument(self, path):
+        self.__delay()
+
+        with self.__lock:
+            self.__docs.pop(tuple(path), None)
+            self.__bumpVersions([tuple(path)])
+            self.__notify([tuple(path)])
+
+    def addDocument(self, collectionPath, d):
+        self.setDocument(tuple(collectionPath) + (uuid.uuid4().hex,), d)
+
+    def queryDocuments(self, collectionPath, field, start=None, end=None, descending=False):
+        self.__delay()
+
+        collectionPath = tuple(collectionPath)
+
+        with self.__lock:
+            docs = [copy.deepcopy(d) for path, d in self.__docs.items()
+                    if path[:-1] == collectionPath and field in d
+                    and (start == None or d[field] >= start)
+                    and (end == None or d[field] <= end)]
+
+        return sorted(docs, key=lambda d: d[field], reverse=descending)
+
+    def commit(self, writes):
+        self.__delay()
+
+        with self.__lock:
+            self.__apply(writes)
+
+    def runTransaction(self, paths, func, maxAttempts=5, fields=None):
+        paths = [tuple(path) for path in paths]
+        fields = {tuple(path): names for path, names in (fields or {}).items()}
+
+        for attempt in range(maxAttempts):
+            self.__delay()
+
+            with self.__lock:
+                docs = {path: self.__select(path, fields.get(path)) for path in paths}
+                versions = [self.__versions.get(path, 0) for path in paths]
+
+            writes, result = func(docs)
+
+            self.__delay()
+
+            with self.__lock:
+                if versions == [self.__versions.get(path, 0) for path in paths]:
+                    self.__apply(writes)
+                    return result
+
+            # Back off for a random, growing time so conflicting transactions spread out (like Firestore does)
+            time.sleep(random.uniform(0, (self.latency + self.jitter + 0.001) * 2 ** attempt))
+
+        raise TransactionError("Documents kept changing after {0} attempts".format(maxAttempts))
+
+    def watch(self, path, callback):
+        handle = object()
+
+        with self.__lock:
+            self.__watches[handle] = (tuple(path), callback)
+            callback(copy.deepcopy(self.__docs.get(tuple(path), {})))
+
+        return handle
+
+    def isWatching(self, handle):
+        with self.__lock:
+            return handle in self.__watches
+
+    def unwatch(self, handle):
+        with self.__lock:
+            self.__watches.pop(handle, None)
+
+    def __apply(self, writes):
+        """
+        Private helper to merge writes atomically (only call while holding __lock)
+        """
+
+        if len(writes) > self.MAX_BATCH_WRITES:
+            raise Exception("A batch can't have more than {0} writes".format(self.MAX_BATCH_WRITES))
+
+        # Applied to copies first so a bad write leaves every document untouched (None marks a deletion)
+        merged = {}
+        for path, data in writes:
+            path = tuple(path)
+            if data is DELETE_DOCUMENT:
+                merged[path] = None
+            else:
+                existing = merged[path] if path in merged else copy.deepcopy(self.__docs.get(path))
+                merged[path] = mergeDocument(existing or {}, data)
+
+        for path, d in merged.items():
+            if d == None:
+                self.__docs.pop(path, None)
+            else:
+                self.__docs[path] = d
+        self.__bumpVersions(list(merged.keys()))
+        self.__notify(list(merged.keys()))
+
+    def __select(self, path, names):
+        """
+        Private helper to copy a document, or only the fields in names if they're given (only call while holding __lock)
+        """
+
+        d = self.__docs.get(path)
+
+        if d == None or names == None:
+            return copy.deepcopy(d)
+
+        return {name: copy.deepcopy(d[name]) for name in names if name in d}
+
+    def __bumpVersions(self, paths):
+        """
+        Private helper to record that documents were written (only call while holding __lock)
+        """
+
+        for path in paths:
+            self.__versions[path] = self.__versions.get(path, 0) + 1
+
+    def __notify(self, paths):
+        """
+        Private helper to call the watches of the documents that changed (only call while holding __lock)
+        """
+
+        for path, callback in list(self.__watches.values()):
+            if path in paths:
+                callback(copy.deepcopy(self.__docs.get(path, {})))
+
+    def __delay(self):
+        """
+        Private helper to simulate the round trip to a remote database
+        """
+
+        if self.latency > 0 or self.jitter > 0:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
@@ -0,0 +1,428 @@
+import json
+import sqlite3
+import threading
+import uuid
+from .StorageBackend import StorageBackend, Increment, DELETE_FIELD, DELETE_DOCUMENT, mergeDocument
+
+class SqliteBackend(StorageBackend):
+    """
+    StorageBackend that keeps everything in a local SQLite database, for self-hosted deployments
+
+    Fire's documents are stored as rows of their own tables rather than as
+    blobs, so a day range (-todaylog/-weeklog) is an index range scan and an
+    increment only touches the rows of the users it changes:
+        {guild}/date/days/{day}         -> days (guild_id, day, user_id, minutes)
+        {guild}/total                   -> totals (guild_id, user_id, minutes)
+        {guild}/discordPoints           -> points (guild_id, user_id, points)
+        {guild}/rewards                 -> rewards (guild_id, title, cost)
+        {guild}/betIndex/bets/{bet}     -> bets (guild_id, bet_key, data)
+        {guild}/stats/users/{user}      -> user_stats (guild_id, user_id, data)
+        {guild}/pointsLedger/entries/{entry} -> ledger (guild_id, entry_id, data)
+        anything else                   -> documents (path, data)
+
+    Increments are upserts (INSERT ... ON CONFLICT DO UPDATE) and every commit()
+    is one transaction, so a flush of thousands of guilds is a handful of
+    transactions on a WAL journal
+
+    Attributes
+    __________
+    __conn (sqlite3.Connection): Connection to the database file
+    __lock (threading.Lock): Guards __conn (Fire is called from a thread pool)
+
+    See StorageBackend for the documentation of each function
+    """
+
+    # Every commit is a local transaction, so batches can be much larger than Firestore's
+    MAX_BATCH_WRITES = 5000
+
+    # { table: (key column, value column, field of the document holding the values) }
+    # Documents in these tables are { key: int } maps (nested under field if it isn't None)
+    VALUE_TABLES = {
+        'days': ('user_id', 'minutes', 'users'),
+        'totals': ('user_id', 'minutes', 'users'),
+        'points': ('user_id', 'points', None),
+        'rewards': ('title', 'cost', None),
+    }
+
+    def __init__(self, path):
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.executescript('''
+            CREATE TABLE IF NOT EXISTS days (
+                guild_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                minutes INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, day, user_id)
+            );
+            CREATE INDEX IF NOT EXISTS days_by_user ON days (guild_id, user_id, day);
+
+            CREATE TABLE IF NOT EXISTS totals (
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                minutes INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS points (
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS rewards (
+                guild_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                cost INTEGER NOT NULL,
+                PRIMARY KEY (guild_id, title)
+            );
+
+            CREATE TABLE IF NOT EXISTS bets (
+                guild_id TEXT NOT NULL,
+                bet_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (guild_id, bet_key)
+            );
+
+            CREATE TABLE IF NOT EXISTS user_stats (
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (guild_id, user_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS ledger (
+                guild_id TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (guild_id, entry_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS documents (
+                path TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+        ''')
+        self.__conn.commit()
+
+    def getDocument(self, path):
+        with self.__lock:
+            return self.__read(tuple(path))
+
+    def getDocuments(self, paths):
+        with self.__lock:
+            return {path: self.__read(tuple(path)) for path in paths}
+
+    def setDocument(self, path, d):
+        with self.__lock, self.__conn:
+            self.__delete(tuple(path))
+            self.__merge(tuple(path), d)
+
+    def deleteDocument(self, path):
+        with self.__lock, self.__conn:
+            self.__delete(tuple(path))
+
+    def addDocument(self, collectionPath, d):
+        self.setDocument(tuple(collectionPath) + (uuid.uuid4().hex,), d)
+
+    def queryDocuments(self, collectionPath, field, start=None, end=None, descending=False):
+        collectionPath = tuple(collectionPath)
+
+        with self.__lock:
+            if len(collectionPath) == 3 and collectionPath[1:] == ('date', 'days') and field == 'date':
+                return self.__queryDays(collectionPath[0], start, end, descending)
+            if len(collectionPath) == 3 and collectionPath[1:] == ('pointsLedger', 'entries') and field == 'entryId':
+                return self.__queryLedger(collectionPath[0], start, end, descending)
+
+            prefix = '/'.join(collectionPath) + '/'
+            rows = self.__conn.execute('SELECT path, data FROM documents WHERE path > ? AND path < ?', (prefix, prefix + '\uffff'))
+
+            docs = [json.loads(data) for docPath, data in rows if not '/' in docPath[len(prefix):]]
+
+        docs = [d for d in docs if field in d and (start == None or d[field] >= start) and (end == None or d[field] <= end)]
+
+        return sorted(docs, key=lambda d: d[field], reverse=descending)
+
+    def commit(self, writes):
+        with self.__lock, self.__conn:
+            for path, data in writes:
+                self.__write(tuple(path), data)
+
+    def runTransaction(self, paths, func, maxAttempts=5, fields=None):
+        fields = fields or {}
+
+        # BEGIN IMMEDIATE takes the database's write lock before reading, so
+        # nothing can change the documents in between and it never has to retry
+        with self.__lock, self.__conn:
+            self.__conn.execute('BEGIN IMMEDIATE')
+
+            writes, result = func({path: self.__read(tuple(path), fields.get(path)) for path in paths})
+
+            for path, data in writes:
+                self.__write(tuple(path), data)
+
+        return result
+
+    def close(self):
+        with self.__lock:
+            self.__conn.close()
+
+    def __locate(self, path):
+        """
+        Private helper to find where a document is stored
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+
+        Returns
+        ----------
+        table : str
+            The table the document is stored in
+        scope : tuple
+            The values of the columns that identify the document's rows
+        """
+
+        if len(path) == 2 and path[1] == 'total':
+            return 'totals', (path[0],)
+        if len(path) == 2 and path[1] == 'discordPoints':
+            return 'points', (path[0],)
+        if len(path) == 2 and path[1] == 'rewards':
+            return 'rewards', (path[0],)
+        if len(path) == 4 and path[1:3] == ('date', 'days'):
+            return 'days', (path[0], path[3])
+        if len(path) == 4 and path[1:3] == ('stats', 'users'):
+            return 'user_stats', (path[0], path[3])
+        if len(path) == 4 and path[1:3] == ('betIndex', 'bets'):
+            return 'bets', (path[0], path[3])
+        if len(path) == 4 and path[1:3] == ('pointsLedger', 'entries'):
+            return 'ledger', (path[0], path[3])
+
+        return 'documents', ('/'.join(path),)
+
+    def __where(self, table):
+        """
+        Private helper for the WHERE clause that selects a document's rows in the table
+        """
+
+        if table == 'days':
+            return 'guild_id = ? AND day = ?'
+        if table == 'user_stats':
+            return 'guild_id = ? AND user_id = ?'
+        if table == 'bets':
+            return 'guild_id = ? AND bet_key = ?'
+        if table == 'ledger':
+            return 'guild_id = ? AND entry_id = ?'
+        if table == 'documents':
+            return 'path = ?'
+
+        return 'guild_id = ?'
+
+    def __read(self, path, names=None):
+        """
+        Private helper to read a document (only call while holding __lock)
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+        names : list(str)
+            Only read these top-level fields, or None to read the whole document
+
+        Returns
+        ----------
+        dict
+            None if the document doesn't exist
+        """
+
+        table, scope = self.__locate(path)
+
+        if table in self.VALUE_TABLES and names != None and self.VALUE_TABLES[table][2] == None:
+            return self.__readValues(table, scope, names)
+
+        if table in self.VALUE_TABLES:
+            keyColumn, valueColumn, field = self.VALUE_TABLES[table]
+            rows = self.__conn.execute('SELECT ' + keyColumn + ', ' + valueColumn + ' FROM ' + table + ' WHERE ' + self.__where(table), scope).fetchall()
+
+            if not rows:
+                return None
+
+            values = dict(rows)
+            d = {field: values} if field != None else values
+            if table == 'days':
+                d['date'] = scope[1]
+
+            return self.__select(d, names)
+
+        row = self.__conn.execute('SELECT data FROM ' + table + ' WHERE ' + self.__where(table), scope).fetchone()
+
+        if row == None:
+            return None
+
+        return self.__select(json.loads(row[0]), names)
+
+    def __select(self, d, names):
+        """
+        Private helper to keep only the fields in names of a document (all of them if names is None)
+        """
+
+        if names == None:
+            return d
+
+        return {name: d[name] for name in names if name in d}
+
+    def __readValues(self, table, scope, names):
+        """
+        Private helper to read some keys of a { key: int } document stored in a VALUE_TABLES table
+
+        Only the rows of those keys are read (on the primary key), plus one row
+        to tell an empty result apart from a missing document
+        """
+
+        keyColumn, valueColumn, field = self.VALUE_TABLES[table]
+        where = self.__where(table)
+
+        rows = self.__conn.execute('SELECT ' + keyColumn + ', ' + valueColumn + ' FROM ' + table + ' WHERE ' + where +
+                                   ' AND ' + keyColumn + ' IN (' + ', '.join('?' * len(names)) + ')', scope + tuple(names)).fetchall()
+
+        if not rows and self.__conn.execute('SELECT 1 FROM ' + table + ' WHERE ' + where + ' LIMIT 1', scope).fetchone() == None:
+            return None
+
+        return dict(rows)
+
+    def __delete(self, path):
+        """
+        Private helper to delete a document (only call while holding __lock, in a transaction)
+        """
+
+        table, scope = self.__locate(path)
+
+        self.__conn.execute('DELETE FROM ' + table + ' WHERE ' + self.__where(table), scope)
+
+    def __write(self, path, data):
+        """
+        Private helper to apply one write of a commit (only call while holding __lock, in a transaction)
+        """
+
+        if data is DELETE_DOCUMENT:
+            self.__delete(path)
+        else:
+            self.__merge(path, data)
+
+    def __merge(self, path, data):
+        """
+        Private helper to merge write data into a document (only call while holding __lock, in a transaction)
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+        data : dict
+            The data to merge in (see StorageBackend)
+        """
+
+        table, scope = self.__locate(path)
+
+        if table in self.VALUE_TABLES:
+            self.__mergeValues(table, scope, data)
+        else:
+            d = mergeDocument(self.__read(path) or {}, data)
+            columns = {
+                'user_stats': 'guild_id, user_id, data',
+                'bets': 'guild_id, bet_key, data',
+                'ledger': 'guild_id, entry_id, data',
+            }.get(table, 'path, data')
+            self.__conn.execute('INSERT OR REPLACE INTO ' + table + ' (' + columns + ') VALUES (' + ', '.join('?' * (len(scope) + 1)) + ')', scope + (json.dumps(d),))
+
+    def __mergeValues(self, table, scope, data):
+        """
+        Private helper to merge { key: int } values into a document stored in a VALUE_TABLES table
+
+        Increments are batched into a single upsert statement
+        """
+
+        keyColumn, valueColumn, field = self.VALUE_TABLES[table]
+        values = data.get(field, {}) if field != None else data
+
+        columns = ('guild_id, day, ' if table == 'days' else 'guild_id, ') + keyColumn + ', ' + valueColumn
+        conflict = ('guild_id, day, ' if table == 'days' else 'guild_id, ') + keyColumn
+        placeholders = ', '.join('?' * (len(scope) + 2))
+
+        increments = []
+        replacements = []
+        deletions = []
+
+        for key, val in values.items():
+            if isinstance(val, Increment):
+                increments.append(scope + (key, val.amount))
+            elif val is DELETE_FIELD:
+                deletions.append(scope + (key,))
+            else:
+                replacements.append(scope + (key, val))
+
+        if increments:
+            self.__conn.executemany('INSERT INTO ' + table + ' (' + columns + ') VALUES (' + placeholders + ') '
+                                    'ON CONFLICT (' + conflict + ') DO UPDATE SET ' + valueColumn + ' = ' + valueColumn + ' + excluded.' + valueColumn, increments)
+        if replacements:
+            self.__conn.executemany('INSERT OR REPLACE INTO ' + table + ' (' + columns + ') VALUES (' + placeholders + ')', replacements)
+        if deletions:
+            self.__conn.executemany('DELETE FROM ' + table + ' WHERE ' + self.__where(table) + ' AND ' + keyColumn + ' = ?', deletions)
+
+    def __queryDays(self, guildId, start, end, descending):
+        """
+        Private helper to read a range of day documents with one indexed query
+
+        Returns
+        ----------
+        list(dict)
+            { 'date': day, 'users': { userId: minutes } } ordered by day
+        """
+
+        query = 'SELECT day, user_id, minutes FROM days WHERE guild_id = ?'
+        params = [guildId]
+
+        if start != None:
+            query += ' AND day >= ?'
+            params.append(start)
+        if end != None:
+            query += ' AND day <= ?'
+            params.append(end)
+
+        query += ' ORDER BY day ' + ('DESC' if descending else 'ASC')
+
+        docs = []
+        for day, userId, minutes in self.__conn.execute(query, params):
+            if not docs or docs[-1]['date'] != day:
+                docs.append({'date': day, 'users': {}})
+            docs[-1]['users'][userId] = minutes
+
+        return docs
+
+    def __queryLedger(self, guildId, start, end, descending):
+        """
+        Private helper to read a range of points ledger entries with one query on the primary key
+
+        Returns
+        ----------
+        list(dict)
+            The entries ordered by entryId
+        """
+
+        query = 'SELECT data FROM ledger WHERE guild_id = ?'
+        params = [guildId]
+
+        if start != None:
+            query += ' AND entry_id >= ?'
+            params.append(start)
+        if end != None:
+            query += ' AND entry_id <= ?'
+            params.append(end)
+
+        query += ' ORDER BY entry_id ' + ('DESC' if descending else 'ASC')
+
+        return [json.loads(data) for (data,) in self.__conn.execute(query, params)]
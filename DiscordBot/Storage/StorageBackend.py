@@ -0,0 +1,313 @@
+import copy
+
+class Increment:
+    """
+    Write value that adds amount to a field (starting from 0) instead of replacing it
+
+    Attributes
+    __________
+    amount (int): The amount to add
+    """
+
+    def __init__(self, amount):
+        self.amount = amount
+
+    def __repr__(self):
+        return "Increment({0})".format(self.amount)
+
+# Write value that removes a field from a document
+DELETE_FIELD = object()
+
+# Write data (instead of a dict) that deletes the whole document in commit()/runTransaction()
+DELETE_DOCUMENT = object()
+
+class TransactionError(Exception):
+    """
+    Raised by runTransaction when it keeps conflicting with other writes
+    """
+
+    pass
+
+def mergeDocument(d, data):
+    """
+    Merge write data into a document's data in place
+
+    Nested dicts are merged, Increment values are added (starting from 0),
+    DELETE_FIELD values remove the field and anything else replaces the field
+
+    Parameters
+    ----------
+    d : dict
+        The existing document data
+    data : dict
+        The data to merge in
+
+    Returns
+    ----------
+    dict
+        d
+    """
+
+    for key, val in data.items():
+        if isinstance(val, dict):
+            existing = d.get(key)
+            d[key] = mergeDocument(existing if isinstance(existing, dict) else {}, val)
+        elif isinstance(val, Increment):
+            existing = d.get(key)
+            d[key] = (existing if isinstance(existing, (int, float)) else 0) + val.amount
+        elif val is DELETE_FIELD:
+            d.pop(key, None)
+        else:
+            d[key] = copy.deepcopy(val)
+
+    return d
+
+class StorageBackend:
+    """
+    Interface for the document store that Fire reads from and writes to
+
+    Documents are dicts addressed by a path tuple that alternates between
+    collection and document names, e.g. ('1234', 'total') or
+    ('1234', 'date', 'days', '2021-01-31'). Writes passed to commit() are
+    merged into the existing document: nested dicts are merged, Increment
+    values are added and DELETE_FIELD values remove the field
+
+    Attributes
+    __________
+    MAX_BATCH_WRITES (int): Maximum number of writes in one commit()
+
+    Functions
+    __________
+    getDocument(path) -> dict
+        The document's data, or None if it doesn't exist
+    getDocuments(paths) -> dict: { path: dict }
+        Several documents' data in one round trip (None for missing documents)
+    setDocument(path, d)
+        Replaces the document's data
+    deleteDocument(path)
+        Deletes the document
+    addDocument(collectionPath, d)
+        Adds a document with a generated id to the collection
+    queryDocuments(collectionPath, field, start, end, descending) -> list(dict)
+        The documents of a collection with field in [start, end], ordered by field
+    commit(writes)
+        Merges every (path, data) write atomically
+    runTransaction(paths, func, maxAttempts, fields) -> result
+        Reads documents (or some of their fields) and merges the writes func makes from them, retrying if they changed
+    watch(path, callback) -> handle
+        Calls callback(d) with the document's data whenever it changes
+    isWatching(handle) -> bool
+        Whether the watch is still connected
+    unwatch(handle)
+        Stops the watch
+    close()
+        Releases any connections
+    """
+
+    MAX_BATCH_WRITES = 500
+
+    def getDocument(self, path):
+        """
+        The document's data
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+
+        Returns
+        ----------
+        dict
+            None if the document doesn't exist
+        """
+
+        raise NotImplementedError
+
+    def getDocuments(self, paths):
+        """
+        Several documents' data in one round trip
+
+        Parameters
+        ----------
+        paths : list(tuple(str))
+            The paths of the documents
+
+        Returns
+        ----------
+        dict: { path: dict }
+            None for the documents that don't exist
+        """
+
+        return {path: self.getDocument(path) for path in paths}
+
+    def setDocument(self, path, d):
+        """
+        Replaces the document's data
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+        d : dict
+            The new data
+        """
+
+        raise NotImplementedError
+
+    def deleteDocument(self, path):
+        """
+        Deletes the document (does nothing if it doesn't exist)
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+        """
+
+        raise NotImplementedError
+
+    def addDocument(self, collectionPath, d):
+        """
+        Adds a document with a generated id to the collection
+
+        Parameters
+        ----------
+        collectionPath : tuple(str)
+            The path of the collection
+        d : dict
+            The document's data
+        """
+
+        raise NotImplementedError
+
+    def queryDocuments(self, collectionPath, field, start=None, end=None, descending=False):
+        """
+        The documents of a collection with field in [start, end], ordered by field
+
+        Parameters
+        ----------
+        collectionPath : tuple(str)
+            The path of the collection
+        field : str
+            The field to filter and order by
+        start : str
+            The smallest value to include, or None for no lower bound
+        end : str
+            The largest value to include, or None for no upper bound
+        descending : bool
+            Whether to order from largest to smallest
+
+        Returns
+        ----------
+        list(dict)
+        """
+
+        raise NotImplementedError
+
+    def commit(self, writes):
+        """
+        Merges every write atomically, either all of them are applied or none are
+
+        Parameters
+        ----------
+        writes : list((path, dict))
+            The documents and the data to merge into them, or DELETE_DOCUMENT to delete them
+            (at most MAX_BATCH_WRITES)
+
+        Raises
+        ----------
+        Exception
+            If the writes couldn't be applied
+        """
+
+        raise NotImplementedError
+
+    def runTransaction(self, paths, func, maxAttempts=5, fields=None):
+        """
+        Reads documents and merges the writes func makes from them, only if none of them changed in between
+
+        Optimistic concurrency: if another write changed one of the documents
+        before the writes are applied, nothing is written and func is called
+        again with the new data. func must not have side effects since it can
+        be called more than once
+
+        Parameters
+        ----------
+        paths : list(tuple(str))
+            The paths of the documents to read
+        func : callable(dict { path: dict }) -> (writes, result)
+            Called with the documents' data (None for the documents that don't exist),
+            returns the list((path, dict)) writes to merge (see commit) and the result
+        maxAttempts : int
+            Number of times func is tried before giving up
+        fields : dict { path: list(str) }
+            Only these top-level fields are read for the documents listed, so one member's
+            entry can be updated without downloading the whole map (the other documents are
+            read in full). A field that isn't in the document is left out of its data
+
+        Returns
+        ----------
+        result
+            What func returned with the writes that were applied
+
+        Raises
+        ----------
+        TransactionError
+            If the documents kept changing for maxAttempts attempts
+        """
+
+        raise NotImplementedError
+
+    def watch(self, path, callback):
+        """
+        Calls callback(d) with the document's data now and whenever it changes
+
+        Parameters
+        ----------
+        path : tuple(str)
+            The path of the document
+        callback : callable(dict)
+            Called with the document's data ({} if it doesn't exist), possibly on another thread
+
+        Returns
+        ----------
+        handle
+            Passed to isWatching/unwatch, or None if the backend can't watch documents
+        """
+
+        return None
+
+    def isWatching(self, handle):
+        """
+        Whether the watch is still connected
+
+        Parameters
+        ----------
+        handle
+            Returned by watch()
+
+        Returns
+        ----------
+        bool
+        """
+
+        return False
+
+    def unwatch(self, handle):
+        """
+        Stops the watch
+
+        Parameters
+        ----------
+        handle
+            Returned by watch()
+        """
+
+        pass
+
+    def close(self):
+        """
+        Releases any connections
+        """
+
+        pass
@@ -0,0 +1,34 @@
+import os
+
+def createStorageBackend(name=None):
+    """
+    Create the StorageBackend selected by the KIRBEC_STORAGE environment variable
+
+    Backends are imported when they are selected, so the memory and sqlite
+    backends work without firebase_admin installed or FIREBASE_* set
+
+    Parameters
+    ----------
+    name : str
+        'firestore', 'memory' or 'sqlite', or None to use KIRBEC_STORAGE (default: 'firestore')
+
+    Returns
+    ----------
+    StorageBackend
+    """
+
+    if name == None:
+        name = os.getenv('KIRBEC_STORAGE', 'firestore')
+
+    if name == 'firestore':
+        from .FirestoreBackend import FirestoreBackend
+        return FirestoreBackend()
+    elif name == 'memory':
+        from .MemoryBackend import MemoryBackend
+        # Latency is configured in milliseconds
+        return MemoryBackend(float(os.getenv('MEMORY_STORAGE_LATENCY', 0)) / 1000, float(os.getenv('MEMORY_STORAGE_JITTER', 0)) / 1000)
+    elif name == 'sqlite':
+        from .SqliteBackend import SqliteBackend
+        return SqliteBackend(os.getenv('SQLITE_STORAGE_PATH', 'kirbec.sqlite3'))
+
+    raise ValueError("Unknown storage backend '" + name + "', expected 'firestore', 'memory' or 'sqlite'")
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+class TickScheduler:
+    """
+    Runs a per-guild job on ticks aligned to wall-clock boundaries
+
+    Ticks start on multiples of interval (e.g. the start of every minute), so
+    they don't drift by however long the previous tick took. Guilds are
+    processed concurrently, at most maxConcurrency at a time, and an error
+    in one guild doesn't stop the others
+
+    Attributes
+    __________
+    interval (int): Number of seconds between ticks
+    maxConcurrency (int): Maximum number of guilds processed at the same time
+    lastTickDuration (float): How long the last tick took in seconds
+    overruns (int): Number of ticks that took longer than interval
+
+    Functions
+    __________
+    async run(getGuilds, tickGuild, afterTick, isClosed)
+        Runs ticks until isClosed() returns True
+    """
+
+    interval = 60
+    maxConcurrency = 16
+    lastTickDuration = 0
+    overruns = 0
+
+    def __init__(self, interval=60, maxConcurrency=16, clock=time.time):
+        self.interval = interval
+        self.maxConcurrency = maxConcurrency
+        self.__clock = clock
+
+    async def run(self, getGuilds, tickGuild, afterTick=None, isClosed=lambda: False):
+        """
+        Runs ticks until isClosed() returns True
+
+        Parameters
+        ----------
+        getGuilds : callable -> list(discord.Guild)
+            Returns the guilds to process on each tick
+        tickGuild : async callable(discord.Guild)
+            The job to run for each guild
+        afterTick : async callable()
+            Job to run once all the guilds are processed, or None
+        isClosed : callable -> bool
+            Returns True when the scheduler should stop
+        """
+
+        semaphore = asyncio.Semaphore(self.maxConcurrency)
+        nextTick = self.__nextBoundary(self.__clock())
+
+        while not isClosed():
+            await asyncio.sleep(max(0, nextTick - self.__clock()))
+
+            start = self.__clock()
+            await asyncio.gather(*[self.__tickGuild(semaphore, tickGuild, guild) for guild in getGuilds()])
+
+            if afterTick != None:
+                try:
+                    await afterTick()
+                except Exception as e:
+                    print("ERROR: ", str(e))
+
+            self.lastTickDuration = self.__clock() - start
+            if self.lastTickDuration > self.interval:
+                self.overruns += 1
+                print("WARNING: tick took {0:.1f}s, longer than the {1}s interval ({2} overruns)".format(self.lastTickDuration, self.interval, self.overruns))
+
+            # Skips any boundaries that were missed by an overrun
+            nextTick = self.__nextBoundary(self.__clock())
+
+    async def __tickGuild(self, semaphore, tickGuild, guild):
+        """
+        Private helper to run the job for one guild under the concurrency limit
+        """
+
+        async with semaphore:
+            try:
+                await tickGuild(guild)
+            except Exception as e:
+                print("ERROR: ", guild.id, str(e))
+
+    def __nextBoundary(self, now):
+        """
+        Private helper to get the next multiple of interval after now
+        """
+
+        return (now // self.interval + 1) * self.interval
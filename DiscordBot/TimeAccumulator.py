@@ -0,0 +1,234 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dateutils import getCurrentDayId
+
+class TimeAccumulator:
+    """
+    Collects per-guild/per-user minute deltas in memory and writes them to
+    the database in batches instead of on every tick
+
+    Attributes
+    __________
+    flushInterval (int): Number of seconds between flushes to the database
+    __dayDeltas (dict): { guildId: { dayId: { userId(str): int } } }
+    __pointDeltas (dict): { guildId: { userId(str): int } }
+    __lastFlush (float): time.monotonic() of the last flush
+    __journal (TimeJournal obj): Optional journal that deltas are recorded to
+        until they are written, so they survive a crash
+    __unjournaled (list): [(guildId, dayId, userMinutes, userPoints)] deltas added since the
+        journal was last written
+    __journalExecutor (ThreadPoolExecutor): The single thread every journal call is run on, so
+        the event loop never waits on the disk and the calls run in the order they're made
+
+    Functions
+    __________
+    addMinutes(guildId, userMinutes, awardPoints)
+        Adds minutes for each user in the guild to the pending deltas
+    isFlushDue() -> bool
+        Whether flushInterval has passed since the last flush
+    drain() -> dict: { guildId: (dayDeltas, pointDeltas) }
+        Removes and returns all of the pending deltas
+    restore(drained)
+        Merges drained deltas back in (used when a write fails)
+    async writeJournal()
+        Records the deltas added since the last call in the journal
+    async replayJournal()
+        Loads the deltas that were never acknowledged from the journal
+    async flush(fire)
+        Writes all pending deltas to the database
+    async close()
+        Closes the journal and stops its thread
+    """
+
+    flushInterval = 300
+
+    def __init__(self, flushInterval=300, journal=None):
+        self.flushInterval = flushInterval
+        self.__dayDeltas = {}
+        self.__pointDeltas = {}
+        self.__lastFlush = time.monotonic()
+        self.__journal = journal
+        self.__unjournaled = []
+        self.__journalExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal') if journal != None else None
+
+    def addMinutes(self, guildId, userMinutes, awardPoints):
+        """
+        Adds minutes for each user in the guild to the pending deltas
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server that the users belong to
+        userMinutes : dict { userId(str): int }
+            Minutes to add for each user
+        awardPoints : bool
+            Whether the users should also earn a discord point per minute
+        """
+
+        if not userMinutes:
+            return
+
+        dayId = getCurrentDayId()
+
+        # Journaled by writeJournal, once per tick for every guild
+        if self.__journal != None:
+            self.__unjournaled.append((guildId, dayId, dict(userMinutes), dict(userMinutes) if awardPoints else {}))
+
+        dayDict = self.__dayDeltas.setdefault(guildId, {}).setdefault(dayId, {})
+        pointDict = self.__pointDeltas.setdefault(guildId, {})
+
+        for userId, minutes in userMinutes.items():
+            dayDict[userId] = dayDict.get(userId, 0) + minutes
+            if awardPoints:
+                pointDict[userId] = pointDict.get(userId, 0) + minutes
+
+    def isFlushDue(self):
+        """
+        Whether flushInterval has passed since the last flush
+
+        Returns
+        ----------
+        bool
+        """
+
+        return time.monotonic() - self.__lastFlush >= self.flushInterval
+
+    def drain(self):
+        """
+        Removes and returns all of the pending deltas
+
+        Returns
+        ----------
+        dict: { guildId: (dayDeltas, pointDeltas) }
+            dayDeltas   : { dayId: { userId(str): int } }
+            pointDeltas : { userId(str): int }
+        """
+
+        drained = {}
+        for guildId in set(self.__dayDeltas) | set(self.__pointDeltas):
+            drained[guildId] = (self.__dayDeltas.get(guildId, {}), self.__pointDeltas.get(guildId, {}))
+
+        self.__dayDeltas = {}
+        self.__pointDeltas = {}
+        self.__lastFlush = time.monotonic()
+
+        return drained
+
+    def restore(self, drained):
+        """
+        Merges drained deltas back into the pending deltas
+
+        Parameters
+        ----------
+        drained : dict { guildId: (dayDeltas, pointDeltas) }
+            The deltas returned from drain()
+        """
+
+        for guildId, (dayDeltas, pointDeltas) in drained.items():
+            for dayId, userMinutes in dayDeltas.items():
+                dayDict = self.__dayDeltas.setdefault(guildId, {}).setdefault(dayId, {})
+                for userId, minutes in userMinutes.items():
+                    dayDict[userId] = dayDict.get(userId, 0) + minutes
+
+            pointDict = self.__pointDeltas.setdefault(guildId, {})
+            for userId, points in pointDeltas.items():
+                pointDict[userId] = pointDict.get(userId, 0) + points
+
+    async def writeJournal(self):
+        """
+        Records the deltas added since the last call in the journal, in one transaction on the journal's thread
+
+        Called once per tick, after every guild's minutes are added
+        """
+
+        if self.__journal == None or not self.__unjournaled:
+            return
+
+        entries = self.__unjournaled
+        self.__unjournaled = []
+
+        try:
+            await self.__runJournal(self.__journal.record, entries)
+        except:
+            # Tried again on the next tick, the deltas themselves are still buffered
+            self.__unjournaled = entries + self.__unjournaled
+            raise
+
+    async def replayJournal(self):
+        """
+        Loads the deltas that were never acknowledged from the journal
+
+        Called once on startup, before any new minutes are added
+        """
+
+        if self.__journal != None:
+            self.restore(await self.__runJournal(self.__journal.pending))
+
+    async def flush(self, fire):
+        """
+        Writes all pending deltas to the database in a single batched write
+
+        Guilds whose write fails are kept so they are retried on the next flush,
+        even if the journal can't be told which guilds were written
+
+        Parameters
+        ----------
+        fire : AsyncFire
+            The fire instance to write the deltas to
+        """
+
+        drained = self.drain()
+        if not drained:
+            return
+
+        if self.__journal != None:
+            # Whatever hasn't been journaled yet is recorded in the same call that reads the last id,
+            # and the journal's thread runs calls in order, so drainedUpTo covers exactly what was drained
+            entries = self.__unjournaled
+            self.__unjournaled = []
+
+            try:
+                drainedUpTo = await self.__runJournal(self.__journal.record, entries)
+            except:
+                self.__unjournaled = entries + self.__unjournaled
+                self.restore(drained)
+                raise
+
+        try:
+            failedGuildIds = await fire.postAllTimeDeltas(drained)
+        except Exception as e:
+            print("Error flushing times", e)
+            failedGuildIds = list(drained)
+
+        if self.__journal != None:
+            try:
+                await self.__runJournal(self.__journal.acknowledge, drainedUpTo, failedGuildIds)
+            except Exception as e:
+                # The written guilds stay journaled as well, so they're replayed on the next start up (see TimeJournal)
+                print("Error acknowledging flushed times", e)
+
+        self.restore({guildId: drained[guildId] for guildId in failedGuildIds})
+
+    async def close(self):
+        """
+        Closes the journal and stops its thread
+
+        Called once when the client closes, after the last flush
+        """
+
+        if self.__journal == None:
+            return
+
+        try:
+            await self.__runJournal(self.__journal.close)
+        finally:
+            self.__journalExecutor.shutdown()
+
+    async def __runJournal(self, func, *args):
+        """
+        Private helper to run a journal call on the journal's thread
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(self.__journalExecutor, func, *args)
@@ -0,0 +1,139 @@
+import sqlite3
+
+class TimeJournal:
+    """
+    Append-only local journal of minute/point increments that haven't been written to the database yet
+
+    Increments are recorded before they are buffered, and only removed once the
+    flush that contains them is acknowledged by the database, so anything lost
+    to a crash or a failed write can be replayed on startup
+
+    *NOTE*
+    If the process dies after a flush is committed but before it is acknowledged,
+    those increments will be replayed (and counted) a second time
+
+    Calls aren't made on the event loop: TimeAccumulator runs them one at a
+    time on its own writer thread
+
+    Attributes
+    __________
+    __conn (sqlite3.Connection): Connection to the journal file
+
+    Functions
+    __________
+    record(entries) -> int
+        Appends increments for several guilds to the journal in one transaction
+    lastId() -> int
+        The id of the most recently recorded increment
+    acknowledge(upToId, failedGuildIds)
+        Removes increments up to upToId, except the ones for failedGuildIds
+    pending() -> dict: { guildId: (dayDeltas, pointDeltas) }
+        All of the unacknowledged increments, merged per guild
+    close()
+        Closes the connection to the journal file
+    """
+
+    def __init__(self, path):
+        # Created on the event loop's thread but only used from the writer thread after that
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.execute('''
+            CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                day_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                minutes INTEGER NOT NULL,
+                points INTEGER NOT NULL
+            )
+        ''')
+        self.__conn.commit()
+
+    def record(self, entries):
+        """
+        Appends increments for several guilds to the journal in one transaction
+
+        Parameters
+        ----------
+        entries : list((guildId, dayId, userMinutes, userPoints))
+            guildId     : the id of the server that the users belong to
+            dayId       : the day id ('%Y-%m-%d') the minutes were tracked on
+            userMinutes : { userId(str): int } minutes to add for each user
+            userPoints  : { userId(str): int } discord points to add for each user
+
+        Returns
+        ----------
+        int
+            lastId() once they're recorded
+        """
+
+        rows = [(guildId, dayId, userId, minutes, userPoints.get(userId, 0))
+                for guildId, dayId, userMinutes, userPoints in entries
+                for userId, minutes in userMinutes.items()]
+
+        if rows:
+            with self.__conn:
+                self.__conn.executemany('INSERT INTO pending (guild_id, day_id, user_id, minutes, points) VALUES (?, ?, ?, ?, ?)', rows)
+
+        return self.lastId()
+
+    def lastId(self):
+        """
+        The id of the most recently recorded increment
+
+        Returns
+        ----------
+        int
+            0 if nothing has been recorded
+        """
+
+        row = self.__conn.execute('SELECT MAX(id) FROM pending').fetchone()
+
+        return row[0] or 0
+
+    def acknowledge(self, upToId, failedGuildIds=[]):
+        """
+        Removes increments up to upToId, except the ones for failedGuildIds
+
+        Parameters
+        ----------
+        upToId : int
+            The lastId() when the flushed increments were drained
+        failedGuildIds : list(guildId)
+            Guilds whose increments were not written and should be kept
+        """
+
+        placeholders = ','.join('?' * len(failedGuildIds))
+
+        with self.__conn:
+            self.__conn.execute('DELETE FROM pending WHERE id <= ? AND guild_id NOT IN (' + placeholders + ')', [upToId] + list(failedGuildIds))
+
+    def pending(self):
+        """
+        All of the unacknowledged increments, merged per guild
+
+        Returns
+        ----------
+        dict: { guildId: (dayDeltas, pointDeltas) }
+            dayDeltas   : { dayId: { userId(str): int } }
+            pointDeltas : { userId(str): int }
+        """
+
+        guildDeltas = {}
+        rows = self.__conn.execute('SELECT guild_id, day_id, user_id, SUM(minutes), SUM(points) FROM pending GROUP BY guild_id, day_id, user_id')
+
+        for guildId, dayId, userId, minutes, points in rows:
+            dayDeltas, pointDeltas = guildDeltas.setdefault(guildId, ({}, {}))
+            dayDeltas.setdefault(dayId, {})[userId] = minutes
+            if points > 0:
+                pointDeltas[userId] = pointDeltas.get(userId, 0) + points
+
+        return guildDeltas
+
+    def close(self):
+        """
+        Closes the connection to the journal file
+        """
+
+        self.__conn.close()
@@ -0,0 +1,138 @@
+from dateutils import shiftDayId
+
+class UserStats:
+    """
+    A user's time stats for a guild, updated as their minutes are added
+
+    Stored as one small document per user so -mylog never has to read the
+    guild's day history
+
+    Attributes
+    __________
+    total (int): Total minutes tracked
+    lastDayId (str): The most recent day ('%Y-%m-%d') with tracked minutes, or None
+    lastDayMinutes (int): Minutes tracked on lastDayId
+    bestDayId (str): The day with the most tracked minutes, or None
+    bestMinutes (int): Minutes tracked on bestDayId
+    streak (int): Number of consecutive days with tracked minutes, ending on lastDayId
+
+    Functions
+    __________
+    addMinutes(dayId, minutes, addToTotal)
+        Adds minutes tracked on a day
+    getTodayMinutes(todayId) -> int
+        Minutes tracked today
+    getStreak(todayId) -> int
+        The current streak (0 if it ended before yesterday)
+    toDict() -> dict
+        The stats as stored in the database
+    """
+
+    def __init__(self, d=None):
+        """
+        Parameters
+        ----------
+        d : dict
+            Stats as returned by toDict(), or None to start from nothing
+        """
+
+        d = d or {}
+        self.total = d.get('total', 0)
+        self.lastDayId = d.get('lastDayId')
+        self.lastDayMinutes = d.get('lastDayMinutes', 0)
+        self.bestDayId = d.get('bestDayId')
+        self.bestMinutes = d.get('bestMinutes', 0)
+        self.streak = d.get('streak', 0)
+
+    def addMinutes(self, dayId, minutes, addToTotal=True):
+        """
+        Adds minutes tracked on a day
+
+        Days should be added in order; minutes for a day before lastDayId
+        only count towards the total
+
+        Parameters
+        ----------
+        dayId : str
+            The day the minutes were tracked on ('%Y-%m-%d')
+        minutes : int
+            The number of minutes
+        addToTotal : bool
+            Whether to add the minutes to total (False when total is set separately)
+        """
+
+        if addToTotal:
+            self.total += minutes
+
+        if minutes <= 0:
+            return
+
+        if self.lastDayId == None or dayId > self.lastDayId:
+            if self.lastDayId != None and shiftDayId(dayId, -1) == self.lastDayId:
+                self.streak += 1
+            else:
+                self.streak = 1
+
+            self.lastDayId = dayId
+            self.lastDayMinutes = minutes
+        elif dayId == self.lastDayId:
+            self.lastDayMinutes += minutes
+        else:
+            return
+
+        if self.lastDayMinutes > self.bestMinutes:
+            self.bestDayId = self.lastDayId
+            self.bestMinutes = self.lastDayMinutes
+
+    def getTodayMinutes(self, todayId):
+        """
+        Minutes tracked today
+
+        Parameters
+        ----------
+        todayId : str
+            Today's day id ('%Y-%m-%d')
+
+        Returns
+        ----------
+        int
+        """
+
+        return self.lastDayMinutes if self.lastDayId == todayId else 0
+
+    def getStreak(self, todayId):
+        """
+        The current streak, which is kept until the end of the day after lastDayId
+
+        Parameters
+        ----------
+        todayId : str
+            Today's day id ('%Y-%m-%d')
+
+        Returns
+        ----------
+        int
+        """
+
+        if self.lastDayId == todayId or self.lastDayId == shiftDayId(todayId, -1):
+            return self.streak
+
+        return 0
+
+    def toDict(self):
+        """
+        The stats as stored in the database
+
+        Returns
+        ----------
+        dict
+        """
+
+        return {
+            'total': self.total,
+            'lastDayId': self.lastDayId,
+            'lastDayMinutes': self.lastDayMinutes,
+            'bestDayId': self.bestDayId,
+            'bestMinutes': self.bestMinutes,
+            'streak': self.streak,
+        }
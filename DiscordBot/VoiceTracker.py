@@ -0,0 +1,293 @@
+import time
+
+class VoicePresence:
+    """
+    A member's voice state as last seen from the gateway
+
+    Attributes
+    __________
+    channelId (int): The id of the voice channel the member is in
+    selfDeaf (bool), deaf (bool), selfMute (bool), mute (bool), afk (bool)
+        The member's voice flags
+    """
+
+    __slots__ = ('channelId', 'selfDeaf', 'deaf', 'selfMute', 'mute', 'afk')
+
+    def __init__(self, voiceState):
+        self.channelId = voiceState.channel.id
+        self.selfDeaf = voiceState.self_deaf
+        self.deaf = voiceState.deaf
+        self.selfMute = voiceState.self_mute
+        self.mute = voiceState.mute
+        self.afk = voiceState.afk
+
+class VoiceTracker:
+    """
+    Tracks how long members spend in voice from gateway voice state events
+
+    A member has an open interval while they are in a voice channel and not
+    deafened or afk. Elapsed time is credited when the interval closes (the
+    member leaves, deafens or goes afk) or when the minutes are collected, and
+    any leftover seconds carry over to the next collection
+
+    A per-guild presence index of everyone in voice is kept up to date from the
+    same events, and guilds with nobody in voice (and no leftover time) are not
+    stored at all, so idle guilds cost nothing on a tick
+
+    Attributes
+    __________
+    __presence (dict): { guildId: { userId(str): VoicePresence } }
+        Everyone currently in a voice channel
+    __openSince (dict): { guildId: { userId(str): float } }
+        When the uncredited part of each open interval started (eligible members only)
+    __seconds (dict): { guildId: { userId(str): float } }
+        Seconds that have been credited but not yet collected as whole minutes
+    __collectable (set): Guilds where a closed interval left at least a minute to collect
+    __clock (callable): Returns the current time in seconds
+
+    Functions
+    __________
+    isEligible(voiceState) -> bool
+        Whether time should be tracked for a member with this voice state
+    syncGuild(guild)
+        Reconciles the open intervals with the guild's current voice channels
+    removeGuild(guildId)
+        Stops tracking the guild and drops any uncollected time
+    onVoiceStateUpdate(member, before, after)
+        Opens/closes the member's interval when their voice state changes
+    collectMinutes(guildId) -> dict: { userId(str): int }
+        Removes and returns the whole minutes tracked for each user in the guild
+    activeGuildIds() -> list(guildId)
+        The guilds that have someone eligible in voice or minutes left to collect
+    getPresence(guildId) -> dict: { userId(str): VoicePresence }
+        Everyone currently in voice in the guild
+    getEligibleUserIds(guildId) -> list(userId(str))
+        The users whose time is currently being tracked in the guild
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.__presence = {}
+        self.__openSince = {}
+        self.__seconds = {}
+        self.__collectable = set()
+        self.__clock = clock
+
+    @staticmethod
+    def isEligible(voiceState):
+        """
+        Whether time should be tracked for a member with this voice state
+
+        We do not track time for individuals that are deafened or afk
+
+        Parameters
+        ----------
+        voiceState : discord.VoiceState or None
+            The member's voice state
+
+        Returns
+        ----------
+        bool
+        """
+
+        if voiceState == None or voiceState.channel == None:
+            return False
+
+        return not voiceState.self_deaf and not voiceState.afk and not voiceState.deaf
+
+    def syncGuild(self, guild):
+        """
+        Reconciles the open intervals with the guild's current voice channels
+
+        Used when the bot (re)connects or joins a guild, since voice state
+        events that happened while disconnected were missed
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The server to sync
+        """
+
+        presence = {}
+        eligible = set()
+        for channel in guild.voice_channels:
+            for member in channel.members:
+                if member.voice != None and member.voice.channel != None:
+                    presence[str(member.id)] = VoicePresence(member.voice)
+                if self.isEligible(member.voice):
+                    eligible.add(str(member.id))
+
+        if presence:
+            self.__presence[guild.id] = presence
+        else:
+            self.__presence.pop(guild.id, None)
+
+        openSince = self.__openSince.get(guild.id, {})
+        for userId in list(openSince):
+            if not userId in eligible:
+                self.__close(guild.id, userId)
+
+        for userId in eligible:
+            self.__open(guild.id, userId)
+
+    def removeGuild(self, guildId):
+        """
+        Stops tracking the guild and drops any uncollected time
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+        """
+
+        self.__presence.pop(guildId, None)
+        self.__openSince.pop(guildId, None)
+        self.__seconds.pop(guildId, None)
+        self.__collectable.discard(guildId)
+
+    def onVoiceStateUpdate(self, member, before, after):
+        """
+        Opens/closes the member's interval when their voice state changes
+
+        Parameters
+        ----------
+        member : discord.Member
+            The member whose voice state changed
+        before : discord.VoiceState
+            The voice state before the change
+        after : discord.VoiceState
+            The voice state after the change
+        """
+
+        guildId = member.guild.id
+        userId = str(member.id)
+
+        if after != None and after.channel != None:
+            self.__presence.setdefault(guildId, {})[userId] = VoicePresence(after)
+        elif guildId in self.__presence:
+            self.__presence[guildId].pop(userId, None)
+            if not self.__presence[guildId]:
+                del self.__presence[guildId]
+
+        wasEligible = self.isEligible(before)
+        isEligible = self.isEligible(after)
+
+        if isEligible and not wasEligible:
+            self.__open(guildId, userId)
+        elif wasEligible and not isEligible:
+            self.__close(guildId, userId)
+
+    def collectMinutes(self, guildId):
+        """
+        Removes and returns the whole minutes tracked for each user in the guild
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        dict: { userId(str): int }
+            Only users with at least one minute are included
+        """
+
+        if not guildId in self.__openSince and not guildId in self.__seconds:
+            return {}
+
+        self.__collectable.discard(guildId)
+        now = self.__clock()
+        seconds = self.__seconds.setdefault(guildId, {})
+
+        # Checkpoint the open intervals so their time so far can be collected
+        openSince = self.__openSince.get(guildId, {})
+        for userId, start in openSince.items():
+            seconds[userId] = seconds.get(userId, 0) + (now - start)
+            openSince[userId] = now
+
+        userMinutes = {}
+        for userId in list(seconds):
+            minutes = int(seconds[userId] // 60)
+            if minutes > 0:
+                userMinutes[userId] = minutes
+                seconds[userId] -= minutes * 60
+
+            # Nothing left to carry over for users that have left
+            if not userId in openSince and seconds[userId] < 1:
+                del seconds[userId]
+
+        if not seconds:
+            del self.__seconds[guildId]
+
+        return userMinutes
+
+    def activeGuildIds(self):
+        """
+        The guilds that have someone eligible in voice or time left to collect
+
+        Leftover seconds (less than a minute) from members that have left are
+        kept, but don't make the guild active on their own
+
+        Returns
+        ----------
+        list(guildId)
+        """
+
+        return list(self.__openSince.keys() | self.__collectable)
+
+    def getPresence(self, guildId):
+        """
+        Everyone currently in voice in the guild
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        dict: { userId(str): VoicePresence }
+        """
+
+        return dict(self.__presence.get(guildId, {}))
+
+    def getEligibleUserIds(self, guildId):
+        """
+        The users whose time is currently being tracked in the guild
+
+        Parameters
+        ----------
+        guildId : int
+            The id of the server
+
+        Returns
+        ----------
+        list(userId(str))
+        """
+
+        return list(self.__openSince.get(guildId, {}))
+
+    def __open(self, guildId, userId):
+        """
+        Private helper to open an interval for the user if one isn't already open
+        """
+
+        self.__openSince.setdefault(guildId, {}).setdefault(userId, self.__clock())
+
+    def __close(self, guildId, userId):
+        """
+        Private helper to close the user's interval and credit the elapsed time
+        """
+
+        openSince = self.__openSince.get(guildId, {})
+        start = openSince.pop(userId, None)
+        if start == None:
+            return
+
+        if not openSince:
+            del self.__openSince[guildId]
+
+        seconds = self.__seconds.setdefault(guildId, {})
+        seconds[userId] = seconds.get(userId, 0) + (self.__clock() - start)
+
+        if seconds[userId] >= 60:
+            self.__collectable.add(guildId)
@@ -0,0 +1,91 @@
+from datetime import datetime
+import datetime as dt
+
+# Days roll over at 6AM so late-night sessions count towards the previous day
+DAY_ROLLOVER = dt.timedelta(hours=6)
+# Format that dates are shown to users in
+DATE_FORMAT = '%m/%d/%Y'
+# Sortable format used for day ids in the database
+DAY_ID_FORMAT = '%Y-%m-%d'
+
+def getShiftedNow():
+    """
+    Get the current time shifted back by the day rollover
+
+    Returns
+    ----------
+    datetime
+        The current time minus DAY_ROLLOVER
+    """
+
+    return datetime.today() - DAY_ROLLOVER
+
+def getCurrentDayId(daysAgo=0):
+    """
+    Get the id of the day that time is currently being logged to
+
+    Parameters
+    ----------
+    daysAgo : int
+        Number of days before the current day to get the id for
+
+    Returns
+    ----------
+    str
+        The current (shifted) date formatted as DAY_ID_FORMAT
+    """
+
+    return (getShiftedNow() - dt.timedelta(days=daysAgo)).strftime(DAY_ID_FORMAT)
+
+def dayIdToDateString(dayId):
+    """
+    Convert a day id to the date string shown to users
+
+    Parameters
+    ----------
+    dayId : str
+        Date formatted as DAY_ID_FORMAT
+
+    Returns
+    ----------
+    str
+        Date formatted as DATE_FORMAT
+    """
+
+    return datetime.strptime(dayId, DAY_ID_FORMAT).strftime(DATE_FORMAT)
+
+def dateStringToDayId(dateStr):
+    """
+    Convert a date string shown to users to a day id
+
+    Parameters
+    ----------
+    dateStr : str
+        Date formatted as DATE_FORMAT
+
+    Returns
+    ----------
+    str
+        Date formatted as DAY_ID_FORMAT
+    """
+
+    return datetime.strptime(dateStr, DATE_FORMAT).strftime(DAY_ID_FORMAT)
+
+def shiftDayId(dayId, days):
+    """
+    Get the id of the day a number of days before/after another day
+
+    Parameters
+    ----------
+    dayId : str
+        Date formatted as DAY_ID_FORMAT
+    days : int
+        Number of days to move (negative to move back)
+
+    Returns
+    ----------
+    str
+        Date formatted as DAY_ID_FORMAT
+    """
+
+    return (datetime.strptime(dayId, DAY_ID_FORMAT) + dt.timedelta(days=days)).strftime(DAY_ID_FORMAT)
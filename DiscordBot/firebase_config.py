@@ -5,26 +5,38 @@ import json
 
 #load_dotenv()
 
-FIREBASE_TYPE = os.getenv('FIREBASE_TYPE')
-FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
-FIREBASE_PRIVATE_KEY_ID = os.getenv('FIREBASE_PRIVATE_KEY_ID')
-FIREBASE_PRIVATE_KEY = os.getenv('FIREBASE_PRIVATE_KEY')
-FIREBASE_CLIENT_EMAIL = os.getenv('FIREBASE_CLIENT_EMAIL')
-FIREBASE_CLIENT_ID = os.getenv('FIREBASE_CLIENT_ID')
-FIREBASE_AUTH_URI = os.getenv('FIREBASE_AUTH_URI')
-FIREBASE_TOKEN_URI = os.getenv('FIREBASE_TOKEN_URI')
-FIREBASE_AUTH_PROVIDER_X509_CERT_URL = os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL')
-FIREBASE_CLIENT_X509_CERT_URL = os.getenv('FIREBASE_CLIENT_X509_CERT_URL')
-
-firebase_config_dict = {
-  "type": FIREBASE_TYPE,
-  "project_id": FIREBASE_PROJECT_ID,
-  "private_key_id": FIREBASE_PRIVATE_KEY_ID,
-  "private_key": FIREBASE_PRIVATE_KEY.replace('\\n', '\n'),
-  "client_email": FIREBASE_CLIENT_EMAIL,
-  "client_id": FIREBASE_CLIENT_ID,
-  "auth_uri": FIREBASE_AUTH_URI,
-  "token_uri": FIREBASE_TOKEN_URI,
-  "auth_provider_x509_cert_url": FIREBASE_AUTH_PROVIDER_X509_CERT_URL,
-  "client_x509_cert_url": FIREBASE_CLIENT_X509_CERT_URL
-}
+def getFirebaseConfig():
+    """
+    Build the Firebase service account credentials from the FIREBASE_* environment variables
+
+    Read when the Firestore backend is created rather than at import time, so
+    the bot can run with another storage backend without them
+
+    Returns
+    ----------
+    dict
+        The service account info for credentials.Certificate
+
+    Raises
+    ----------
+    ValueError
+        If FIREBASE_PRIVATE_KEY isn't set
+    """
+
+    FIREBASE_PRIVATE_KEY = os.getenv('FIREBASE_PRIVATE_KEY')
+
+    if FIREBASE_PRIVATE_KEY == None:
+        raise ValueError("FIREBASE_PRIVATE_KEY is not set (set KIRBEC_STORAGE to use a different storage backend)")
+
+    return {
+        "type": os.getenv('FIREBASE_TYPE'),
+        "project_id": os.getenv('FIREBASE_PROJECT_ID'),
+        "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
+        "private_key": FIREBASE_PRIVATE_KEY.replace('\\n', '\n'),
+        "client_email": os.getenv('FIREBASE_CLIENT_EMAIL'),
+        "client_id": os.getenv('FIREBASE_CLIENT_ID'),
+        "auth_uri": os.getenv('FIREBASE_AUTH_URI'),
+        "token_uri": os.getenv('FIREBASE_TOKEN_URI'),
+        "auth_provider_x509_cert_url": os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
+        "client_x509_cert_url": os.getenv('FIREBASE_CLIENT_X509_CERT_URL')
+    }
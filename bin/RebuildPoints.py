@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DiscordBot'))
+
+from Fire import Fire
+
+# Checks a guild's discord points against its points ledger, and can rebuild them from it
+#
+# usage: python bin/RebuildPoints.py [guild id] [--write] [--user user id]
+#
+# Uses the same storage as the bot (KIRBEC_STORAGE and the FIREBASE_* variables).
+# Only use --write while the bot is stopped, points written while it runs can be lost
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild a guild's discord points from its points ledger")
+    parser.add_argument('guildId', type=int, help='id of the guild')
+    parser.add_argument('--write', action='store_true', help='replace the discord points with the ledger balances')
+    parser.add_argument('--user', type=int, help='also print the ledger history of this member')
+    args = parser.parse_args()
+
+    # Fire only needs the id of the guild
+    guild = SimpleNamespace(id=args.guildId)
+    fire = Fire()
+
+    points = fire.fetchDiscordPoints(guild)
+    balances = fire.fetchLedgerBalances(guild)
+
+    differences = 0
+    for userId in sorted(set(points) | set(balances)):
+        if int(points.get(userId, 0)) != int(balances.get(userId, 0)):
+            print("{}: discordPoints {} ledger {}".format(userId, points.get(userId, 0), balances.get(userId, 0)))
+            differences += 1
+
+    print("{} of {} members differ".format(differences, len(set(points) | set(balances))))
+
+    if args.user != None:
+        for entry in fire.fetchPointsHistory(guild, args.user):
+            print("{} {:>8} {} ({})".format(entry['at'], entry['amount'], entry['reason'], entry['reference']))
+
+    if args.write and differences > 0:
+        fire.rebuildDiscordPoints(guild)
+        print("Rebuilt discord points for guild", args.guildId)
+
+if __name__ == '__main__':
+    main()
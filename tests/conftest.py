@@ -0,0 +1,54 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The bot's modules import each other from the DiscordBot directory (that's where main.py runs from)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DiscordBot'))
+
+from FireCache import FireCache
+from Fire import Fire
+from Storage.MemoryBackend import MemoryBackend
+
+class HookedBackend(MemoryBackend):
+    """
+    MemoryBackend that calls afterWrite() right after the next commit/transaction is applied,
+    to run a read in the gap between a write reaching the database and Fire updating its cache,
+    and afterQuery(collectionPath) after every query
+    """
+
+    afterWrite = None
+    afterQuery = None
+
+    def commit(self, writes):
+        super().commit(writes)
+        self.__runHook()
+
+    def runTransaction(self, paths, func, maxAttempts=5, fields=None):
+        result = super().runTransaction(paths, func, maxAttempts, fields)
+        self.__runHook()
+        return result
+
+    def queryDocuments(self, collectionPath, field, start=None, end=None, descending=False):
+        docs = super().queryDocuments(collectionPath, field, start, end, descending)
+        if self.afterQuery != None:
+            self.afterQuery(tuple(collectionPath))
+        return docs
+
+    def __runHook(self):
+        hook, self.afterWrite = self.afterWrite, None
+        if hook != None:
+            hook()
+
+@pytest.fixture
+def guild():
+    return SimpleNamespace(id=1)
+
+@pytest.fixture
+def backend():
+    return HookedBackend()
+
+@pytest.fixture
+def fire(backend):
+    return Fire(FireCache(), backend=backend)
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from ActivityMatrix import ActivityMatrix
+
+DAY_TIMES = {
+    '2021-03-01': {'1': 10, '2': 5},
+    '2021-03-03': {'1': 20},
+    '2021-03-10': {'2': 30, '3': 1},
+}
+
+def test_ranges_and_user_totals():
+    matrix = ActivityMatrix(DAY_TIMES)
+
+    assert matrix.getRange() == ('2021-03-01', '2021-03-10')
+    assert matrix.userTotals() == {'1': 30, '2': 35, '3': 1}
+    assert matrix.userTotals('2021-03-02', '2021-03-09') == {'1': 20}
+
+def test_days_before_the_first_one_grow_the_matrix():
+    matrix = ActivityMatrix(DAY_TIMES)
+    matrix.add('2021-02-27', {'4': 7})
+    matrix.add('2021-03-01', {'1': 1})
+
+    assert matrix.getRange() == ('2021-02-27', '2021-03-10')
+    assert matrix.userTotals('2021-02-27', '2021-03-01') == {'1': 11, '2': 5, '4': 7}
+
+def test_set_day_replaces_its_minutes():
+    matrix = ActivityMatrix(DAY_TIMES)
+    matrix.setDay('2021-03-01', {'2': 8})
+
+    assert matrix.userTotals('2021-03-01', '2021-03-01') == {'2': 8}
+    assert matrix.userTotals() == {'1': 20, '2': 38, '3': 1}
+
+def test_summary_best_day_window_and_user_stats():
+    summary = ActivityMatrix(DAY_TIMES).summarize(userId='1')
+
+    assert summary['total'] == 66
+    assert summary['activeUsers'] == 3
+    assert summary['bestDay'] == ('2021-03-10', 31)
+    assert summary['bestWindow'] == ('2021-03-01', 35)
+    assert summary['userTotal'] == 30
+    assert summary['userPercentile'] == 33
+    assert summary['userBestDay'] == ('2021-03-03', 20)
+
+def test_summary_of_an_empty_range():
+    summary = ActivityMatrix(DAY_TIMES).summarize('2021-03-04', '2021-03-09', userId='5')
+
+    assert summary['total'] == 0
+    assert summary['activeUsers'] == 0
+    assert summary['userTotal'] == 0
+    assert summary['userBestDay'] == None
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from AsyncFire import AsyncFire
+
+class SlowFire:
+    """
+    Fire whose reads block until they're released
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def fetchTotalTimes(self, guild):
+        assert self.release.wait(5)
+        return {'1': guild, 'thread': threading.current_thread().name}
+
+def test_calls_run_on_the_pool():
+    fire = SlowFire()
+    fire.release.set()
+    asyncFire = AsyncFire(fire)
+
+    try:
+        result = asyncio.run(asyncFire.fetchTotalTimes(5))
+    finally:
+        asyncFire.shutdown()
+
+    assert result['1'] == 5
+    assert result['thread'].startswith('fire')
+
+def test_slow_calls_dont_block_the_event_loop():
+    fire = SlowFire()
+    asyncFire = AsyncFire(fire)
+
+    async def run():
+        call = asyncio.ensure_future(asyncFire.fetchTotalTimes(5))
+        await asyncio.sleep(0.01)
+
+        # The loop is still running other coroutines while the call waits
+        assert not call.done()
+
+        fire.release.set()
+        return await call
+
+    try:
+        assert asyncio.run(run())['1'] == 5
+    finally:
+        asyncFire.shutdown()
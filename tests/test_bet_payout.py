@@ -0,0 +1,48 @@
+from BetPayout import BetPayout
+
+def test_pool_is_split_by_stake():
+    payout = BetPayout({'a': 30, 'b': 70}, {
+        '1': {'betOption': 'a', 'amount': 10},
+        '2': {'betOption': 'a', 'amount': 20},
+        '3': {'betOption': 'b', 'amount': 70},
+    })
+
+    assert payout.pool == 100
+    assert payout.getPayouts('a') == {'1': 33, '2': 67}
+
+def test_leftover_points_go_to_largest_remainders():
+    # 100 split three ways is 33.33 each, the leftover point goes to the smallest user id
+    payout = BetPayout({'a': 30, 'b': 70}, {
+        '7': {'betOption': 'a', 'amount': 10},
+        '3': {'betOption': 'a', 'amount': 10},
+        '5': {'betOption': 'a', 'amount': 10},
+        '9': {'betOption': 'b', 'amount': 70},
+    })
+
+    assert payout.getPayouts('a') == {'3': 34, '5': 33, '7': 33}
+
+def test_ties_go_to_the_larger_bet():
+    # 6 * 1 / 4 and 6 * 3 / 4 both leave a remainder of 2, so the larger bet gets the leftover point
+    payout = BetPayout({'a': 4, 'b': 2}, {
+        '1': {'betOption': 'a', 'amount': 1},
+        '2': {'betOption': 'a', 'amount': 3},
+        '3': {'betOption': 'b', 'amount': 2},
+    })
+
+    assert payout.getPayouts('a') == {'1': 1, '2': 5}
+
+def test_whole_pool_is_paid_out():
+    acceptedBy = {str(userId): {'betOption': 'a' if userId % 3 else 'b', 'amount': userId * 7 % 13 + 1} for userId in range(1, 40)}
+    options = {'a': 0, 'b': 0}
+    for userBet in acceptedBy.values():
+        options[userBet['betOption']] += userBet['amount']
+
+    payouts = BetPayout(options, acceptedBy).getPayouts('a')
+
+    assert sum(payouts.values()) == options['a'] + options['b']
+    assert payouts == BetPayout(options, acceptedBy).getPayouts('a')
+
+def test_nobody_on_the_winning_option():
+    payout = BetPayout({'a': 0, 'b': 10}, {'1': {'betOption': 'b', 'amount': 10}})
+
+    assert payout.getPayouts('a') == {}
@@ -0,0 +1,100 @@
+import threading
+from types import SimpleNamespace
+
+def member(userId, administrator=False):
+    return SimpleNamespace(id=userId, guild_permissions=SimpleNamespace(administrator=administrator))
+
+def test_bets_are_stored_one_per_document_with_an_active_index(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'2': 100})
+
+    betId = fire.postNewBet(guild, 1, 'Who wins?', {'Blue': 0, 'Red': 0}, '03/07/2021')
+    bet, error = fire.postBet(guild, member(2), str(betId), '2', 40)
+
+    assert betId == 1
+    assert error == None
+    assert backend.getDocument(('1', 'betIndex', 'bets', '1'))['acceptedBy'] == {'2': {'betOption': 'Red', 'amount': 40}}
+    assert backend.getDocument(('1', 'discordPoints')) == {'2': 60}
+    assert fire.fetchActiveBets(guild) == {'1': {'betId': 1, 'betTitle': 'Who wins?', 'startedBy': 1, 'closed': False}}
+
+def test_closed_bets_stay_active_until_completed(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'1': 0, '2': 100})
+    betId = str(fire.postNewBet(guild, 1, 'Who wins?', {'Blue': 0, 'Red': 0}, '03/07/2021'))
+    fire.postBet(guild, member(2), betId, '1', 10)
+
+    assert fire.postCloseBet(guild, member(2), betId)[1] != None
+
+    fire.postCloseBet(guild, member(1), betId)
+
+    assert fire.fetchActiveBets(guild)[betId]['closed']
+    assert fire.postBet(guild, member(2), betId, '1', 10)[1] == "Bet no longer has open submissions"
+
+    fire.memberCache.setMembers(guild.id, {1: 'one', 2: 'two'})
+    bet, userRewards, error = fire.postCompleteBet(guild, member(1), betId, '1')
+
+    assert error == None
+    assert userRewards == {'two': 10}
+    assert fire.fetchActiveBets(guild) == {}
+    assert fire.fetchBet(guild, betId)['winningOption'] == 'Blue'
+
+def test_legacy_bets_are_migrated(fire, backend, guild):
+    backend.setDocument(('1', 'bets'), {
+        'numBets': 2,
+        '1': {'betId': 1, 'betTitle': 'Old', 'startedBy': 1, 'closed': True, 'completed': True, 'options': {}, 'acceptedBy': {}},
+        '2': {'betId': 2, 'betTitle': 'New', 'startedBy': 1, 'closed': False, 'completed': False, 'options': {}, 'acceptedBy': {}},
+    })
+
+    fire.migrateBets(guild)
+
+    assert backend.getDocument(('1', 'bets')) == None
+    assert fire.fetchBet(guild, '1')['betTitle'] == 'Old'
+    assert list(fire.fetchActiveBets(guild)) == ['2']
+    assert fire.postNewBet(guild, 1, 'Next', {'A': 0}, '03/07/2021') == 3
+
+def test_concurrent_wagers_are_never_lost(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {str(userId): 100 for userId in range(2, 10)})
+    betId = str(fire.postNewBet(guild, 1, 'Who wins?', {'Blue': 0, 'Red': 0}, '03/07/2021'))
+    backend.latency = 0.001
+    results = {}
+
+    def wager(userId):
+        results[userId] = fire.postBet(guild, member(userId), betId, '1', 10)[1]
+
+    threads = [threading.Thread(target=wager, args=(userId,)) for userId in range(2, 10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    placed = [str(userId) for userId, error in results.items() if error == None]
+    bet = backend.getDocument(('1', 'betIndex', 'bets', betId))
+    points = backend.getDocument(('1', 'discordPoints'))
+
+    assert placed
+    assert sorted(bet['acceptedBy']) == sorted(placed)
+    assert bet['options']['Blue'] == 10 * len(placed)
+    assert all(points[userId] == (90 if userId in placed else 100) for userId in points)
+
+def test_points_read_during_a_wager_are_current_afterwards(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'2': 100})
+    betId = str(fire.postNewBet(guild, 1, 'Who wins?', {'Blue': 0, 'Red': 0}, '03/07/2021'))
+    backend.afterWrite = lambda: fire.fetchLeaderboardPage(guild, 'discordPoints', 1)
+
+    fire.postBet(guild, member(2), betId, '1', 40)
+
+    assert fire.fetchDiscordPoints(guild) == {'2': 60}
+    assert fire.fetchLeaderboardPage(guild, 'discordPoints', 1)[0] == [('2', 60)]
+
+def test_every_winner_is_paid_in_the_commit_that_completes_the_bet(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'1': 0, '2': 100, '3': 100, '4': 100})
+    betId = str(fire.postNewBet(guild, 1, 'Who wins?', {'Blue': 0, 'Red': 0}, '03/07/2021'))
+    fire.postBet(guild, member(2), betId, '1', 10)
+    fire.postBet(guild, member(3), betId, '1', 20)
+    fire.postBet(guild, member(4), betId, '2', 70)
+    fire.memberCache.setMembers(guild.id, {2: 'two'})
+
+    bet, userRewards, error = fire.postCompleteBet(guild, member(1), betId, '1')
+
+    assert error == None
+    assert userRewards == {'two': 33, '3': 67}
+    assert backend.getDocument(('1', 'discordPoints')) == {'1': 0, '2': 123, '3': 147, '4': 30}
+    assert fire.fetchDiscordPoints(guild) == {'1': 0, '2': 123, '3': 147, '4': 30}
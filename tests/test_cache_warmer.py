@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+from CacheWarmer import CacheWarmer
+
+class FakeFire:
+    """
+    Records the order guilds are warmed in, failing the ones it's told to
+    """
+
+    def __init__(self, failedGuildIds=()):
+        self.warmed = []
+        self.failedGuildIds = failedGuildIds
+
+    async def fetchAllMembers(self, guild):
+        if guild.id in self.failedGuildIds:
+            raise Exception("members unavailable")
+        self.warmed.append(guild.id)
+
+    async def fetchLeaderboardPage(self, guild, documentName, page):
+        pass
+
+    async def fetchWeekTimes(self, guild):
+        pass
+
+    async def fetchAllRewards(self, guild):
+        pass
+
+    async def fetchActiveBets(self, guild):
+        pass
+
+class Clock:
+    """
+    Clock that only moves when it's told to
+    """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+def guilds(*guildIds):
+    return [SimpleNamespace(id=guildId) for guildId in guildIds]
+
+def test_priority_guilds_are_warmed_first():
+    fire = FakeFire()
+    warmer = CacheWarmer(fire, maxConcurrency=1)
+
+    asyncio.run(warmer.warm(guilds(1, 2, 3), priorityGuildIds=[3]))
+
+    assert fire.warmed == [3, 1, 2]
+    assert warmer.getProgress() == (3, 3)
+
+def test_recently_warmed_guilds_are_skipped():
+    fire = FakeFire()
+    clock = Clock()
+    warmer = CacheWarmer(fire, maxAge=300, clock=clock)
+
+    async def warmTwice():
+        await warmer.warm(guilds(1))
+        clock.now = 100
+        await warmer.warm(guilds(1, 2))
+        clock.now = 400
+        await warmer.warm(guilds(1))
+
+    asyncio.run(warmTwice())
+
+    assert fire.warmed == [1, 2, 1]
+
+def test_failed_guilds_are_counted_and_retried():
+    fire = FakeFire(failedGuildIds=[2])
+    warmer = CacheWarmer(fire)
+
+    async def warmTwice():
+        await warmer.warm(guilds(1, 2))
+        assert (warmer.done, warmer.failed) == (2, 1)
+
+        fire.failedGuildIds = []
+        await warmer.warm(guilds(1, 2))
+
+    asyncio.run(warmTwice())
+
+    assert fire.warmed == [1, 2]
+    assert not warmer.isWarming()
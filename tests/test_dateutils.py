@@ -0,0 +1,15 @@
+from dateutils import getCurrentDayId, dayIdToDateString, dateStringToDayId, shiftDayId
+
+def test_day_ids_convert_to_and_from_date_strings():
+    assert dayIdToDateString('2021-03-07') == '03/07/2021'
+    assert dateStringToDayId('03/07/2021') == '2021-03-07'
+
+def test_day_ids_sort_by_date():
+    dayIds = [getCurrentDayId(daysAgo) for daysAgo in range(400)]
+
+    assert dayIds == sorted(dayIds, reverse=True)
+    assert sorted(dateStringToDayId(dayIdToDateString(dayId)) for dayId in dayIds) == sorted(dayIds)
+
+def test_shift_day_id_crosses_months_and_years():
+    assert shiftDayId('2021-03-01', -1) == '2021-02-28'
+    assert shiftDayId('2020-12-31', 1) == '2021-01-01'
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+discord = pytest.importorskip('discord')
+
+from Commands.EmbedCache import EmbedCache
+
+def test_concurrent_requests_share_one_render():
+    embedCache = EmbedCache()
+    renders = []
+
+    async def render():
+        renders.append(1)
+        await asyncio.sleep(0.01)
+        return discord.Embed(title="log")
+
+    async def fetchTwice():
+        return await asyncio.gather(
+            embedCache.fetch(1, 'totallog', 1, (1,), render),
+            embedCache.fetch(1, 'totallog', 1, (1,), render),
+        )
+
+    embeds = asyncio.run(fetchTwice())
+
+    assert len(renders) == 1
+    assert [embed.title for embed in embeds] == ["log", "log"]
+
+def test_a_new_version_is_rendered_again():
+    embedCache = EmbedCache()
+    renders = []
+
+    async def render():
+        renders.append(1)
+        return discord.Embed(title="log " + str(len(renders)))
+
+    async def fetch(version):
+        return await embedCache.fetch(1, 'totallog', 1, version, render)
+
+    assert asyncio.run(fetch((1,))).title == "log 1"
+    assert asyncio.run(fetch((1,))).title == "log 1"
+    assert asyncio.run(fetch((2,))).title == "log 2"
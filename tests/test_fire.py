@@ -0,0 +1,177 @@
+import threading
+from types import SimpleNamespace
+
+from dateutils import getCurrentDayId
+
+def flushMinutes(fire, minutes, points):
+    """
+    Flush minutes (today) and points for user '1' of guild 1
+    """
+
+    return fire.postAllTimeDeltas({1: ({getCurrentDayId(): {'1': minutes}}, {'1': points})})
+
+def seed(backend, minutes, points):
+    backend.setDocument(('1', 'total'), {'users': {'1': minutes}})
+    backend.setDocument(('1', 'discordPoints'), {'1': points})
+    backend.setDocument(('1', 'date', 'days', getCurrentDayId()), {'date': getCurrentDayId(), 'users': {'1': minutes}})
+
+def test_flush_adds_deltas_to_cache_and_leaderboards_once(fire, backend, guild):
+    seed(backend, 1, 1)
+    fire.fetchLeaderboardPage(guild, 'total', 1)
+    fire.fetchLeaderboardPage(guild, 'discordPoints', 1)
+    fire.fetchWeekTimes(guild)
+
+    assert flushMinutes(fire, 5, 5) == []
+
+    assert fire.fetchTotalTimes(guild) == {'1': 6}
+    assert fire.fetchDiscordPoints(guild) == {'1': 6}
+    assert fire.fetchLeaderboardPage(guild, 'total', 1)[0] == [('1', 6)]
+    assert fire.fetchLeaderboardPage(guild, 'discordPoints', 1)[0] == [('1', 6)]
+    assert fire.fetchWeekTimes(guild)[0] == {'1': 6}
+
+def test_subscribed_documents_count_a_flush_once(fire, backend, guild):
+    seed(backend, 0, 0)
+    fire.subscribe(guild)
+    fire.fetchLeaderboardPage(guild, 'total', 1)
+    fire.fetchLeaderboardPage(guild, 'discordPoints', 1)
+
+    flushMinutes(fire, 5, 5)
+
+    assert backend.getDocument(('1', 'total')) == {'users': {'1': 5}}
+    assert fire.fetchTotalTimes(guild) == {'1': 5}
+    assert fire.fetchDiscordPoints(guild) == {'1': 5}
+    assert fire.fetchLeaderboardPage(guild, 'total', 1)[0] == [('1', 5)]
+    assert fire.fetchLeaderboardPage(guild, 'discordPoints', 1)[0] == [('1', 5)]
+
+def test_subscribed_documents_count_a_point_update_once(fire, backend, guild):
+    seed(backend, 0, 5)
+    fire.subscribe(guild)
+    fire.fetchLeaderboardPage(guild, 'discordPoints', 1)
+
+    assert fire.postPointsIncrement(guild, '1', 3) == 8
+    assert backend.getDocument(('1', 'discordPoints')) == {'1': 8}
+    assert fire.fetchDiscordPoints(guild) == {'1': 8}
+    assert fire.fetchLeaderboardPage(guild, 'discordPoints', 1)[0] == [('1', 8)]
+
+def test_read_between_commit_and_cache_update_isnt_counted_twice(fire, backend, guild):
+    seed(backend, 1, 1)
+    reads = []
+    backend.afterWrite = lambda: reads.append((fire.fetchTotalTimes(guild), fire.fetchDiscordPoints(guild)))
+
+    flushMinutes(fire, 5, 5)
+
+    # The read saw the committed data, but it must not be cached for the flush to add to
+    assert reads == [({'1': 6}, {'1': 6})]
+    assert fire.fetchTotalTimes(guild) == {'1': 6}
+    assert fire.fetchDiscordPoints(guild) == {'1': 6}
+
+def test_leaderboard_built_during_a_flush_isnt_counted_twice(fire, backend, guild):
+    seed(backend, 1, 1)
+    backend.afterWrite = lambda: fire.fetchLeaderboardPage(guild, 'total', 1)
+
+    flushMinutes(fire, 5, 5)
+
+    assert fire.fetchLeaderboardPage(guild, 'total', 1)[0] == [('1', 6)]
+
+def test_week_window_seeded_during_a_flush_isnt_counted_twice(fire, backend, guild):
+    seed(backend, 1, 1)
+    backend.afterWrite = lambda: fire.fetchWeekTimes(guild)
+
+    flushMinutes(fire, 5, 5)
+
+    assert fire.fetchWeekTimes(guild)[0] == {'1': 6}
+
+def test_read_during_point_update_isnt_counted_twice(fire, backend, guild):
+    seed(backend, 0, 10)
+    backend.afterWrite = lambda: fire.fetchLeaderboardPage(guild, 'discordPoints', 1)
+
+    assert fire.postPointsDecrement(guild, '1', 4, 'redeem', 'Pizza') == (6, None)
+    assert fire.fetchDiscordPoints(guild) == {'1': 6}
+    assert fire.fetchLeaderboardPage(guild, 'discordPoints', 1)[0] == [('1', 6)]
+
+def test_points_decrement_never_overdraws(fire, backend, guild):
+    seed(backend, 0, 50)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(fire.postPointsDecrement(guild, '1', 5))) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for points, errorString in results if errorString == None) == 10
+    assert backend.getDocument(('1', 'discordPoints')) == {'1': 0}
+    # The seeded 50 points never went through the ledger, so it only holds the ten decrements
+    assert fire.fetchLedgerBalances(guild) == {'1': -50}
+
+def test_user_stats_built_during_a_flush_arent_counted_twice(fire, backend, guild):
+    seed(backend, 1, 1)
+    reads = []
+    backend.afterWrite = lambda: reads.append(fire.fetchUserStats(guild, '1')['total'])
+
+    flushMinutes(fire, 5, 5)
+
+    # Built from days that already had the flush, so the flush can't add to them as well
+    assert reads == [6]
+    assert fire.fetchUserStats(guild, '1')['total'] == 6
+
+def test_user_stats_are_kept_up_to_date_by_flushes(fire, backend, guild):
+    seed(backend, 1, 1)
+    assert fire.fetchUserStats(guild, '1')['total'] == 1
+
+    flushMinutes(fire, 5, 5)
+    flushMinutes(fire, 2, 2)
+
+    assert fire.fetchUserStats(guild, '1')['total'] == 8
+    assert backend.getDocument(('1', 'stats', 'users', '1'))['total'] == 8
+
+def test_user_stats_build_doesnt_hold_up_other_guilds(fire, backend):
+    slowGuild, otherGuild = SimpleNamespace(id=1), SimpleNamespace(id=2)
+    backend.setDocument(('2', 'stats'), {'builtAt': ''})
+    building, release = threading.Event(), threading.Event()
+
+    def afterQuery(collectionPath):
+        if collectionPath == ('1', 'date', 'days'):
+            building.set()
+            release.wait(5)
+
+    backend.afterQuery = afterQuery
+    builder = threading.Thread(target=lambda: fire.fetchUserStats(slowGuild, '1'))
+    builder.start()
+    assert building.wait(5)
+
+    flush = threading.Thread(target=lambda: fire.postAllTimeDeltas({2: ({getCurrentDayId(): {'1': 3}}, {})}))
+    flush.start()
+    flush.join(2)
+    stillFlushing = flush.is_alive()
+
+    release.set()
+    builder.join()
+    flush.join()
+
+    assert not stillFlushing
+    assert fire.fetchUserStats(otherGuild, '1')['total'] == 3
+
+def test_activity_matrix_built_during_a_flush_isnt_counted_twice(fire, backend, guild):
+    seed(backend, 1, 1)
+    queried = threading.Event()
+    summaries = []
+
+    def afterWrite():
+        # Build the matrix from days that already have the flush, and let the flush carry on while it's stored
+        builder.start()
+        assert queried.wait(5)
+
+    builder = threading.Thread(target=lambda: summaries.append(fire.fetchActivitySummary(guild)))
+    backend.afterQuery = lambda collectionPath: queried.set()
+    backend.afterWrite = afterWrite
+
+    flushMinutes(fire, 5, 5)
+    builder.join()
+
+    assert summaries[0]['total'] == 6
+    assert fire.fetchActivitySummary(guild)['total'] == 6
+
+    flushMinutes(fire, 2, 2)
+
+    assert fire.fetchActivitySummary(guild)['total'] == 8
@@ -0,0 +1,39 @@
+from FireCache import FireCache
+
+def test_invalidate_only_drops_the_documents_entries():
+    cache = FireCache()
+    cache.set((1, 'date', '2026-01-01'), {'a': 1})
+    cache.set((1, 'date', None, None), {})
+    cache.set((1, 'total'), {'users': {}})
+    cache.set((2, 'date', '2026-01-01'), {'b': 1})
+
+    cache.invalidate(1, 'date')
+
+    assert cache.get((1, 'date', '2026-01-01')) == (False, None)
+    assert cache.get((1, 'date', None, None)) == (False, None)
+    assert cache.get((1, 'total')) == (True, {'users': {}})
+    assert cache.get((2, 'date', '2026-01-01')) == (True, {'b': 1})
+
+def test_evicted_entries_can_be_set_and_invalidated_again():
+    cache = FireCache(maxEntries=2)
+    cache.set((1, 'a'), 1)
+    cache.set((1, 'b'), 2)
+    cache.set((1, 'c'), 3)
+
+    assert cache.get((1, 'a')) == (False, None)
+
+    cache.set((1, 'a'), 4)
+    cache.invalidate(1, 'a')
+
+    assert cache.get((1, 'a')) == (False, None)
+    assert cache.get((1, 'c')) == (True, 3)
+
+def test_expired_entries_are_missed():
+    now = [0]
+    cache = FireCache(ttl=10, clock=lambda: now[0])
+    cache.set((1, 'total'), {})
+
+    now[0] = 11
+
+    assert cache.get((1, 'total')) == (False, None)
+    cache.invalidate(1, 'total')
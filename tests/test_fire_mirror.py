@@ -0,0 +1,21 @@
+from FireMirror import FireMirror
+
+def test_get_returns_a_copy_of_the_latest_data():
+    mirror = FireMirror()
+    mirror.apply(1, 'total', {'users': {'1': 5}})
+
+    hit, d = mirror.get(1, 'total')
+    d['users']['1'] = 100
+
+    assert hit
+    assert mirror.get(1, 'total') == (True, {'users': {'1': 5}})
+
+def test_removed_documents_arent_served():
+    mirror = FireMirror()
+    mirror.apply(1, 'total', {})
+    mirror.apply(2, 'total', {})
+
+    mirror.remove(1, 'total')
+
+    assert mirror.get(1, 'total') == (False, None)
+    assert mirror.get(2, 'total') == (True, {})
@@ -0,0 +1,28 @@
+from Leaderboard import Leaderboard
+
+def test_pages_are_ranked_highest_first():
+    leaderboard = Leaderboard({'a': 5, 'b': 10, 'c': 5})
+
+    assert leaderboard.getPage(1, 2) == ([('b', 10), ('a', 5)], 1, 2)
+    assert leaderboard.getPage(2, 2) == ([('c', 5)], 2, 2)
+    assert leaderboard.getPage(3, 2) == ([('b', 10), ('a', 5)], 1, 2)
+
+def test_ranks_follow_score_changes():
+    leaderboard = Leaderboard({'a': 5, 'b': 10})
+
+    leaderboard.add('a', 6)
+    leaderboard.add('c', 1)
+
+    assert leaderboard.getRank('a') == 1
+    assert leaderboard.getRank('b') == 2
+    assert leaderboard.getRank('c') == 3
+    assert leaderboard.getRank('d') == None
+
+def test_sync_removes_missing_users():
+    leaderboard = Leaderboard({'a': 5, 'b': 10})
+
+    leaderboard.sync({'b': 1, 'c': 2})
+
+    assert len(leaderboard) == 2
+    assert leaderboard.getScore('a') == None
+    assert leaderboard.getPage(1) == ([('c', 2), ('b', 1)], 1, 1)
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+
+from MemberCache import MemberCache
+
+def member(memberId, name, guildId=1):
+    return SimpleNamespace(id=memberId, display_name=name, guild=SimpleNamespace(id=guildId))
+
+def test_member_events_only_update_loaded_guilds():
+    cache = MemberCache()
+    cache.loadGuild(SimpleNamespace(id=1, members=[member(1, 'a')]))
+
+    cache.setMember(member(2, 'b'))
+    cache.setMember(member(3, 'c', guildId=2))
+    cache.removeMember(member(1, 'a'))
+
+    assert dict(cache.getMembers(1)) == {2: 'b'}
+    assert not cache.isLoaded(2)
+
+def test_get_members_is_a_read_only_view():
+    cache = MemberCache()
+    cache.setMembers(1, {1: 'a'})
+
+    members = cache.getMembers(1)
+    cache.setMember(member(2, 'b'))
+
+    assert dict(members) == {1: 'a', 2: 'b'}
+    with pytest.raises(TypeError):
+        members[3] = 'c'
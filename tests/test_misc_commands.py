@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('discord')
+
+from AsyncFire import AsyncFire
+from Commands.MiscCommands import MiscCommands
+
+def test_feedback_is_stored_with_the_ids(fire, backend):
+    asyncFire = AsyncFire(fire)
+    miscCommands = MiscCommands(asyncFire)
+
+    try:
+        reply = asyncio.run(miscCommands.sendFeedback(1, 2, "hi"))
+    finally:
+        asyncFire.shutdown()
+
+    assert reply == "Thank you for your feedback <3"
+    assert backend.queryDocuments(('feedback',), 'feedback') == [{'feedback': "hi", 'user': 2, 'guild': 1}]
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+def test_ledger_starts_from_the_current_points_once(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'1': 10})
+
+    fire.startPointsLedger(guild)
+    backend.setDocument(('1', 'discordPoints'), {'1': 99})
+    fire.startPointsLedger(guild)
+
+    assert backend.getDocument(('1', 'pointsLedger'))['balances'] == {'1': 10}
+
+def test_every_point_change_is_in_the_ledger(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'1': 10})
+    fire.startPointsLedger(guild)
+
+    fire.postAllTimeDeltas({guild.id: ({'2021-03-01': {'1': 5}}, {'1': 5, '2': 3})})
+    fire.postPointsDecrement(guild, 1, 3, 'redeem', 'Pizza')
+
+    assert [(entry['reason'], entry['amount']) for entry in fire.fetchPointsHistory(guild, 1)] == [('voice', 5), ('redeem', -3)]
+    assert fire.fetchLedgerBalances(guild) == backend.getDocument(('1', 'discordPoints')) == {'1': 12, '2': 3}
+
+def test_compaction_folds_old_entries_into_the_balances(fire, backend, guild):
+    backend.setDocument(('1', 'discordPoints'), {'1': 10})
+    fire.startPointsLedger(guild)
+    fire.postAllTimeDeltas({guild.id: ({}, {'1': 5})})
+    fire.postAllTimeDeltas({guild.id: ({}, {'1': 2, '2': 1})})
+
+    assert fire.compactPointsLedger(guild, datetime.utcnow() + timedelta(seconds=1)) == 2
+    assert fire.fetchPointsHistory(guild, 1) == []
+    assert backend.getDocument(('1', 'pointsLedger'))['balances'] == {'1': 17, '2': 1}
+    assert fire.fetchLedgerBalances(guild) == {'1': 17, '2': 1}
+    assert fire.compactPointsLedger(guild, datetime.utcnow() + timedelta(seconds=1)) == 0
+
+def test_points_are_rebuilt_from_the_ledger(fire, backend, guild):
+    fire.startPointsLedger(guild)
+    fire.postAllTimeDeltas({guild.id: ({}, {'1': 5})})
+    backend.setDocument(('1', 'discordPoints'), {'1': 1000})
+
+    assert fire.rebuildDiscordPoints(guild) == {'1': 5}
+    assert fire.fetchDiscordPoints(guild) == {'1': 5}
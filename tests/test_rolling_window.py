@@ -0,0 +1,17 @@
+from RollingWindow import RollingWindow
+
+def test_days_before_the_window_are_ignored():
+    window = RollingWindow('2021-03-07', {'2021-03-01': {'1': 5}, '2021-02-28': {'1': 100}})
+
+    window.add('2021-02-27', {'1': 100})
+
+    assert window.getRange() == ('2021-03-01', '2021-03-07')
+    assert window.getTotals() == {'1': 5}
+
+def test_rolling_drops_days_that_leave_the_window():
+    window = RollingWindow('2021-03-07', {'2021-03-01': {'1': 5, '2': 1}, '2021-03-02': {'1': 3}})
+
+    window.add('2021-03-08', {'2': 2})
+
+    assert window.getRange() == ('2021-03-02', '2021-03-08')
+    assert window.getTotals() == {'1': 3, '2': 2}
@@ -0,0 +1,57 @@
+import pytest
+
+from Storage.MemoryBackend import MemoryBackend
+from Storage.SqliteBackend import SqliteBackend
+from Storage.StorageBackend import Increment, DELETE_FIELD
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryBackend()
+    else:
+        backend = SqliteBackend(str(tmp_path / 'kirbec.sqlite3'))
+        yield backend
+        backend.close()
+
+def test_increments_add_to_existing_values(backend):
+    backend.commit([
+        (('1', 'total'), {'users': {'1': Increment(5)}}),
+        (('1', 'discordPoints'), {'1': Increment(2)}),
+    ])
+    backend.commit([
+        (('1', 'total'), {'users': {'1': Increment(3), '2': Increment(1)}}),
+        (('1', 'discordPoints'), {'1': Increment(-1)}),
+    ])
+
+    assert backend.getDocument(('1', 'total')) == {'users': {'1': 8, '2': 1}}
+    assert backend.getDocument(('1', 'discordPoints')) == {'1': 1}
+
+def test_day_range_queries_are_ordered(backend):
+    for day in ['2021-03-01', '2021-03-02', '2021-03-03']:
+        backend.commit([(('1', 'date', 'days', day), {'date': day, 'users': {'1': Increment(1)}})])
+    backend.commit([(('2', 'date', 'days', '2021-03-02'), {'date': '2021-03-02', 'users': {'1': Increment(1)}})])
+
+    days = backend.queryDocuments(('1', 'date', 'days'), 'date', '2021-03-02', None, descending=True)
+
+    assert [d['date'] for d in days] == ['2021-03-03', '2021-03-02']
+    assert days[0]['users'] == {'1': 1}
+
+def test_deleted_fields_and_documents_are_gone(backend):
+    backend.setDocument(('1', 'rewards'), {'Pizza': 500, 'Games': 100})
+    backend.commit([(('1', 'rewards'), {'Pizza': DELETE_FIELD})])
+
+    assert backend.getDocument(('1', 'rewards')) == {'Games': 100}
+
+    backend.deleteDocument(('1', 'rewards'))
+
+    assert backend.getDocument(('1', 'rewards')) == None
+
+def test_other_documents_round_trip(backend):
+    backend.setDocument(('1', 'stats', 'users', '1'), {'total': 5, 'lastDayId': '2021-03-01'})
+    backend.setDocument(('1', 'stats'), {'builtAt': 'now'})
+
+    assert backend.getDocuments([('1', 'stats', 'users', '1'), ('1', 'stats', 'users', '2')]) == {
+        ('1', 'stats', 'users', '1'): {'total': 5, 'lastDayId': '2021-03-01'},
+        ('1', 'stats', 'users', '2'): None,
+    }
+    assert backend.getDocument(('1', 'stats')) == {'builtAt': 'now'}
@@ -0,0 +1,56 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from TickScheduler import TickScheduler
+
+def runTicks(scheduler, guilds, tickGuild, numTicks):
+    """
+    Run the scheduler until numTicks ticks are over and return when each one ended
+    """
+
+    tickEnds = []
+
+    async def afterTick():
+        tickEnds.append(time.time())
+
+    asyncio.run(scheduler.run(lambda: guilds, tickGuild, afterTick, lambda: len(tickEnds) >= numTicks))
+    return tickEnds
+
+def test_ticks_start_on_interval_boundaries():
+    tickStarts = []
+
+    async def tickGuild(guild):
+        tickStarts.append(time.time())
+
+    runTicks(TickScheduler(0.05), [SimpleNamespace(id=1)], tickGuild, 3)
+
+    assert len(tickStarts) == 3
+    for start in tickStarts:
+        assert start % 0.05 < 0.02
+
+def test_guilds_run_concurrently_up_to_the_limit():
+    running = []
+    mostRunning = []
+
+    async def tickGuild(guild):
+        running.append(guild.id)
+        mostRunning.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(guild.id)
+
+    runTicks(TickScheduler(0.2, maxConcurrency=3), [SimpleNamespace(id=i) for i in range(10)], tickGuild, 1)
+
+    assert max(mostRunning) == 3
+
+def test_an_error_in_one_guild_doesnt_stop_the_others():
+    ticked = []
+
+    async def tickGuild(guild):
+        if guild.id == 1:
+            raise Exception("guild is broken")
+        ticked.append(guild.id)
+
+    runTicks(TickScheduler(0.05), [SimpleNamespace(id=i) for i in range(3)], tickGuild, 2)
+
+    assert sorted(ticked) == [0, 0, 2, 2]
@@ -0,0 +1,82 @@
+import asyncio
+
+from TimeAccumulator import TimeAccumulator
+
+class FakeFire:
+    """
+    Records the flushed deltas and fails the given guilds (or the whole flush)
+    """
+
+    def __init__(self, failedGuildIds=[], error=None):
+        self.failedGuildIds = failedGuildIds
+        self.error = error
+        self.flushed = None
+
+    async def postAllTimeDeltas(self, guildDeltas):
+        if self.error != None:
+            raise self.error
+
+        self.flushed = guildDeltas
+        return self.failedGuildIds
+
+def test_minutes_are_summed_until_drained():
+    accumulator = TimeAccumulator()
+    accumulator.addMinutes(1, {'a': 1, 'b': 1}, True)
+    accumulator.addMinutes(1, {'a': 1}, False)
+    accumulator.addMinutes(2, {'c': 1}, False)
+
+    drained = accumulator.drain()
+
+    assert [list(dayDeltas.values()) for dayDeltas, pointDeltas in (drained[1], drained[2])] == [[{'a': 2, 'b': 1}], [{'c': 1}]]
+    assert drained[1][1] == {'a': 1, 'b': 1}
+    assert drained[2][1] == {}
+    assert accumulator.drain() == {}
+
+def test_empty_ticks_add_nothing():
+    accumulator = TimeAccumulator()
+    accumulator.addMinutes(1, {}, True)
+
+    assert accumulator.drain() == {}
+
+def test_restore_merges_with_new_minutes():
+    accumulator = TimeAccumulator()
+    accumulator.addMinutes(1, {'a': 2}, True)
+    drained = accumulator.drain()
+
+    accumulator.addMinutes(1, {'a': 1}, True)
+    accumulator.restore(drained)
+
+    dayDeltas, pointDeltas = accumulator.drain()[1]
+    assert list(dayDeltas.values()) == [{'a': 3}]
+    assert pointDeltas == {'a': 3}
+
+def test_flush_is_due_after_the_interval():
+    assert not TimeAccumulator(300).isFlushDue()
+    assert TimeAccumulator(0).isFlushDue()
+
+def test_failed_guilds_are_kept_for_the_next_flush():
+    accumulator = TimeAccumulator(0)
+    accumulator.addMinutes(1, {'a': 2}, True)
+    accumulator.addMinutes(2, {'b': 1}, True)
+    fire = FakeFire(failedGuildIds=[2])
+
+    asyncio.run(accumulator.flush(fire))
+
+    assert sorted(fire.flushed) == [1, 2]
+    assert list(accumulator.drain()) == [2]
+
+def test_every_guild_is_kept_when_the_flush_fails():
+    accumulator = TimeAccumulator(0)
+    accumulator.addMinutes(1, {'a': 2}, True)
+    accumulator.addMinutes(2, {'b': 1}, True)
+
+    asyncio.run(accumulator.flush(FakeFire(error=Exception("database is down"))))
+
+    assert sorted(accumulator.drain()) == [1, 2]
+
+def test_nothing_is_written_without_minutes():
+    fire = FakeFire()
+
+    asyncio.run(TimeAccumulator(0).flush(fire))
+
+    assert fire.flushed == None
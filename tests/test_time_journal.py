@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from TimeAccumulator import TimeAccumulator
+from TimeJournal import TimeJournal
+
+class FakeFire:
+    """
+    Records the flushed deltas and fails the given guilds
+    """
+
+    def __init__(self, failedGuildIds=[]):
+        self.failedGuildIds = failedGuildIds
+        self.flushed = None
+
+    async def postAllTimeDeltas(self, guildDeltas):
+        self.flushed = guildDeltas
+        return self.failedGuildIds
+
+def test_unflushed_minutes_are_replayed(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+
+    async def run():
+        accumulator = TimeAccumulator(300, TimeJournal(path))
+        accumulator.addMinutes(1, {'a': 2}, True)
+        accumulator.addMinutes(2, {'b': 1}, False)
+        await accumulator.writeJournal()
+
+        # Restarted without flushing
+        restarted = TimeAccumulator(300, TimeJournal(path))
+        await restarted.replayJournal()
+        return restarted.drain()
+
+    drained = asyncio.run(run())
+
+    assert {guildId: dict(deltas[0]) for guildId, deltas in drained.items()} == {
+        1: {next(iter(drained[1][0])): {'a': 2}},
+        2: {next(iter(drained[2][0])): {'b': 1}},
+    }
+    assert drained[1][1] == {'a': 2}
+    assert drained[2][1] == {}
+
+def test_only_failed_guilds_stay_journaled(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+
+    async def run():
+        accumulator = TimeAccumulator(0, TimeJournal(path))
+        accumulator.addMinutes(1, {'a': 2}, True)
+        accumulator.addMinutes(2, {'b': 1}, False)
+        await accumulator.writeJournal()
+        # Not journaled until the flush
+        accumulator.addMinutes(1, {'a': 1}, True)
+
+        fire = FakeFire(failedGuildIds=[2])
+        await accumulator.flush(fire)
+        return fire.flushed
+
+    flushed = asyncio.run(run())
+    pending = TimeJournal(path).pending()
+
+    assert list(flushed[1][0].values()) == [{'a': 3}]
+    assert flushed[1][1] == {'a': 3}
+    assert list(pending) == [2]
+    assert list(pending[2][0].values()) == [{'b': 1}]
+
+def test_journal_is_cleared_after_a_flush(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+
+    async def run():
+        accumulator = TimeAccumulator(0, TimeJournal(path))
+        accumulator.addMinutes(1, {'a': 2}, True)
+        await accumulator.flush(FakeFire())
+
+    asyncio.run(run())
+
+    assert TimeJournal(path).pending() == {}
+
+class UnacknowledgedJournal(TimeJournal):
+    """
+    Journal that can't remove flushed increments
+    """
+
+    def acknowledge(self, upToId, failedGuildIds=[]):
+        raise Exception("disk I/O error")
+
+def test_failed_guilds_are_kept_when_acknowledging_fails(tmp_path):
+    path = str(tmp_path / 'journal.sqlite3')
+
+    async def run():
+        accumulator = TimeAccumulator(0, UnacknowledgedJournal(path))
+        accumulator.addMinutes(1, {'a': 2}, True)
+        accumulator.addMinutes(2, {'b': 1}, False)
+
+        await accumulator.flush(FakeFire(failedGuildIds=[2]))
+        return accumulator.drain()
+
+    drained = asyncio.run(run())
+
+    assert list(drained) == [2]
+    assert list(drained[2][0].values()) == [{'b': 1}]
+
+def test_close_stops_the_journal(tmp_path):
+    journal = TimeJournal(str(tmp_path / 'journal.sqlite3'))
+    accumulator = TimeAccumulator(0, journal)
+
+    asyncio.run(accumulator.close())
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        journal.lastId()
@@ -0,0 +1,34 @@
+from UserStats import UserStats
+
+def test_streak_and_best_day_follow_added_days():
+    stats = UserStats()
+    stats.addMinutes('2021-03-01', 30)
+    stats.addMinutes('2021-03-02', 10)
+    stats.addMinutes('2021-03-02', 25)
+
+    assert stats.total == 65
+    assert (stats.bestDayId, stats.bestMinutes) == ('2021-03-02', 35)
+    assert stats.getTodayMinutes('2021-03-02') == 35
+    assert stats.getStreak('2021-03-03') == 2
+    assert stats.getStreak('2021-03-04') == 0
+
+def test_a_missed_day_restarts_the_streak():
+    stats = UserStats()
+    stats.addMinutes('2021-03-01', 5)
+    stats.addMinutes('2021-03-03', 5)
+
+    assert stats.getStreak('2021-03-03') == 1
+
+def test_earlier_days_only_count_towards_the_total():
+    stats = UserStats()
+    stats.addMinutes('2021-03-02', 5)
+    stats.addMinutes('2021-03-01', 50)
+
+    assert stats.total == 55
+    assert (stats.lastDayId, stats.bestMinutes) == ('2021-03-02', 5)
+
+def test_round_trips_through_a_dict():
+    stats = UserStats()
+    stats.addMinutes('2021-03-01', 5)
+
+    assert UserStats(stats.toDict()).toDict() == stats.toDict()
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+from VoiceTracker import VoiceTracker
+
+class Clock:
+    """
+    Clock that only moves when it's told to
+    """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+GENERAL = SimpleNamespace(id=10)
+
+def voiceState(channel=GENERAL, selfDeaf=False, afk=False, selfMute=False):
+    return SimpleNamespace(channel=channel, self_deaf=selfDeaf, afk=afk, deaf=False, self_mute=selfMute, mute=False)
+
+def member(userId, guildId=1):
+    return SimpleNamespace(id=userId, guild=SimpleNamespace(id=guildId))
+
+def test_minutes_are_tracked_from_join_to_leave():
+    clock = Clock()
+    tracker = VoiceTracker(clock)
+
+    tracker.onVoiceStateUpdate(member(1), voiceState(channel=None), voiceState())
+    clock.now = 150
+    tracker.onVoiceStateUpdate(member(1), voiceState(), voiceState(channel=None))
+    clock.now = 1000
+
+    assert tracker.collectMinutes(1) == {'1': 2}
+    assert tracker.collectMinutes(1) == {}
+
+def test_leftover_seconds_carry_over():
+    clock = Clock()
+    tracker = VoiceTracker(clock)
+    tracker.onVoiceStateUpdate(member(1), voiceState(channel=None), voiceState())
+
+    clock.now = 90
+    assert tracker.collectMinutes(1) == {'1': 1}
+
+    clock.now = 120
+    assert tracker.collectMinutes(1) == {'1': 1}
+
+def test_deafened_and_afk_time_isnt_tracked():
+    clock = Clock()
+    tracker = VoiceTracker(clock)
+    tracker.onVoiceStateUpdate(member(1), voiceState(channel=None), voiceState())
+
+    clock.now = 60
+    tracker.onVoiceStateUpdate(member(1), voiceState(), voiceState(selfDeaf=True))
+    clock.now = 600
+    tracker.onVoiceStateUpdate(member(1), voiceState(selfDeaf=True), voiceState(afk=True))
+    clock.now = 1200
+
+    assert tracker.collectMinutes(1) == {'1': 1}
+
+def test_sync_opens_and_closes_intervals():
+    clock = Clock()
+    tracker = VoiceTracker(clock)
+    tracker.onVoiceStateUpdate(member(1), voiceState(channel=None), voiceState())
+
+    # Member 1 left and member 2 joined while the bot was disconnected
+    clock.now = 60
+    tracker.syncGuild(SimpleNamespace(id=1, voice_channels=[SimpleNamespace(members=[SimpleNamespace(id=2, voice=voiceState())])]))
+    clock.now = 180
+
+    assert tracker.collectMinutes(1) == {'1': 1, '2': 2}
+
+def test_presence_follows_voice_state_events():
+    tracker = VoiceTracker(Clock())
+
+    tracker.onVoiceStateUpdate(member(1), voiceState(channel=None), voiceState(selfMute=True))
+    tracker.onVoiceStateUpdate(member(2), voiceState(channel=None), voiceState(selfDeaf=True))
+
+    presence = tracker.getPresence(1)
+    assert sorted(presence) == ['1', '2']
+    assert presence['1'].channelId == 10 and presence['1'].selfMute
+    assert tracker.getEligibleUserIds(1) == ['1']
+
+    tracker.onVoiceStateUpdate(member(1), voiceState(), voiceState(channel=None))
+    tracker.onVoiceStateUpdate(member(2), voiceState(selfDeaf=True), voiceState(channel=None))
+
+    assert tracker.getPresence(1) == {}
+
+def test_only_guilds_with_time_to_collect_are_active():
+    clock = Clock()
+    tracker = VoiceTracker(clock)
+    assert tracker.activeGuildIds() == []
+
+    tracker.onVoiceStateUpdate(member(1, guildId=1), voiceState(channel=None), voiceState())
+    tracker.onVoiceStateUpdate(member(2, guildId=2), voiceState(channel=None), voiceState())
+    assert sorted(tracker.activeGuildIds()) == [1, 2]
+
+    # Guild 1 is left with a minute to collect, guild 2 only with leftover seconds
+    clock.now = 70
+    tracker.onVoiceStateUpdate(member(1, guildId=1), voiceState(), voiceState(channel=None))
+    assert tracker.collectMinutes(2) == {'2': 1}
+    tracker.onVoiceStateUpdate(member(2, guildId=2), voiceState(), voiceState(channel=None))
+    assert tracker.activeGuildIds() == [1]
+
+    assert tracker.collectMinutes(1) == {'1': 1}
+    assert tracker.activeGuildIds() == []